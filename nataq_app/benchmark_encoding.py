@@ -0,0 +1,105 @@
+"""
+Nataq - Subtitle Burn-in Encoding Benchmark
+Compares one-pass x264 burn-in with keyframe-split parallel encoding
+
+Usage:
+  python benchmark_encoding.py lecture.mp4 [--srt subtitles.srt] [--workers 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.subtitle_generator import SubtitleGenerator, split_encode_workers
+from core.media_probe import probe_media, keyframe_index
+from utils.config import TEMP_DIR, SPLIT_ENCODE_MIN_SECONDS
+
+
+def write_dummy_srt(generator, duration, path, every=3.0):
+    """A subtitle every few seconds, so the filter has work for the whole video"""
+    segments = []
+    t = 0.0
+    while t < duration:
+        segments.append({"start": t, "end": min(t + every - 0.5, duration),
+                         "text": f"Benchmark subtitle line at {t:.0f} seconds"})
+        t += every
+    return generator.create_srt_from_translated_segments(segments, path)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed:8.1f}s", flush=True)
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark split-encode subtitle burn-in")
+    parser.add_argument("video")
+    parser.add_argument("--srt", help="Subtitles to burn (default: generated)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="Parallel encoder counts to try (default: powers of two up to the core count)")
+    parser.add_argument("--keep", action="store_true", help="Keep the encoded outputs")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    media = probe_media(args.video)
+    keyframes = keyframe_index(args.video)
+    print("=" * 60)
+    print("Nataq - Subtitle Burn-in Encoding Benchmark")
+    print("=" * 60)
+    print(f"Video:     {os.path.basename(args.video)} ({media.duration:.0f}s, "
+          f"{media.video_stream.width}x{media.video_stream.height})")
+    print(f"Keyframes: {len(keyframes)} (median GOP {media.keyframe_interval or 0:.1f}s)")
+    print(f"Cores:     {cores}")
+    if media.duration < SPLIT_ENCODE_MIN_SECONDS:
+        print(f"⚠️ Videos under {SPLIT_ENCODE_MIN_SECONDS}s are never split; use a longer input")
+        return
+
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    generator = SubtitleGenerator()
+    srt_path = args.srt or write_dummy_srt(generator, media.duration, TEMP_DIR / "benchmark.srt")
+
+    worker_counts = args.workers or [n for n in (2, 4, 8, 16, 32, 64) if n <= cores] or [2]
+    outputs = []
+
+    print()
+    output = TEMP_DIR / "benchmark_onepass.mp4"
+    outputs.append(output)
+    baseline, _ = timed(f"one pass (x264, {cores} threads)", lambda: generator.burn_subtitles_into_video(
+        args.video, srt_path, output, split=False))
+
+    results = []
+    for workers in worker_counts:
+        threads = max(1, cores // workers)
+        output = TEMP_DIR / f"benchmark_split_{workers}.mp4"
+        outputs.append(output)
+        elapsed, result = timed(f"split {workers} x {threads} threads", lambda: generator.burn_subtitles_split(
+            args.video, srt_path, output, workers=workers, threads=threads))
+        if result is None:
+            print("    (not split: too few keyframes)")
+            continue
+        results.append((workers, threads, elapsed))
+
+    print()
+    print(f"{'encoders':>8} {'threads':>8} {'cores':>6} {'time':>8} {'speedup':>8}")
+    print(f"{1:>8} {cores:>8} {cores:>6} {baseline:>7.1f}s {1.0:>7.2f}x")
+    for workers, threads, elapsed in results:
+        print(f"{workers:>8} {threads:>8} {min(cores, workers * threads):>6} "
+              f"{elapsed:>7.1f}s {baseline / elapsed:>7.2f}x")
+    print(f"\nDefault for this machine: {split_encode_workers()} encoders")
+
+    if not args.keep:
+        for output in outputs:
+            if os.path.exists(output):
+                os.remove(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Nataq - Inference Precision Benchmark
+Times Whisper, NLLB-200 and XTTS v2 at fp32/fp16/bf16/int8 and scores each against fp32 with chrF
+int8 covers NLLB and the Whisper decoder; XTTS reports it as skipped (runs as fp32)
+
+Quality:
+  whisper  chrF of the transcript against the fp32 transcript (needs --audio)
+  nllb     chrF of the fixture translations against the fp32 translations
+  xtts     chrF of an fp32 Whisper transcript of the speech against the text spoken
+
+Usage:
+  python benchmark_precision.py --audio lecture.wav [--models whisper nllb xtts]
+  python benchmark_precision.py --models nllb --precisions fp32 int8 --fixtures sentences.json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.model_manager import ModelManager
+from core.precision import PRECISIONS, resolve_precision
+from core.processor import VideoProcessor, xtts_language
+from utils.config import setup_environment, get_device
+
+# English sources with Arabic texts for XTTS (fixtures list [{"en", "ar"}, ...])
+FIXTURES = [
+    {"en": "Welcome to this lesson about the history of science.",
+     "ar": "مرحبا بكم في هذا الدرس عن تاريخ العلوم."},
+    {"en": "Gravity pulls every object towards the centre of the Earth.",
+     "ar": "الجاذبية تسحب كل جسم نحو مركز الأرض."},
+    {"en": "Ibn Khaldun is often called the father of sociology.",
+     "ar": "يُلقب ابن خلدون غالبا بأبي علم الاجتماع."},
+    {"en": "Please check your answers before you submit the exam.",
+     "ar": "يرجى مراجعة إجاباتك قبل تسليم الامتحان."},
+    {"en": "The experiment was repeated three times to confirm the result.",
+     "ar": "أعيدت التجربة ثلاث مرات لتأكيد النتيجة."},
+    {"en": "Water boils at one hundred degrees Celsius at sea level.",
+     "ar": "يغلي الماء عند مئة درجة مئوية عند مستوى سطح البحر."},
+    {"en": "In the next chapter we will discuss the economy of the city.",
+     "ar": "في الفصل التالي سنناقش اقتصاد المدينة."},
+    {"en": "Thank you for watching, and see you in the next video.",
+     "ar": "شكرا على المشاهدة، ونراكم في الفيديو القادم."},
+]
+
+MODELS = ("whisper", "nllb", "xtts")
+
+
+def chrf(hypotheses, references, order=6, beta=2.0):
+    """Corpus chrF (character 1..6-grams, recall weighted by beta, whitespace ignored), 0-100"""
+    matches = np.zeros(order)
+    hyp_counts = np.zeros(order)
+    ref_counts = np.zeros(order)
+    for hyp, ref in zip(hypotheses, references):
+        hyp, ref = "".join(hyp.split()), "".join(ref.split())
+        for n in range(1, order + 1):
+            h = Counter(hyp[i:i + n] for i in range(len(hyp) - n + 1))
+            r = Counter(ref[i:i + n] for i in range(len(ref) - n + 1))
+            matches[n - 1] += sum((h & r).values())
+            hyp_counts[n - 1] += sum(h.values())
+            ref_counts[n - 1] += sum(r.values())
+    used = (hyp_counts > 0) & (ref_counts > 0)
+    if not used.any():
+        return 100.0 if not hyp_counts.any() and not ref_counts.any() else 0.0
+    precision = (matches[used] / hyp_counts[used]).mean()
+    recall = (matches[used] / ref_counts[used]).mean()
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
+
+
+def to_16k(samples, sample_rate):
+    """Linear resample to Whisper's 16 kHz"""
+    if sample_rate == 16000:
+        return samples.astype(np.float32)
+    positions = np.arange(0, samples.size, sample_rate / 16000)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_whisper(processor, args, audio):
+    processor.load_whisper(args.whisper_model)
+    processor.transcribe_samples(audio[:16000 * 5], args.source_lang)  # warm-up
+    elapsed, (text, _) = timed(lambda: processor.transcribe_samples(audio, args.source_lang))
+    return elapsed, [text], audio.size / 16000
+
+
+def run_nllb(processor, args, sources):
+    processor.load_nllb()
+    processor.translate_texts(sources[:1], args.source_lang, args.target_lang)  # warm-up
+    elapsed, translations = timed(
+        lambda: processor.translate_texts(sources, args.source_lang, args.target_lang)
+    )
+    return elapsed, translations, None
+
+
+def run_xtts(processor, args, texts, judge):
+    processor.load_tts()
+    lang_code = xtts_language(args.target_lang)
+    speaker_wav = processor.resolve_speaker_wav(args.voice, None)
+    sample_rate = processor.tts_sample_rate()
+    todo = list(enumerate(texts))
+    processor.synthesize_texts(todo[:1], speaker_wav, lang_code, sample_rate)  # warm-up
+    elapsed, (synthesized, _) = timed(
+        lambda: processor.synthesize_texts(todo, speaker_wav, lang_code, sample_rate)
+    )
+    waves = [synthesized.get(i, np.zeros(0, dtype=np.float32)) for i in range(len(texts))]
+    heard = [judge.transcribe_samples(to_16k(wav, sample_rate), args.target_lang)[0] if wav.size else ""
+             for wav in waves]
+    return elapsed, heard, sum(w.size for w in waves) / sample_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reduced-precision inference")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--audio", help="Speech for the Whisper run (any format ffmpeg reads)")
+    parser.add_argument("--fixtures", help='JSON list of {"en": ..., "ar": ...} sentences')
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--source-lang", default="en")
+    parser.add_argument("--target-lang", default="ar")
+    parser.add_argument("--voice", default="male", help="Voice type for the XTTS run")
+    args = parser.parse_args()
+
+    setup_environment()
+    device = get_device()
+    fixtures = FIXTURES
+    if args.fixtures:
+        with open(args.fixtures, "r", encoding="utf-8") as f:
+            fixtures = json.load(f)
+
+    print("=" * 60)
+    print("Nataq - Inference Precision Benchmark")
+    print("=" * 60)
+    print(f"Device:    {device}")
+    print(f"Fixtures:  {len(fixtures)} sentences")
+
+    audio = None
+    if "whisper" in args.models:
+        if args.audio:
+            audio = VideoProcessor().extract_audio_samples(args.audio).astype(np.float32) / 32768.0
+        else:
+            print("⚠️ Skipping Whisper: pass --audio")
+            args.models = [m for m in args.models if m != "whisper"]
+
+    # The fp32 Whisper used to score XTTS intelligibility
+    judge = None
+    if "xtts" in args.models:
+        judge = VideoProcessor(models=ModelManager(precision={"whisper": "fp32"}))
+        judge.load_whisper(args.whisper_model)
+
+    for model in args.models:
+        key = "tts" if model == "xtts" else model
+        print(f"\n{model}")
+        print(f"  {'precision':<10} {'runs as':<8} {'time':>8} {'speed':>9} {'chrF':>7}")
+
+        baseline = None
+        baseline_time = None
+        tried = set()
+        for requested in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+            precision, reason = resolve_precision(requested, device, key)
+            if precision in tried:
+                print(f"  {requested:<10} skipped ({reason})")
+                continue
+            tried.add(precision)
+
+            processor = VideoProcessor(models=ModelManager(precision={key: requested}))
+            processor.transcript_cache = None
+            if model == "whisper":
+                elapsed, outputs, seconds = run_whisper(processor, args, audio)
+            elif model == "nllb":
+                elapsed, outputs, seconds = run_nllb(processor, args, [f[args.source_lang] for f in fixtures])
+            else:
+                texts = [f[args.target_lang] for f in fixtures]
+                elapsed, outputs, seconds = run_xtts(processor, args, texts, judge)
+
+            if model == "xtts":
+                score = chrf(outputs, texts)
+            elif baseline is None:
+                score = 100.0
+            else:
+                score = chrf(outputs, baseline)
+            if baseline is None:
+                baseline, baseline_time = outputs, elapsed
+
+            speed = f"{seconds / elapsed:.1f}x RT" if seconds else f"{baseline_time / elapsed:.2f}x"
+            print(f"  {requested:<10} {precision:<8} {elapsed:>7.2f}s {speed:>9} {score:>7.1f}", flush=True)
+
+            del processor
+            gc.collect()
+
+    print("\nSpeed is real-time factor for audio models and speedup over fp32 for NLLB;")
+    print("chrF is against fp32 output (XTTS: an fp32 Whisper transcript against the input text).")
+    print("Set NATAQ_WHISPER_PRECISION / NATAQ_NLLB_PRECISION / NATAQ_XTTS_PRECISION to apply.")
+
+
+if __name__ == "__main__":
+    main()
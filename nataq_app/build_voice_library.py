@@ -0,0 +1,80 @@
+"""
+Nataq - Voice Library Builder
+Normalize reference clips and precompute their XTTS latents into one mmap'd pack
+
+Examples:
+  python build_voice_library.py                                  (voices/ from PRETRAINED_VOICES)
+  python build_voice_library.py clips/*.wav --language ar --gender male --dialect gulf
+  python build_voice_library.py --clips voices.json              ([{"id", "file", "language", ...}])
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.model_manager import ModelManager
+from core.voice_library import VoiceLibraryBuilder
+from utils.config import (setup_environment, PRETRAINED_VOICES, VOICES_DIR, VOICE_LIBRARY_DIR,
+                          VOICE_LIBRARY_WORKERS)
+
+
+def print_progress(percent, message):
+    print(f"[{percent:3d}%] {message}", flush=True)
+
+
+def pretrained_sources():
+    """PRETRAINED_VOICES entries whose WAV exists in VOICES_DIR"""
+    sources = []
+    for voice_id, info in PRETRAINED_VOICES.items():
+        path = VOICES_DIR / info["file"]
+        if path.exists():
+            sources.append(dict(info, id=voice_id, file=str(path)))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the indexed voice library")
+    parser.add_argument("files", nargs="*", help="Reference clips (any format ffmpeg reads)")
+    parser.add_argument("--clips", help="JSON list of clips with id, file, name, language, gender, dialect")
+    parser.add_argument("--language", help="Language of the positional clips")
+    parser.add_argument("--gender", choices=["male", "female"], help="Gender of the positional clips")
+    parser.add_argument("--dialect", help="Dialect of the positional clips")
+    parser.add_argument("--output", default=str(VOICE_LIBRARY_DIR), help="Library directory")
+    parser.add_argument("--workers", type=int, default=VOICE_LIBRARY_WORKERS,
+                        help="Parallel clip normalizations")
+    args = parser.parse_args()
+
+    sources = []
+    if args.clips:
+        with open(args.clips, "r", encoding="utf-8") as f:
+            sources += json.load(f)
+    for path in args.files:
+        sources.append({
+            "id": Path(path).stem, "file": path, "name": Path(path).stem,
+            "language": args.language, "gender": args.gender, "dialect": args.dialect
+        })
+    if not sources:
+        sources = pretrained_sources()
+    if not sources:
+        print("No clips given and no pre-trained voices found.")
+        print("Run 'python create_voices.py' first, or pass audio files.")
+        return 1
+
+    setup_environment()
+    models = ModelManager()
+    models.load_tts(print_progress)
+    tts_model = models.tts_engine.synthesizer.tts_model
+
+    library = VoiceLibraryBuilder(tts_model, args.output, args.workers).build(sources, print_progress)
+    for voice in library.voices:
+        print(f"  {voice['id']:<16} {voice.get('language') or '-':<4} "
+              f"{voice.get('gender') or '-':<7} {voice.get('dialect') or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,20 @@
 """
-Standalone Voice Converter - No Dependencies
+Standalone Voice Converter - No ML Dependencies
 Works with any Python version, only needs FFmpeg
+Voices are listed in utils/config.py (PRETRAINED_VOICES); add them to the
+indexed voice library afterwards with build_voice_library.py
 """
 
 import os
+import sys
 import subprocess
-import json
 from pathlib import Path
 
-# Define voices directly (no imports)
-VOICES_DIR = Path(__file__).parent / "voices"
+# Add parent directory to path (utils.config only uses the standard library)
+sys.path.insert(0, str(Path(__file__).parent))
 
-PRETRAINED_VOICES = {
-    "male_ar": {
-        "name": "Arabic Male Voice",
-        "name_ar": "صوت ذكر عربي",
-        "file": "male_arabic.wav"
-    },
-    "female_ar": {
-        "name": "Arabic Female Voice", 
-        "name_ar": "صوت أنثى عربي",
-        "file": "female_arabic.wav"
-    },
-    "male_en": {
-        "name": "English Male Voice",
-        "name_ar": "صوت ذكر إنجليزي",
-        "file": "male_english.wav"
-    },
-    "female_en": {
-        "name": "English Female Voice",
-        "name_ar": "صوت أنثى إنجليزي", 
-        "file": "female_english.wav"
-    }
-}
+from utils.config import (PRETRAINED_VOICES, VOICES_DIR, VOICE_LIBRARY_SAMPLE_RATE,
+                          VOICE_LIBRARY_MAX_SECONDS)
 
 def check_ffmpeg():
     """Check if ffmpeg is available"""
@@ -57,9 +39,9 @@ def convert_voice(input_file, output_name):
         cmd = [
             'ffmpeg',
             '-i', str(input_file),
-            '-ar', '22050',        # 22050 Hz sample rate
+            '-ar', str(VOICE_LIBRARY_SAMPLE_RATE),  # Library sample rate
             '-ac', '1',            # Mono
-            '-t', '30',            # Max 30 seconds
+            '-t', str(VOICE_LIBRARY_MAX_SECONDS),   # Max length kept per voice
             '-acodec', 'pcm_s16le',  # 16-bit PCM
             '-y',                  # Overwrite
             str(output_path)
@@ -115,14 +97,14 @@ def main():
     print()
     
     # Select voice
-    slot = input("Select voice to create (1-4) or Q to quit: ").strip()
+    slot = input(f"Select voice to create (1-{len(voice_list)}) or Q to quit: ").strip()
     
     if slot.upper() == 'Q':
         return
     
     try:
         slot_num = int(slot)
-        if slot_num < 1 or slot_num > 4:
+        if slot_num < 1 or slot_num > len(voice_list):
             print("Invalid selection")
             return
         voice_id, voice_info = voice_list[slot_num - 1]
@@ -158,12 +140,15 @@ def main():
         # Count created voices
         created = sum(1 for _, info in PRETRAINED_VOICES.items() 
                      if (VOICES_DIR / info['file']).exists())
-        print(f"\nProgress: {created}/4 voices created")
+        total = len(PRETRAINED_VOICES)
+        print(f"\nProgress: {created}/{total} voices created")
         
-        if created == 4:
+        if created == total:
             print("\n✓ All voices ready!")
         else:
-            print(f"\nRemaining: {4 - created} voice(s)")
+            print(f"\nRemaining: {total - created} voice(s)")
+        print("\nTo add the voices to the indexed voice library (precomputed latents):")
+        print("  python build_voice_library.py")
     else:
         print("\nConversion failed")
     
@@ -3,8 +3,7 @@ Dialect-Specific Arabic Translation Module
 Handles translation to specific Arabic dialects with proper prompting
 """
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from core.tracing import NULL_TRACER
 
 # Dialect-specific system prompts for better translation
 DIALECT_PROMPTS = {
@@ -48,16 +47,28 @@ DIALECT_PROMPTS = {
 class DialectTranslator:
     """Handles dialect-specific Arabic translation"""
     
-    def __init__(self, model_name="facebook/nllb-200-distilled-600M", device="cuda"):
+    def __init__(self, model_name="facebook/nllb-200-distilled-600M", device="cuda",
+                 model=None, tokenizer=None):
         self.device = device
         self.model_name = model_name
         
-        # Load model
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device)
+        if model is not None and tokenizer is not None:
+            # Reuse an already-loaded NLLB instead of holding a second copy
+            self.tokenizer = tokenizer
+            self.model = model
+        else:
+            # Imported here so that importing this module does not pull in torch
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+            
+            # Load model
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device)
         
         # For GPT-based post-processing (if needed)
         self.dialect_examples = self._load_dialect_examples()
+        
+        # Job tracer, set by VideoProcessor while a traced job runs
+        self.tracer = NULL_TRACER
     
     def _load_dialect_examples(self):
         """Load example phrases for each dialect"""
@@ -148,6 +159,7 @@ class DialectTranslator:
     
     def _translate_base(self, text, source_lang, target_lang):
         """Base NLLB translation"""
+        import torch
         
         # Tokenize
         inputs = self.tokenizer(
@@ -162,7 +174,8 @@ class DialectTranslator:
         forced_bos_token_id = self.tokenizer.lang_code_to_id[target_lang]
         
         # Translate
-        with torch.no_grad():
+        with torch.no_grad(), self.tracer.span("nllb.generate", "model", dialect_base=True,
+                                               tokens=int(inputs["input_ids"].shape[-1])):
             outputs = self.model.generate(
                 **inputs,
                 forced_bos_token_id=forced_bos_token_id,
@@ -173,6 +186,12 @@ class DialectTranslator:
         translation = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
         return translation
     
+    def adapt_to_dialect(self, msa_text, dialect):
+        """Adapt an MSA translation to a dialect (MSA is returned unchanged)"""
+        if dialect == "msa":
+            return msa_text
+        return self._adapt_to_dialect(msa_text, dialect)
+    
     def _adapt_to_dialect(self, msa_text, dialect):
         """
         Adapt MSA text to specific dialect using rule-based transformations
@@ -0,0 +1,123 @@
+"""
+Speaker Diarization Module
+Labels transcript segments by speaker with a lightweight local diarizer
+Speaker-encoder embeddings per segment, clustered by average-linkage cosine similarity
+"""
+
+import numpy as np
+from utils.config import (DIARIZATION_THRESHOLD, DIARIZATION_MAX_SPEAKERS,
+                          DIARIZATION_MIN_SEGMENT_SECONDS)
+
+
+def segment_embeddings(samples, segments, embed, sample_rate=16000,
+                       min_seconds=DIARIZATION_MIN_SEGMENT_SECONDS):
+    """
+    One speaker embedding per segment (None for segments shorter than min_seconds)
+
+    `embed` maps float32 samples at sample_rate to a vector.
+    """
+    embeddings = []
+    for seg in segments:
+        start = max(0, int(seg["start"] * sample_rate))
+        end = min(samples.size, int(seg["end"] * sample_rate))
+        if (end - start) < min_seconds * sample_rate:
+            embeddings.append(None)
+            continue
+        embeddings.append(np.asarray(embed(samples[start:end]), dtype=np.float32).reshape(-1))
+    return embeddings
+
+
+def cluster_embeddings(embeddings, threshold=DIARIZATION_THRESHOLD,
+                       max_speakers=DIARIZATION_MAX_SPEAKERS, num_speakers=None):
+    """
+    Average-linkage agglomerative clustering on cosine similarity
+
+    Merges while the closest pair of clusters is at least `threshold` similar
+    (or while there are more than max_speakers / num_speakers clusters).
+    Returns one cluster index per embedding.
+    """
+    n = len(embeddings)
+    if n == 0:
+        return []
+    units = np.stack(embeddings).astype(np.float64)
+    units /= np.maximum(np.linalg.norm(units, axis=1, keepdims=True), 1e-8)
+
+    similarity = units @ units.T
+    np.fill_diagonal(similarity, -np.inf)
+    sizes = np.ones(n)
+    active = np.ones(n, dtype=bool)
+    labels = np.arange(n)
+    target = num_speakers or 1
+    limit = num_speakers or max_speakers or n
+
+    while active.sum() > target:
+        flat = int(np.argmax(similarity))
+        a, b = divmod(flat, n)
+        if similarity[a, b] < threshold and active.sum() <= limit:
+            break
+        # Average linkage: the merged row is the size-weighted mean of both rows
+        merged = (similarity[a] * sizes[a] + similarity[b] * sizes[b]) / (sizes[a] + sizes[b])
+        similarity[a, :] = merged
+        similarity[:, a] = merged
+        similarity[a, a] = -np.inf
+        similarity[b, :] = -np.inf
+        similarity[:, b] = -np.inf
+        sizes[a] += sizes[b]
+        active[b] = False
+        labels[labels == b] = a
+
+    return labels.tolist()
+
+
+class Diarizer:
+    """
+    Assigns a speaker label ("S1", "S2", ...) to every transcript segment
+
+    `embed` turns a segment's samples into a speaker embedding; jobs use the
+    XTTS speaker encoder that is loaded for synthesis anyway.
+    """
+
+    def __init__(self, embed, threshold=DIARIZATION_THRESHOLD,
+                 max_speakers=DIARIZATION_MAX_SPEAKERS, num_speakers=None, sample_rate=16000):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.num_speakers = num_speakers
+        self.sample_rate = sample_rate
+
+    def diarize(self, samples, segments):
+        """
+        Speaker label per segment, numbered in order of first appearance
+
+        Segments too short to embed take the label of the nearest embedded
+        segment in time. Returns (labels, {speaker: mean embedding}).
+        """
+        if not segments:
+            return [], {}
+        embeddings = segment_embeddings(samples, segments, self.embed, self.sample_rate)
+        embedded = [i for i, e in enumerate(embeddings) if e is not None]
+        if not embedded:
+            return ["S1"] * len(segments), {}
+
+        clusters = cluster_embeddings([embeddings[i] for i in embedded], self.threshold,
+                                      self.max_speakers, self.num_speakers)
+        raw = dict(zip(embedded, clusters))
+
+        centres = np.array([(segments[i]["start"] + segments[i]["end"]) / 2 for i in embedded])
+        names = {}
+        labels = []
+        for i, seg in enumerate(segments):
+            if i not in raw:
+                nearest = embedded[int(np.argmin(np.abs(centres - (seg["start"] + seg["end"]) / 2)))]
+                cluster = raw[nearest]
+            else:
+                cluster = raw[i]
+            if cluster not in names:
+                names[cluster] = f"S{len(names) + 1}"
+            labels.append(names[cluster])
+
+        centroids = {}
+        for i in embedded:
+            centroids.setdefault(names[raw[i]], []).append(embeddings[i])
+        return labels, {speaker: np.mean(vectors, axis=0) for speaker, vectors in centroids.items()}
+
@@ -0,0 +1,155 @@
+"""
+Job Result Cache Module
+Fingerprints a dubbing job (input content, settings, voice, model versions)
+Finished outputs get deterministic names so identical resubmissions are free
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
+from importlib import metadata
+from utils.config import CACHE_DIR, OUTPUT_DIR, NLLB_MODEL, XTTS_MODEL
+
+# Bump when a pipeline change alters the output for identical inputs
+PIPELINE_VERSION = 2
+
+# Packages whose versions change model behaviour
+MODEL_PACKAGES = ["openai-whisper", "transformers", "TTS", "torch"]
+
+_hash_cache = {}
+_hash_lock = threading.Lock()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's content, memoized by (path, mtime, size)"""
+    path = os.path.abspath(str(path))
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+
+    with _hash_lock:
+        if key in _hash_cache:
+            return _hash_cache[key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[key] = value
+    return value
+
+
+@lru_cache(maxsize=None)
+def model_versions():
+    """Model identifiers plus installed versions of the packages that run them"""
+    versions = {"nllb": NLLB_MODEL, "xtts": XTTS_MODEL}
+    for package in MODEL_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def job_fingerprint(video_path, speaker_wav, source_lang, target_lang, dialect,
+                    whisper_model, add_subtitles, **extra):
+    """
+    Stable hex digest identifying a job's output
+
+    Args:
+        video_path: Input video (hashed by content, not by name)
+        speaker_wav: Reference voice actually used (None for the model default)
+        source_lang, target_lang, dialect: Translation settings
+        whisper_model: Whisper size (the quality tier)
+        add_subtitles: Whether subtitles are burned in
+        extra: Any further settings that change the output
+    """
+    description = {
+        "pipeline": PIPELINE_VERSION,
+        "input": file_hash(video_path),
+        "voice": file_hash(speaker_wav) if speaker_wav else "default",
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "dialect": dialect if target_lang == "ar" else None,
+        "whisper_model": whisper_model,
+        "subtitles": bool(add_subtitles),
+        "models": dict(model_versions()),
+    }
+    description.update(extra)
+    canonical = json.dumps(description, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class JobCache:
+    """Maps job fingerprints to finished outputs in OUTPUT_DIR"""
+
+    def __init__(self, output_dir=OUTPUT_DIR, manifest_dir=CACHE_DIR / "jobs"):
+        self.output_dir = output_dir
+        self.manifest_dir = manifest_dir
+
+    def output_path(self, fingerprint, add_subtitles):
+        """Deterministic output name for a fingerprint"""
+        prefix = "dubbed_subtitled" if add_subtitles else "dubbed"
+        return self.output_dir / f"{prefix}_{fingerprint[:16]}.mp4"
+
+    def _manifest_path(self, fingerprint):
+        return self.manifest_dir / f"{fingerprint}.json"
+
+    def lookup(self, fingerprint):
+        """Path of a finished output for this fingerprint, or None"""
+        manifest_path = self._manifest_path(fingerprint)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        output = manifest.get("output")
+        if not output or not os.path.exists(output):
+            return None
+        if os.path.getsize(output) != manifest.get("size"):
+            # Output was replaced or truncated since it was recorded
+            return None
+        return output
+
+    def publish(self, produced_path, fingerprint, add_subtitles, settings=None):
+        """Move a finished output to its deterministic name and record it"""
+        target = self.output_path(fingerprint, add_subtitles)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if os.path.abspath(produced_path) != os.path.abspath(target):
+            shutil.move(str(produced_path), str(target))
+
+        manifest = {
+            "fingerprint": fingerprint,
+            "output": str(target),
+            "size": os.path.getsize(target),
+            "settings": settings or {},
+        }
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self._manifest_path(fingerprint)
+        tmp_path = manifest_path.with_name(f"{fingerprint}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return str(target)
+
+    @staticmethod
+    def materialize(cached_path, output_path):
+        """Hard-link (or copy across filesystems) a cached output to output_path"""
+        output_path = str(output_path)
+        if os.path.abspath(cached_path) == os.path.abspath(output_path):
+            return output_path
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(cached_path, output_path)
+        except OSError:
+            shutil.copy2(cached_path, output_path)
+        return output_path
@@ -0,0 +1,157 @@
+"""
+Job Queue Module
+Schedules many dubbing jobs with configurable concurrency
+Jobs share one ModelManager so models stay warm between videos
+"""
+
+import itertools
+import threading
+from collections import deque
+from core.model_manager import ModelManager
+from core.processor import VideoProcessor, JobCancelled
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class DubbingJob:
+    """One video with its own settings, progress and cancellation flag"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, video_path, settings):
+        self.id = next(self._ids)
+        self.video_path = video_path
+        self.settings = dict(settings)
+        self.state = QUEUED
+        self.progress = 0
+        self.message = "Queued"
+        self.output_path = None
+        self.error = None
+        self.attempts = 0
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+
+class JobScheduler:
+    """Runs queued jobs on worker threads, at most `concurrency` at a time"""
+
+    def __init__(self, models=None, metrics=None, concurrency=1, on_update=None):
+        self.models = models or ModelManager()
+        self.metrics = metrics
+        self.concurrency = max(1, concurrency)
+        self.on_update = on_update
+        self.jobs = []
+        self._queue = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, video_path, **settings):
+        """Queue a video with its settings (see VideoProcessor.process_video)"""
+        job = DubbingJob(video_path, settings)
+        with self._lock:
+            self.jobs.append(job)
+            self._queue.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        """Cancel a queued job immediately or a running one at its next checkpoint"""
+        with self._lock:
+            if job.state == QUEUED:
+                self._queue.remove(job)
+                job.state = CANCELLED
+                job.message = "Cancelled"
+        job.cancel_event.set()
+        self._notify(job)
+
+    def retry(self, job):
+        """Re-queue a failed or cancelled job"""
+        with self._lock:
+            if job.state not in (FAILED, CANCELLED):
+                return False
+            job.state = QUEUED
+            job.progress = 0
+            job.message = "Queued (retry)"
+            job.error = None
+            job.cancel_event = threading.Event()
+            self._queue.append(job)
+        self._notify(job)
+        self._dispatch()
+        return True
+
+    def set_concurrency(self, concurrency):
+        """Change the number of simultaneous jobs (applies to the next dispatch)"""
+        with self._lock:
+            self.concurrency = max(1, int(concurrency))
+        self._dispatch()
+
+    def remove_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if not job.finished]
+
+    @property
+    def running_count(self):
+        return self._running
+
+    def _dispatch(self):
+        # Start as many queued jobs as the concurrency limit allows
+        while True:
+            with self._lock:
+                if self._running >= self.concurrency or not self._queue:
+                    return
+                job = self._queue.popleft()
+                job.state = RUNNING
+                job.message = "Starting..."
+                job.attempts += 1
+                self._running += 1
+            thread = threading.Thread(target=self._run, args=(job,), name=f"nataq-job-{job.id}",
+                                      daemon=True)
+            thread.start()
+
+    def _run(self, job):
+        # A processor per job keeps tracer/translator state separate; models are shared
+        processor = VideoProcessor(metrics=self.metrics, models=self.models)
+
+        def progress_callback(percent, message):
+            job.progress = percent
+            job.message = message
+            self._notify(job)
+
+        try:
+            job.output_path = processor.process_video(
+                video_path=job.video_path,
+                progress_callback=progress_callback,
+                cancel_event=job.cancel_event,
+                **job.settings
+            )
+            job.state = DONE
+            job.progress = 100
+            job.message = "Done"
+        except JobCancelled:
+            job.state = CANCELLED
+            job.message = "Cancelled"
+        except Exception as e:
+            job.state = FAILED
+            job.error = str(e)
+            job.message = f"Failed: {str(e)[:80]}"
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._notify(job)
+            self._dispatch()
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception:
+                pass
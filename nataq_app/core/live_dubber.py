@@ -0,0 +1,437 @@
+"""
+Live Dubbing Module
+Dubs a live source (growing file, pipe, or local RTMP/UDP/SRT input) into rolling HLS
+Audio is transcribed in rolling windows; output runs a fixed latency behind the input
+"""
+
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from core.timeline import time_stretch, trim_silence, MAX_STRETCH
+from core.processor import xtts_language
+from utils.config import (LIVE_WINDOW_SECONDS, LIVE_LATENCY_SECONDS, LIVE_BACKPRESSURE,
+                          LIVE_COMMIT_GUARD_SECONDS, LIVE_QUEUE_SEGMENTS,
+                          LIVE_HLS_SEGMENT_SECONDS, LIVE_HLS_LIST_SIZE, LIVE_DIR)
+
+# Whisper input format
+ASR_SAMPLE_RATE = 16000
+
+# Playout granularity
+WRITE_BLOCK_SECONDS = 0.2
+
+# Network sources are already real time; anything else is paced with -re
+NETWORK_SCHEMES = ("rtmp://", "rtmps://", "udp://", "srt://", "rtp://", "tcp://")
+
+
+def ingest_input_args(source):
+    """ffmpeg input arguments for a live source"""
+    if source == "-":
+        return ['-re', '-i', 'pipe:0']
+    if source.startswith(NETWORK_SCHEMES):
+        # Local server: wait for the encoder (OBS, another ffmpeg) to connect
+        listen = ['-listen', '1'] if source.startswith(("rtmp://", "tcp://")) else []
+        return [*listen, '-i', source]
+    # Growing file: keep reading as the recorder appends
+    return ['-re', '-follow', '1', '-i', f"file:{os.path.abspath(source)}"]
+
+
+class LiveDubber:
+    """
+    Rolling-window dubbing of a live input
+
+    Threads: ingest (ffmpeg → 16 kHz PCM), ASR (rolling windows), dubbing
+    (translate + synthesize each committed segment) and playout (writes the
+    dubbed track to the HLS muxer exactly `latency` seconds behind the input).
+    When dubbing falls behind, late segments are time-compressed into what
+    is left of their slot, or dropped (backpressure="drop" or beyond MAX_STRETCH).
+    """
+
+    def __init__(self, processor, source, source_lang, target_lang, dialect=None,
+                 voice_type="male", reference_audio=None, whisper_model="base",
+                 output_dir=None, latency=LIVE_LATENCY_SECONDS, window=LIVE_WINDOW_SECONDS,
+                 backpressure=LIVE_BACKPRESSURE, include_video=True, progress_callback=None):
+        if latency <= window:
+            raise ValueError(f"Latency ({latency}s) must exceed the ASR window ({window}s)")
+        if backpressure not in ("compress", "drop"):
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+
+        self.processor = processor
+        self.source = source
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.dialect = dialect
+        self.voice_type = voice_type
+        self.reference_audio = reference_audio
+        self.whisper_model = whisper_model
+        self.output_dir = Path(output_dir) if output_dir else LIVE_DIR
+        self.latency = latency
+        self.window = window
+        self.backpressure = backpressure
+        # The video is handed between the two ffmpeg processes on an extra fd (POSIX only)
+        self.include_video = include_video and os.name == "posix"
+        self.progress_callback = progress_callback
+
+        self.sample_rate = None
+        self.stop_event = threading.Event()
+        self.stats = {"segments": 0, "compressed": 0, "dropped": 0, "skipped_seconds": 0.0}
+
+        self._ingest = None
+        self._muxer = None
+        self._threads = []
+        self._error = None
+
+        # Ingested 16 kHz samples; _audio[0] is media time _audio_start / ASR_SAMPLE_RATE
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._audio_start = 0
+        self._ingested = 0
+        self._ingest_done = False
+        self._cond = threading.Condition()
+
+        # Committed source segments waiting for translation and TTS
+        self._segments = queue.Queue(maxsize=LIVE_QUEUE_SEGMENTS)
+
+        # Dubbed audio waiting to be mixed into the output: [(start sample, samples)]
+        self._scheduled = []
+        self._dub_done = False
+        self._position = 0
+
+    @property
+    def playlist(self):
+        return self.output_dir / "live.m3u8"
+
+    def _report(self, message):
+        if self.progress_callback:
+            self.progress_callback(None, message)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        """Load models, start ffmpeg and the worker threads"""
+        p = self.processor
+        p.load_whisper(self.whisper_model, self.progress_callback)
+        p.load_nllb(self.progress_callback)
+        p.load_tts(self.progress_callback)
+        self.sample_rate = p.tts_sample_rate()
+        self.speaker_wav = p.resolve_speaker_wav(self.voice_type, self.reference_audio)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._start_ffmpeg()
+        for target in (self._read_loop, self._asr_loop, self._dub_loop, self._write_loop):
+            thread = threading.Thread(target=target, name=f"live-{target.__name__[1:]}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._report(f"🔴 Live dubbing {self.source} → {self.playlist} "
+                     f"({self.latency:.0f}s latency, {self.window:.0f}s windows)")
+
+    def _start_ffmpeg(self):
+        video_args, ingest_fds, muxer_fds = [], (), ()
+        video_input = []
+        if self.include_video:
+            read_fd, write_fd = os.pipe()
+            video_args = ['-map', '0:v:0', '-c:v', 'copy', '-f', 'mpegts', f"pipe:{write_fd}"]
+            video_input = ['-thread_queue_size', '4096', '-f', 'mpegts', '-i', f"pipe:{read_fd}"]
+            ingest_fds, muxer_fds = (write_fd,), (read_fd,)
+
+        self._ingest = subprocess.Popen(
+            [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                *ingest_input_args(self.source),
+                '-map', '0:a:0', '-ac', '1', '-ar', str(ASR_SAMPLE_RATE),
+                '-f', 's16le', 'pipe:1',
+                *video_args
+            ],
+            stdin=None if self.source == "-" else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            pass_fds=ingest_fds
+        )
+
+        audio_index = 1 if self.include_video else 0
+        self._muxer = subprocess.Popen(
+            [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                *video_input,
+                '-thread_queue_size', '1024',
+                '-f', 'f32le', '-ar', str(self.sample_rate), '-ac', '1', '-i', 'pipe:0',
+                *(['-map', '0:v:0'] if self.include_video else []),
+                '-map', f"{audio_index}:a:0",
+                *(['-c:v', 'copy'] if self.include_video else []),
+                '-c:a', 'aac', '-b:a', '128k',
+                # Video arrives `latency` ahead of its dubbed audio; wait for it
+                '-max_interleave_delta', '0',
+                '-f', 'hls',
+                '-hls_time', str(LIVE_HLS_SEGMENT_SECONDS),
+                '-hls_list_size', str(LIVE_HLS_LIST_SIZE),
+                '-hls_flags', 'delete_segments+independent_segments',
+                '-hls_segment_filename', str(self.output_dir / "seg_%05d.ts"),
+                '-y', str(self.playlist)
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            pass_fds=muxer_fds
+        )
+
+        # Each end now belongs to its ffmpeg
+        for fd in ingest_fds + muxer_fds:
+            os.close(fd)
+
+    def stop(self):
+        """Stop ingesting; whatever is queued is dropped"""
+        self.stop_event.set()
+        if self._ingest and self._ingest.poll() is None:
+            self._ingest.terminate()
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until the input has ended and its dub has been written"""
+        deadline = None if timeout is None else time.time() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+        if self._muxer:
+            try:
+                self._muxer.wait(None if deadline is None else max(0.1, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                self._muxer.kill()
+        if self._error:
+            raise self._error
+        return str(self.playlist)
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+            self._report(f"❌ Live dubbing stopped: {error}")
+        self.stop()
+
+    # -- ingest ------------------------------------------------------------
+
+    def _read_loop(self):
+        block = int(ASR_SAMPLE_RATE * 0.1) * 2
+        try:
+            while not self.stop_event.is_set():
+                data = self._ingest.stdout.read(block)
+                if not data:
+                    break
+                samples = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+                with self._cond:
+                    self._audio = np.concatenate([self._audio, samples.astype(np.float32) / 32768.0])
+                    self._ingested += samples.size
+                    self._cond.notify_all()
+        except Exception as e:
+            self._fail(e)
+        finally:
+            with self._cond:
+                self._ingest_done = True
+                self._cond.notify_all()
+
+    # -- rolling-window ASR ------------------------------------------------
+
+    def _asr_loop(self):
+        committed = 0  # media time (16 kHz samples) everything before which is transcribed
+        heard = 0  # end of the audio given to the last transcription
+        window = int(self.window * ASR_SAMPLE_RATE)
+        guard = LIVE_COMMIT_GUARD_SECONDS
+        try:
+            while not self.stop_event.is_set():
+                with self._cond:
+                    # A full window past the commit point, and fresh audio since the last pass
+                    self._cond.wait_for(lambda: self.stop_event.is_set() or self._ingest_done or
+                                        self._ingested >= max(committed + window, heard + window // 2))
+                    if self.stop_event.is_set():
+                        break
+                    final = self._ingest_done
+                    available = self._ingested - committed
+
+                    # Transcription is behind by more than the latency budget: skip ahead
+                    if available > int(self.latency * ASR_SAMPLE_RATE):
+                        skipped = available - window
+                        committed += skipped
+                        self.stats["skipped_seconds"] += skipped / ASR_SAMPLE_RATE
+                        self._report(f"⚠️ Live ASR behind: skipped {skipped / ASR_SAMPLE_RATE:.1f}s")
+
+                    audio = self._audio[committed - self._audio_start:self._ingested - self._audio_start].copy()
+                if audio.size == 0:
+                    break
+
+                offset = committed / ASR_SAMPLE_RATE
+                heard = committed + audio.size
+                _, segments = self.processor.transcribe_samples(audio, self.source_lang)
+                span = audio.size / ASR_SAMPLE_RATE
+
+                # Keep segments that ended well before the window edge; the rest is re-heard
+                cutoff = span if final else span - guard
+                stable = [seg for seg in segments if seg["end"] <= cutoff and seg["text"].strip()]
+                if not stable and not final and span >= 2 * self.window:
+                    # One long unbroken sentence: take what there is rather than stall
+                    stable = [seg for seg in segments if seg["text"].strip()]
+                    cutoff = span
+
+                for seg in stable:
+                    self._enqueue({
+                        "id": self.stats["segments"],
+                        "start": offset + float(seg["start"]),
+                        "end": offset + float(seg["end"]),
+                        "text": seg["text"].strip()
+                    })
+                    self.stats["segments"] += 1
+
+                if final:
+                    advance = span
+                elif stable:
+                    advance = stable[-1]["end"]
+                elif not segments:
+                    advance = cutoff  # Silence
+                else:
+                    advance = 0  # Speech still running into the window edge
+                committed += int(min(max(advance, 0), span) * ASR_SAMPLE_RATE)
+
+                with self._cond:
+                    # Drop audio nobody will transcribe again
+                    drop = committed - self._audio_start
+                    if drop > 0:
+                        self._audio = self._audio[drop:]
+                        self._audio_start = committed
+                if final and committed >= self._ingested - ASR_SAMPLE_RATE // 10:
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._enqueue(None)
+
+    def _enqueue(self, segment):
+        # Bounded queue: when dubbing is this far behind, the oldest segment is dropped
+        while True:
+            try:
+                self._segments.put_nowait(segment)
+                return
+            except queue.Full:
+                try:
+                    if self._segments.get_nowait() is not None:
+                        self.stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+
+    # -- translation and synthesis ----------------------------------------
+
+    def _dub_loop(self):
+        p = self.processor
+        lang_code = xtts_language(self.target_lang)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    batch = [self._segments.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                while True:
+                    try:
+                        batch.append(self._segments.get_nowait())
+                    except queue.Empty:
+                        break
+                finished = batch[-1] is None
+                batch = [seg for seg in batch if seg is not None]
+
+                # Segments whose slot has already been played out are not worth dubbing
+                played = self._position / self.sample_rate
+                late = [seg for seg in batch if seg["end"] <= played]
+                if late:
+                    self.stats["dropped"] += len(late)
+                    batch = [seg for seg in batch if seg["end"] > played]
+
+                if batch:
+                    translations = p.translate_texts([seg["text"] for seg in batch], self.source_lang,
+                                                     self.target_lang, self.dialect)
+                    synthesized, _ = p.synthesize_texts(
+                        [(i, text.strip()) for i, text in enumerate(translations) if len(text.strip()) >= 3],
+                        self.speaker_wav, lang_code, self.sample_rate
+                    )
+                    with self._cond:
+                        for i, wav in synthesized.items():
+                            self._schedule(batch[i], wav)
+                        self._cond.notify_all()
+                if finished:
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            with self._cond:
+                self._dub_done = True
+                self._cond.notify_all()
+
+    def _schedule(self, segment, wav):
+        # Called with _cond held; fits the audio to its slot, or to what is left of it
+        wav = trim_silence(np.asarray(wav, dtype=np.float32), sample_rate=self.sample_rate)
+        start = int(round(segment["start"] * self.sample_rate))
+        end = int(round(segment["end"] * self.sample_rate))
+
+        late = start < self._position
+        if late:
+            if self.backpressure == "drop":
+                self.stats["dropped"] += 1
+                return
+            start = self._position
+
+        room = end - start
+        if wav.size > room:
+            if late and (room <= 0 or wav.size / room > MAX_STRETCH):
+                # Even compressed it would not fit in what is left of its slot
+                self.stats["dropped"] += 1
+                return
+            if room > 0:
+                wav = time_stretch(wav, min(wav.size / room, MAX_STRETCH))
+        if late:
+            self.stats["compressed"] += 1
+        self._scheduled.append((start, wav))
+
+    # -- playout -----------------------------------------------------------
+
+    def _write_loop(self):
+        block = int(WRITE_BLOCK_SECONDS * self.sample_rate)
+        try:
+            while True:
+                with self._cond:
+                    # Output may only reach `latency` behind the ingested input
+                    self._cond.wait_for(lambda: self.stop_event.is_set() or self._dub_done or
+                                        self._playable() >= self._position + block)
+                    if self.stop_event.is_set():
+                        break
+                    limit = self._playable()
+                    if self._dub_done:
+                        # Input over and everything dubbed: play out the rest
+                        tail = max([s + w.size for s, w in self._scheduled], default=0)
+                        limit = max(self._ingested * self.sample_rate // ASR_SAMPLE_RATE, tail)
+                    if limit <= self._position:
+                        break
+                    n = min(block, limit - self._position)
+                    out = self._mix(self._position, n)
+                    self._position += n
+
+                self._muxer.stdin.write(out.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            if not self.stop_event.is_set():
+                self._fail(e)
+        finally:
+            try:
+                self._muxer.stdin.close()
+            except OSError:
+                pass
+
+    def _playable(self):
+        return max(0, int((self._ingested / ASR_SAMPLE_RATE - self.latency) * self.sample_rate))
+
+    def _mix(self, position, n):
+        # Called with _cond held
+        out = np.zeros(n, dtype=np.float32)
+        remaining = []
+        for start, wav in self._scheduled:
+            a, b = max(start, position), min(start + wav.size, position + n)
+            if b > a:
+                out[a - position:b - position] += wav[a - start:b - start]
+            if start + wav.size > position + n:
+                remaining.append((start, wav))
+        self._scheduled = remaining
+        return np.clip(out, -1.0, 1.0)
@@ -0,0 +1,301 @@
+"""
+Media Probe Module
+One ffprobe pass per input file, returned as a typed descriptor
+Results are memoized by (path, mtime, size) so every stage can ask for free
+"""
+
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+from utils.config import MAX_VIDEO_SIZE_MB, SUPPORTED_VIDEO_FORMATS
+
+# Seconds of video scanned for keyframes (enough to estimate the GOP length)
+KEYFRAME_SCAN_SECONDS = 30
+
+# Probed files kept in memory
+PROBE_CACHE_SIZE = 64
+
+
+class MediaValidationError(ValueError):
+    """Input media that the pipeline cannot (or should not) process"""
+
+
+@dataclass
+class StreamInfo:
+    """One audio or video stream"""
+    index: int
+    codec_type: str
+    codec_name: str
+    duration: Optional[float] = None
+    bit_rate: Optional[int] = None
+    # Video
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    pix_fmt: Optional[str] = None
+    # Audio
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+
+@dataclass
+class MediaInfo:
+    """Everything the pipeline needs to know about an input file"""
+    path: str
+    size_bytes: int
+    mtime: float
+    duration: float
+    format_name: str
+    bit_rate: Optional[int] = None
+    streams: List[StreamInfo] = field(default_factory=list)
+    keyframe_interval: Optional[float] = None
+    keyframes: List[float] = field(default_factory=list)
+    # Every keyframe in the file, filled on demand by keyframe_index()
+    all_keyframes: Optional[List[float]] = field(default=None, repr=False)
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def size_mb(self):
+        return self.size_bytes / (1024 * 1024)
+
+    @property
+    def video_stream(self):
+        return next((s for s in self.streams if s.codec_type == "video"), None)
+
+    @property
+    def audio_stream(self):
+        return next((s for s in self.streams if s.codec_type == "audio"), None)
+
+    @property
+    def has_video(self):
+        return self.video_stream is not None
+
+    @property
+    def has_audio(self):
+        return self.audio_stream is not None
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def probe_media(path, run=subprocess.run):
+    """
+    Probe a media file (memoized by path, mtime and size)
+
+    Args:
+        path: Media file
+        run: subprocess.run-compatible function (e.g. a job tracer's run)
+
+    Returns:
+        MediaInfo
+    """
+    path = os.path.abspath(str(path))
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    info = _probe(path, stat, run)
+
+    with _cache_lock:
+        _cache[key] = info
+        while len(_cache) > PROBE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def keyframe_index(path, run=subprocess.run):
+    """
+    Timestamps of every video keyframe in the file (memoized with the probe)
+
+    Reads packet flags only, so it demuxes the file without decoding it.
+    """
+    info = probe_media(path, run=run)
+    if info.all_keyframes is not None:
+        return info.all_keyframes
+
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        info.path
+    ]
+    result = run(cmd, capture_output=True, text=True)
+    times = []
+    if result.returncode == 0:
+        for line in (result.stdout or "").splitlines():
+            pts, _, flags = line.partition(",")
+            t = _float(pts)
+            if t is not None and "K" in flags:
+                times.append(t)
+    info.all_keyframes = sorted(times)
+    return info.all_keyframes
+
+
+def clear_probe_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def validate_media(path, run=subprocess.run):
+    """
+    Check an input video before any model is loaded
+
+    Raises MediaValidationError for unsupported containers, files over
+    MAX_VIDEO_SIZE_MB, unreadable media or media without an audio track.
+    Returns the MediaInfo on success.
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in SUPPORTED_VIDEO_FORMATS:
+        raise MediaValidationError(
+            f"Unsupported video format '{extension}'. Supported: {', '.join(SUPPORTED_VIDEO_FORMATS)}"
+        )
+
+    if not os.path.exists(path):
+        raise MediaValidationError(f"Video not found: {path}")
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    if size_mb > MAX_VIDEO_SIZE_MB:
+        raise MediaValidationError(
+            f"Video is {size_mb:.0f} MB; the limit is {MAX_VIDEO_SIZE_MB} MB"
+        )
+
+    try:
+        info = probe_media(path, run=run)
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        raise MediaValidationError(f"Could not read media file: {e}")
+
+    if not info.has_video:
+        raise MediaValidationError("No video stream found")
+    if not info.has_audio:
+        raise MediaValidationError("No audio track found: there is no speech to dub")
+    if info.duration <= 0:
+        raise MediaValidationError("Could not determine video duration")
+
+    return info
+
+
+def _probe(path, stat, run):
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_format',
+        '-show_streams',
+        path
+    ]
+    result = run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(result.stderr.strip() or "ffprobe failed")
+    raw = json.loads(result.stdout or "{}")
+
+    fmt = raw.get("format", {})
+    streams = [_parse_stream(s) for s in raw.get("streams", [])
+               if s.get("codec_type") in ("video", "audio")]
+
+    duration = _float(fmt.get("duration"))
+    if duration is None:
+        duration = max((s.duration or 0 for s in streams), default=0.0)
+
+    info = MediaInfo(
+        path=path,
+        size_bytes=stat.st_size,
+        mtime=stat.st_mtime,
+        duration=duration,
+        format_name=fmt.get("format_name", ""),
+        bit_rate=_int(fmt.get("bit_rate")),
+        streams=streams,
+        raw=raw
+    )
+
+    if info.has_video:
+        info.keyframes = _probe_keyframes(path, run)
+        info.keyframe_interval = _median_interval(info.keyframes)
+
+    return info
+
+
+def _probe_keyframes(path, run):
+    """Keyframe timestamps in the first KEYFRAME_SCAN_SECONDS (decodes no frames)"""
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-skip_frame', 'nokey',
+        '-read_intervals', f"%+{KEYFRAME_SCAN_SECONDS}",
+        '-show_entries', 'frame=pts_time,best_effort_timestamp_time',
+        '-print_format', 'json',
+        path
+    ]
+    result = run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return []
+    try:
+        frames = json.loads(result.stdout or "{}").get("frames", [])
+    except ValueError:
+        return []
+
+    times = []
+    for frame in frames:
+        t = _float(frame.get("pts_time", frame.get("best_effort_timestamp_time")))
+        if t is not None:
+            times.append(t)
+    return sorted(times)
+
+
+def _median_interval(times):
+    gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+    if not gaps:
+        return None
+    return gaps[len(gaps) // 2]
+
+
+def _parse_stream(s):
+    return StreamInfo(
+        index=int(s.get("index", 0)),
+        codec_type=s.get("codec_type", ""),
+        codec_name=s.get("codec_name", ""),
+        duration=_float(s.get("duration")),
+        bit_rate=_int(s.get("bit_rate")),
+        width=_int(s.get("width")),
+        height=_int(s.get("height")),
+        fps=_rate(s.get("avg_frame_rate")) or _rate(s.get("r_frame_rate")),
+        pix_fmt=s.get("pix_fmt"),
+        sample_rate=_int(s.get("sample_rate")),
+        channels=_int(s.get("channels"))
+    )
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value):
+    # ffprobe rates are fractions like "30000/1001"
+    if not value or "/" not in str(value):
+        return _float(value)
+    num, den = str(value).split("/", 1)
+    num, den = _float(num), _float(den)
+    if not num or not den:
+        return None
+    return num / den
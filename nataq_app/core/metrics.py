@@ -0,0 +1,211 @@
+"""
+Pipeline Metrics Module
+Typed stage events aggregated into counters and histograms
+Exports Prometheus text format to a file or a local HTTP endpoint
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Histogram buckets for stage durations (seconds)
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+@dataclass
+class StageEvent:
+    """One finished pipeline stage"""
+    component: str
+    stage: str
+    start: float
+    end: float = 0.0
+    items: int = 0
+    peak_rss_bytes: Optional[int] = None
+    cache: Optional[str] = None  # "hit" / "miss" for model loads and cached results
+    success: bool = True
+
+    @property
+    def duration(self):
+        return max(0.0, self.end - self.start)
+
+
+def get_peak_rss():
+    """Peak resident set size of this process in bytes (None if unknown)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+    except (ImportError, OSError):
+        pass
+
+    # Windows has no resource module; psutil exposes the peak working set there
+    try:
+        import psutil
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        return int(peak) if peak is not None else None
+    except ImportError:
+        return None
+
+
+class _Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class PipelineMetrics:
+    """Thread-safe registry of stage events, counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._listeners = []
+        self._server = None
+
+    def add_listener(self, listener):
+        """Register a function called with every StageEvent"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @contextmanager
+    def stage(self, component, stage, items=0):
+        """
+        Time a pipeline stage and record it as a StageEvent
+
+        The yielded event can be updated inside the block
+        (e.g. event.items = len(segments) or event.cache = "hit").
+        """
+        event = StageEvent(component=component, stage=stage, start=time.time(), items=items)
+        try:
+            yield event
+        except BaseException:
+            event.success = False
+            raise
+        finally:
+            event.end = time.time()
+            event.peak_rss_bytes = get_peak_rss()
+            self.record(event)
+
+    def record(self, event):
+        """Aggregate a StageEvent and notify listeners"""
+        labels = (("component", event.component), ("stage", event.stage))
+        status = labels + (("status", "ok" if event.success else "error"),)
+
+        with self._lock:
+            self._inc("nataq_stage_runs_total", status, 1)
+            self._inc("nataq_stage_items_total", labels, event.items)
+            if event.cache:
+                self._inc("nataq_model_cache_total", labels + (("result", event.cache),), 1)
+
+            key = ("nataq_stage_duration_seconds", labels)
+            if key not in self._histograms:
+                self._histograms[key] = _Histogram(DURATION_BUCKETS)
+            self._histograms[key].observe(event.duration)
+
+            if event.peak_rss_bytes is not None:
+                gauge_key = ("nataq_stage_peak_rss_bytes", labels)
+                self._gauges[gauge_key] = max(self._gauges.get(gauge_key, 0), event.peak_rss_bytes)
+
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass
+
+    def _inc(self, name, labels, value):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def to_prometheus_text(self):
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for metric in sorted({key[0] for key in series}):
+                    lines.append(f"# TYPE {metric} {kind}")
+                    for (series_name, labels), value in sorted(series.items()):
+                        if series_name == metric:
+                            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+            for metric in sorted({key[0] for key in self._histograms}):
+                lines.append(f"# TYPE {metric} histogram")
+                for (series_name, labels), hist in sorted(self._histograms.items()):
+                    if series_name != metric:
+                        continue
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        bucket_labels = labels + (("le", f"{bound:g}"),)
+                        lines.append(f"{metric}_bucket{_format_labels(bucket_labels)} {count}")
+                    inf_labels = labels + (("le", "+Inf"),)
+                    lines.append(f"{metric}_bucket{_format_labels(inf_labels)} {hist.total}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {hist.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {hist.total}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically write metrics for a textfile collector"""
+        path = str(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+    def serve(self, port, host="127.0.0.1"):
+        """Start a local /metrics endpoint in a daemon thread (once)"""
+        if self._server:
+            return self._server
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.to_prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        return self._server
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+# Shared registry so metrics aggregate across all jobs in the process
+pipeline_metrics = PipelineMetrics()
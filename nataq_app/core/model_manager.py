@@ -0,0 +1,358 @@
+"""
+Model Manager Module
+Owns the Whisper, NLLB-200 and XTTS v2 instances shared by every job
+Thread-safe loading so the GUI can prewarm models in the background
+Optional sequential residency releases each model once its stage is done
+"""
+
+import gc
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from core.voice_library import VoiceLibrary
+from core.precision import MODEL_PRECISION, resolve_precision, apply_precision, inference_context
+from utils.config import (get_device, setup_torch, NLLB_MODEL, XTTS_MODEL, MODELS_DIR,
+                          MODEL_RESIDENCY)
+
+RESIDENCY_MODES = ("resident", "sequential")
+
+# Synthesized segments kept for reuse (e.g. preview audio in the final dub)
+SEGMENT_AUDIO_CACHE_SIZE = 256
+
+
+def free_memory():
+    """Collect garbage and return cached CUDA blocks to the driver"""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelManager:
+    """Loads models once and hands the warm instances to processing jobs"""
+
+    def __init__(self, residency=MODEL_RESIDENCY, precision=None):
+        if residency not in RESIDENCY_MODES:
+            raise ValueError(f"Unknown model residency {residency!r}, expected one of {RESIDENCY_MODES}")
+        self.residency = residency
+
+        # Requested precision per model; `precision` overrides the config ({"nllb": "int8"})
+        self.requested_precision = dict(MODEL_PRECISION, **(precision or {}))
+
+        self.whisper_model = None
+        self.whisper_model_name = None
+        self.nllb_model = None
+        self.nllb_tokenizer = None
+        self.tts_engine = None
+        self.tts_pool = None
+
+        # One lock per model: prewarming XTTS never blocks a job that needs Whisper
+        self._locks = {
+            "whisper": threading.Lock(),
+            "nllb": threading.Lock(),
+            "tts": threading.Lock(),
+            "voices": threading.Lock(),
+        }
+
+        # Inference locks: concurrent jobs take turns on each shared model, so
+        # one job can transcribe while another synthesizes
+        self._inference_locks = {
+            "whisper": threading.RLock(),
+            "nllb": threading.RLock(),
+            "tts": threading.RLock(),
+        }
+
+        # Jobs currently needing each model; sequential mode unloads at zero
+        self._refcounts = {"whisper": 0, "nllb": 0, "tts": 0}
+        self._refcount_lock = threading.Lock()
+
+        # XTTS conditioning latents keyed by (speaker_wav, mtime)
+        self._voice_latents = {}
+
+        # Synthesized segment audio keyed by (voice, language, text)
+        self._segment_audio = OrderedDict()
+
+        # Precision each loaded model runs at (see core.precision)
+        self.precision = {}
+
+        # Human-readable load status per model (shown in the GUI header)
+        self.status = {"whisper": "not loaded", "nllb": "not loaded", "tts": "not loaded"}
+        self._status_listeners = []
+
+    @property
+    def device(self):
+        return get_device()
+
+    @contextmanager
+    def using(self, model):
+        """Hold exclusive use of a shared model ("whisper", "nllb" or "tts")"""
+        with self._inference_locks[model], \
+                inference_context(model, self.precision.get(model, "fp32"), self.device):
+            yield
+
+    @property
+    def sequential(self):
+        return self.residency == "sequential"
+
+    def acquire(self, model):
+        """Mark a model as needed by a job (it will not be unloaded meanwhile)"""
+        with self._refcount_lock:
+            self._refcounts[model] += 1
+
+    def release(self, model):
+        """
+        Drop a job's claim on a model
+
+        In sequential mode the model is unloaded once no job needs it.
+        Returns True if the model was unloaded.
+        """
+        with self._refcount_lock:
+            self._refcounts[model] = max(0, self._refcounts[model] - 1)
+            idle = self._refcounts[model] == 0
+        if idle and self.sequential:
+            return self.unload(model)
+        return False
+
+    def unload(self, model):
+        """Free a model unless a job has claimed it in the meantime"""
+        # Same lock order as inference (use, then load) to avoid deadlocks
+        with self._inference_locks[model], self._locks[model]:
+            with self._refcount_lock:
+                if self._refcounts[model] > 0:
+                    return False
+
+            if model == "whisper":
+                loaded = self.whisper_model is not None
+                self.whisper_model = None
+                self.whisper_model_name = None
+            elif model == "nllb":
+                loaded = self.nllb_model is not None
+                self.nllb_model = None
+                self.nllb_tokenizer = None
+            else:
+                loaded = self.tts_engine is not None or self.tts_pool is not None
+                self.tts_engine = None
+                if self.tts_pool is not None:
+                    self.tts_pool.shutdown()
+                    self.tts_pool = None
+
+        if not loaded:
+            return False
+        free_memory()
+        self._set_status(model, "released")
+        return True
+
+    def add_status_listener(self, listener):
+        """Register a function called with (model, status) on every change"""
+        self._status_listeners.append(listener)
+
+    def remove_status_listener(self, listener):
+        if listener in self._status_listeners:
+            self._status_listeners.remove(listener)
+
+    def _set_status(self, model, status):
+        self.status[model] = status
+        for listener in list(self._status_listeners):
+            try:
+                listener(model, status)
+            except Exception:
+                pass
+
+    def load_whisper(self, model_name="medium", progress_callback=None):
+        """Load Whisper (returns True on a cache hit)"""
+        with self._locks["whisper"]:
+            if self.whisper_model is not None and self.whisper_model_name == model_name:
+                if progress_callback:
+                    progress_callback(10, f"✓ Whisper {model_name} already loaded")
+                return True
+
+            if progress_callback:
+                progress_callback(5, f"Loading Whisper {model_name} model...")
+            self._set_status("whisper", f"loading {model_name}")
+
+            # Heavy ML imports are deferred to first use to keep startup fast
+            import whisper
+            setup_torch()
+
+            # Drop the previous size before loading a new one
+            self.whisper_model = None
+            try:
+                self.whisper_model = self._with_precision(
+                    "whisper", whisper.load_model(model_name, device=self.device), progress_callback
+                )
+            except Exception:
+                self.whisper_model_name = None
+                self._set_status("whisper", "failed")
+                raise
+            self.whisper_model_name = model_name
+            self._set_status("whisper", f"{model_name} ready")
+
+            if progress_callback:
+                progress_callback(10, f"✓ Whisper model loaded on {self.device}")
+            return False
+
+    def load_nllb(self, progress_callback=None):
+        """Load NLLB-200 tokenizer and model (returns True on a cache hit)"""
+        with self._locks["nllb"]:
+            if self.nllb_model is not None:
+                if progress_callback:
+                    progress_callback(25, "✓ NLLB-200 already loaded")
+                return True
+
+            if progress_callback:
+                progress_callback(15, "Loading NLLB-200 translation model...")
+            self._set_status("nllb", "loading")
+
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+            setup_torch()
+
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(
+                    NLLB_MODEL,
+                    cache_dir=str(MODELS_DIR)
+                )
+                model = self._with_precision("nllb", AutoModelForSeq2SeqLM.from_pretrained(
+                    NLLB_MODEL,
+                    cache_dir=str(MODELS_DIR)
+                ).to(self.device), progress_callback)
+            except Exception:
+                self._set_status("nllb", "failed")
+                raise
+            self.nllb_tokenizer = tokenizer
+            self.nllb_model = model
+            self._set_status("nllb", "ready")
+
+            if progress_callback:
+                progress_callback(25, f"✓ NLLB-200 loaded on {self.device}")
+            return False
+
+    def load_tts(self, progress_callback=None):
+        """Load XTTS v2 (returns True on a cache hit)"""
+        with self._locks["tts"]:
+            if self.tts_engine is not None:
+                if progress_callback:
+                    progress_callback(35, "✓ XTTS v2 already loaded")
+                return True
+
+            if progress_callback:
+                progress_callback(30, "Loading XTTS v2 voice synthesis model...")
+            self._set_status("tts", "loading")
+
+            from TTS.api import TTS
+            setup_torch()
+
+            try:
+                self.tts_engine = TTS(XTTS_MODEL).to(self.device)
+                self.tts_engine.synthesizer.tts_model = self._with_precision(
+                    "tts", self.tts_engine.synthesizer.tts_model, progress_callback
+                )
+            except Exception:
+                self._set_status("tts", "failed")
+                raise
+            self._set_status("tts", "ready")
+
+            if progress_callback:
+                progress_callback(35, f"✓ XTTS v2 loaded on {self.device}")
+            return False
+
+    def _resolve_precision(self, model, device, progress_callback=None):
+        """Precision a model will run at on `device` (recorded in self.precision)"""
+        requested = self.requested_precision[model]
+        precision, reason = resolve_precision(requested, device, model)
+        if reason and progress_callback:
+            percent = {"whisper": 5, "nllb": 15, "tts": 30}[model]
+            progress_callback(percent, f"⚠️ {model}: {requested} unavailable ({reason}), using {precision}")
+        self.precision[model] = precision
+        return precision
+
+    def _with_precision(self, model, instance, progress_callback=None):
+        """Convert a freshly loaded model to its requested precision"""
+        precision = self._resolve_precision(model, self.device, progress_callback)
+        return apply_precision(model, instance, precision, self.device)
+
+    def load_tts_pool(self, progress_callback=None):
+        """Start CPU worker processes with their own XTTS copies (True on a cache hit)"""
+        with self._locks["tts"]:
+            if self.tts_pool is not None:
+                if progress_callback:
+                    progress_callback(35, f"✓ {self.tts_pool.workers} XTTS workers already running")
+                return True
+
+            from core.parallel_tts import ParallelSynthesizer
+            # Workers run on CPU whatever the main process uses
+            pool = ParallelSynthesizer(precision=self._resolve_precision("tts", "cpu", progress_callback))
+
+            if progress_callback:
+                progress_callback(30, f"Starting {pool.workers} XTTS workers "
+                                      f"({pool.threads} threads each)...")
+            self._set_status("tts", f"starting {pool.workers} workers")
+
+            try:
+                pool.start()
+            except Exception:
+                pool.shutdown()
+                self._set_status("tts", "failed")
+                raise
+            self.tts_pool = pool
+            self._set_status("tts", f"{pool.workers} CPU workers ready")
+
+            if progress_callback:
+                progress_callback(35, f"✓ {pool.workers} XTTS workers ready")
+            return False
+
+    @staticmethod
+    def _voice_key(speaker_wav):
+        if not speaker_wav:
+            return "default"
+        return (os.path.abspath(speaker_wav), os.path.getmtime(speaker_wav))
+
+    def get_segment_audio(self, speaker_wav, lang_code, text):
+        """Previously synthesized samples for this voice, language and text, or None"""
+        key = (self._voice_key(speaker_wav), lang_code, text.strip())
+        with self._locks["voices"]:
+            wav = self._segment_audio.get(key)
+            if wav is not None:
+                self._segment_audio.move_to_end(key)
+            return wav
+
+    def store_segment_audio(self, speaker_wav, lang_code, text, wav):
+        """Keep synthesized samples for reuse by a later job"""
+        key = (self._voice_key(speaker_wav), lang_code, text.strip())
+        with self._locks["voices"]:
+            self._segment_audio[key] = wav
+            self._segment_audio.move_to_end(key)
+            while len(self._segment_audio) > SEGMENT_AUDIO_CACHE_SIZE:
+                self._segment_audio.popitem(last=False)
+
+    def get_voice_latents(self, speaker_wav):
+        """
+        XTTS conditioning latents for a reference voice, computed once
+
+        Returns (gpt_cond_latent, speaker_embedding) or None when the loaded
+        TTS model does not expose XTTS latents. Voices in the voice library
+        are read from its pack instead of running the conditioning encoder.
+        """
+        if not speaker_wav or self.tts_engine is None:
+            return None
+
+        tts_model = getattr(getattr(self.tts_engine, "synthesizer", None), "tts_model", None)
+        if tts_model is None or not hasattr(tts_model, "get_conditioning_latents"):
+            return None
+
+        key = self._voice_key(speaker_wav)
+        with self._locks["voices"]:
+            if key not in self._voice_latents:
+                library = VoiceLibrary.open()
+                voice = library.for_reference(speaker_wav) if library else None
+                if voice is not None:
+                    self._voice_latents[key] = library.latents(
+                        voice["id"], getattr(tts_model, "device", None)
+                    )
+                    return self._voice_latents[key]
+                with self.using("tts"):
+                    self._voice_latents[key] = tts_model.get_conditioning_latents(
+                        audio_path=[str(speaker_wav)]
+                    )
+            return self._voice_latents[key]
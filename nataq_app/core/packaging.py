@@ -0,0 +1,249 @@
+"""
+Streaming Packaging Module
+Encodes an adaptive-bitrate ladder in one ffmpeg process (decoded once, scaled per rendition)
+Writes HLS and/or DASH with the dubbed (and original) audio as alternates and WebVTT subtitles
+"""
+
+import re
+import subprocess
+import xml.etree.ElementTree as ET
+from contextlib import nullcontext
+from pathlib import Path
+from core.pipes import pcm_input_args, pcm_pipe
+from core.timeline import TimelineAssembler
+from utils.config import PACKAGING_LADDER, PACKAGING_SEGMENT_SECONDS, PACKAGING_AUDIO_BITRATE
+
+MPD_NAMESPACE = "urn:mpeg:dash:schema:mpd:2011"
+
+# Manifest names inside a package directory
+HLS_MASTER = "master.m3u8"
+DASH_MANIFEST = "manifest.mpd"
+
+# Formats that can be requested
+PACKAGING_FORMATS = ("hls", "dash")
+
+
+def package_dir(video_output):
+    """Package directory that belongs to a dubbed MP4 (next to it, same stem)"""
+    video_output = Path(video_output)
+    return video_output.parent / f"{video_output.stem}_stream"
+
+
+def ladder_for(source_height, ladder=PACKAGING_LADDER):
+    """Renditions no taller than the source (the smallest is always kept)"""
+    ladder = sorted(ladder, key=lambda rung: rung[0], reverse=True)
+    if not source_height:
+        return ladder
+    fitting = [rung for rung in ladder if rung[0] <= source_height]
+    return fitting or ladder[-1:]
+
+
+def _bitrate_kbps(value):
+    return int(str(value).lower().rstrip("k"))
+
+
+def srt_to_webvtt(srt_text):
+    """Convert SRT text to WebVTT (header, '.' millisecond separator, no cue numbers)"""
+    blocks = srt_text.strip().split('\n\n')
+
+    cues = []
+    for block in blocks:
+        lines = block.split('\n')
+        if len(lines) >= 3 and ' --> ' in lines[1]:
+            timing = re.sub(r'(\d),(\d{3})', r'\1.\2', lines[1])
+            cues.append(timing + '\n' + '\n'.join(lines[2:]))
+
+    return "WEBVTT\n\n" + '\n\n'.join(cues) + '\n'
+
+
+class StreamPackager:
+    """Builds HLS/DASH ladders straight from the source video and the dubbed track"""
+
+    def __init__(self, run=subprocess.run, ladder=PACKAGING_LADDER,
+                 segment_seconds=PACKAGING_SEGMENT_SECONDS):
+        self.run = run
+        self.ladder = ladder
+        self.segment_seconds = segment_seconds
+
+    @staticmethod
+    def manifests(output_dir, formats):
+        """Manifest paths a package in output_dir has (or will have) for `formats`"""
+        output_dir = Path(output_dir)
+        names = {"hls": HLS_MASTER, "dash": DASH_MANIFEST}
+        return {fmt: str(output_dir / names[fmt]) for fmt in formats}
+
+    def package(self, video_path, dubbed_audio, output_dir, formats=("hls",), media=None,
+                subtitles=None, target_lang="ar", source_lang=None, start_time=None,
+                end_time=None):
+        """
+        Encode the ladder and write manifests
+
+        Args:
+            video_path: Source video (decoded once for every rendition)
+            dubbed_audio: Dubbed track (default audio): a file, or a TimelineAssembler
+                          streamed to ffmpeg's stdin
+            output_dir: Package directory (created)
+            formats: Any of "hls", "dash"; both share one encode and one set of segments
+            media: MediaInfo of the source (for its height and audio track)
+            subtitles: SRT text to publish as a WebVTT subtitle track
+            target_lang: Language of the dubbed track and subtitles
+            source_lang: Language of the original track; None leaves it out
+            start_time, end_time: Clip window, as for merge_audio_video
+
+        Returns:
+            {format: manifest path}
+        """
+        formats = [fmt for fmt in PACKAGING_FORMATS if fmt in formats]
+        if not formats:
+            raise ValueError(f"No packaging format requested (choose from {PACKAGING_FORMATS})")
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        video = media.video_stream if media else None
+        renditions = ladder_for(video.height if video else None, self.ladder)
+        with_original = bool(source_lang) and (media is None or media.has_audio)
+
+        duration = (end_time if end_time is not None else media.duration if media else None)
+        if duration is not None:
+            duration -= start_time or 0
+
+        cmd = ['ffmpeg', '-y']
+        if start_time:
+            cmd += ['-ss', f"{start_time:.3f}"]
+        cmd += ['-i', str(video_path)]
+        streamed = isinstance(dubbed_audio, TimelineAssembler)
+        if streamed:
+            cmd += pcm_input_args(dubbed_audio.sample_rate)
+        else:
+            cmd += ['-i', str(dubbed_audio)]
+        if duration is not None:
+            # The dubbed track can run past the end when the last line overran
+            cmd += ['-t', f"{duration:.3f}"]
+
+        # Decode once, split, scale each copy
+        split = f"[0:v]split={len(renditions)}" + "".join(f"[s{i}]" for i in range(len(renditions)))
+        scales = [f"[s{i}]scale=-2:{height}[v{i}]" for i, (height, _) in enumerate(renditions)]
+        cmd += ['-filter_complex', ";".join([split] + scales)]
+
+        for i, (height, bitrate) in enumerate(renditions):
+            kbps = _bitrate_kbps(bitrate)
+            cmd += [
+                '-map', f"[v{i}]",
+                f"-c:v:{i}", 'libx264',
+                f"-b:v:{i}", f"{kbps}k",
+                f"-maxrate:v:{i}", f"{int(kbps * 1.07)}k",
+                f"-bufsize:v:{i}", f"{int(kbps * 1.5)}k",
+            ]
+
+        cmd += ['-map', '1:a:0', '-metadata:s:a:0', f"language={target_lang}"]
+        if with_original:
+            cmd += ['-map', '0:a:0', '-metadata:s:a:1', f"language={source_lang}"]
+        cmd += [
+            '-c:a', 'aac', '-b:a', PACKAGING_AUDIO_BITRATE, '-ac', '2',
+            '-preset', 'veryfast',
+            # Segment boundaries land on keyframes in every rendition
+            '-force_key_frames', f"expr:gte(t,n_forced*{self.segment_seconds})",
+            '-sc_threshold', '0',
+        ]
+
+        n_video = len(renditions)
+        if "dash" in formats:
+            audio_sets = " ".join(
+                f"id={1 + k},streams={n_video + k}" for k in range(2 if with_original else 1)
+            )
+            cmd += [
+                '-f', 'dash',
+                '-seg_duration', str(self.segment_seconds),
+                '-use_template', '1',
+                '-use_timeline', '1',
+                '-init_seg_name', 'init_$RepresentationID$.m4s',
+                '-media_seg_name', 'chunk_$RepresentationID$_$Number%05d$.m4s',
+                '-adaptation_sets', f"id=0,streams=v {audio_sets}",
+                # HLS playlists over the same CMAF segments: one encode for both
+                '-hls_playlist', '1' if "hls" in formats else '0',
+                str(output_dir / DASH_MANIFEST)
+            ]
+        else:
+            stream_map = [f"v:{i},agroup:audio,name:{height}p" for i, (height, _) in enumerate(renditions)]
+            stream_map.append(f"a:0,agroup:audio,name:dub_{target_lang},language:{target_lang},default:yes")
+            if with_original:
+                stream_map.append(f"a:1,agroup:audio,name:original_{source_lang},language:{source_lang}")
+            cmd += [
+                '-f', 'hls',
+                '-hls_time', str(self.segment_seconds),
+                '-hls_playlist_type', 'vod',
+                '-hls_segment_type', 'fmp4',
+                '-hls_flags', 'independent_segments',
+                '-hls_fmp4_init_filename', 'init.mp4',
+                '-master_pl_name', HLS_MASTER,
+                '-var_stream_map', " ".join(stream_map),
+                '-hls_segment_filename', str(output_dir / "%v" / "seg_%05d.m4s"),
+                str(output_dir / "%v" / "index.m3u8")
+            ]
+
+        # The dub is streamed into stdin in blocks while ffmpeg encodes
+        with pcm_pipe(dubbed_audio.int16_blocks()) if streamed else nullcontext() as pcm:
+            result = self.run(cmd, stdin=pcm, capture_output=True)
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            raise Exception(f"FFmpeg packaging failed: {stderr[-500:]}")
+
+        manifests = self.manifests(output_dir, formats)
+        if subtitles:
+            vtt_name = f"subtitles_{target_lang}.vtt"
+            with open(output_dir / vtt_name, 'w', encoding='utf-8') as f:
+                f.write(srt_to_webvtt(subtitles))
+            if "hls" in manifests:
+                self._add_hls_subtitles(output_dir, manifests["hls"], vtt_name, target_lang,
+                                        duration or 0)
+            if "dash" in manifests:
+                self._add_dash_subtitles(manifests["dash"], vtt_name, target_lang)
+        return manifests
+
+    def _add_hls_subtitles(self, output_dir, master_path, vtt_name, lang, duration):
+        """Single-segment WebVTT media playlist plus a SUBTITLES group in the master"""
+        playlist_name = f"subtitles_{lang}.m3u8"
+        with open(output_dir / playlist_name, 'w', encoding='utf-8') as f:
+            f.write(
+                "#EXTM3U\n#EXT-X-VERSION:3\n"
+                f"#EXT-X-TARGETDURATION:{max(1, int(round(duration)))}\n"
+                "#EXT-X-PLAYLIST-TYPE:VOD\n"
+                f"#EXTINF:{duration:.3f},\n{vtt_name}\n#EXT-X-ENDLIST\n"
+            )
+
+        with open(master_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        lines = [
+            line + ',SUBTITLES="subs"' if line.startswith("#EXT-X-STREAM-INF:") else line
+            for line in lines
+        ]
+        # The rendition group goes right after the playlist header
+        header = [i for i, line in enumerate(lines) if line.startswith(("#EXTM3U", "#EXT-X-VERSION"))]
+        lines.insert(header[-1] + 1 if header else 0,
+                     f'#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="{lang}",LANGUAGE="{lang}",'
+                     f'DEFAULT=YES,AUTOSELECT=YES,URI="{playlist_name}"')
+
+        with open(master_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _add_dash_subtitles(self, mpd_path, vtt_name, lang):
+        """Side-loaded WebVTT AdaptationSet in every Period"""
+        ET.register_namespace("", MPD_NAMESPACE)
+        tree = ET.parse(mpd_path)
+        ns = f"{{{MPD_NAMESPACE}}}"
+        for period in tree.getroot().iter(f"{ns}Period"):
+            ids = [int(a.get("id")) for a in period.iter(f"{ns}AdaptationSet") if (a.get("id") or "").isdigit()]
+            adaptation = ET.SubElement(period, f"{ns}AdaptationSet", {
+                "id": str(max(ids, default=-1) + 1), "contentType": "text",
+                "mimeType": "text/vtt", "lang": lang
+            })
+            ET.SubElement(adaptation, f"{ns}Role", {
+                "schemeIdUri": "urn:mpeg:dash:role:2011", "value": "subtitle"
+            })
+            representation = ET.SubElement(adaptation, f"{ns}Representation", {
+                "id": f"subtitles_{lang}", "bandwidth": "256"
+            })
+            ET.SubElement(representation, f"{ns}BaseURL").text = vtt_name
+        tree.write(mpd_path, encoding="utf-8", xml_declaration=True)
@@ -0,0 +1,150 @@
+"""
+Parallel TTS Module
+Shards XTTS v2 synthesis across worker processes on multi-core CPUs
+Each worker holds its own model copy with a fixed torch thread count
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.voice_library import VoiceLibrary
+from core.precision import apply_precision, inference_context
+from utils.config import (XTTS_MODEL, PARALLEL_TTS_WORKERS, TTS_THREADS_PER_WORKER,
+                          TTS_WORKER_RAM_GB, PARALLEL_TTS_RAM_FRACTION)
+
+# Per-process state of a synthesis worker
+_worker = {}
+
+
+def total_ram_bytes():
+    """Physical memory, or None if it cannot be determined"""
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def plan_workers(workers=None, threads_per_worker=None):
+    """
+    Choose (workers, threads per worker) for this machine
+
+    Workers are limited by cores (each gets threads_per_worker) and by the
+    RAM budget (each holds a full XTTS copy of about TTS_WORKER_RAM_GB).
+    """
+    cores = os.cpu_count() or 1
+    threads = max(1, min(threads_per_worker or TTS_THREADS_PER_WORKER, cores))
+
+    if workers or PARALLEL_TTS_WORKERS:
+        return max(1, workers or PARALLEL_TTS_WORKERS), threads
+
+    by_cores = max(1, cores // threads)
+    ram = total_ram_bytes()
+    if ram is None:
+        return min(by_cores, 2), threads
+
+    budget_gb = ram / 1024 ** 3 * PARALLEL_TTS_RAM_FRACTION
+    by_ram = max(1, int(budget_gb // TTS_WORKER_RAM_GB))
+    return min(by_cores, by_ram), threads
+
+
+class ParallelSynthesizer:
+    """Pool of XTTS worker processes; results are returned with their chunk index"""
+
+    def __init__(self, workers=None, threads_per_worker=None, model_name=XTTS_MODEL,
+                 precision="fp32"):
+        self.workers, self.threads = plan_workers(workers, threads_per_worker)
+        self.model_name = model_name
+        # Resolved for CPU by the caller (ModelManager.requested_precision["tts"])
+        self.precision = precision
+        self._executor = None
+
+    def start(self):
+        """Spawn the workers and wait until every one has loaded its model"""
+        if self._executor is not None:
+            return
+        # spawn, not fork: forked children would inherit torch's thread pools
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads, self.precision)
+        )
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def synthesize(self, chunks, lang_code, speaker_wav=None):
+        """
+        Synthesize [(index, text), ...] across the pool
+
+        Yields (index, float32 samples) as chunks finish, or (index, exception)
+        for a failed chunk. Closing the generator cancels pending chunks.
+        """
+        self.start()
+        futures = {
+            self._executor.submit(_synthesize, text, lang_code, speaker_wav): index
+            for index, text in chunks
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _init_worker(model_name, threads, precision="fp32"):
+    # Runs once in each worker process
+    os.environ["COQUI_TOS_AGREED"] = "1"
+
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from TTS.api import TTS
+    tts_engine = TTS(model_name).to("cpu")
+    tts_engine.synthesizer.tts_model = apply_precision(
+        "tts", tts_engine.synthesizer.tts_model, precision, "cpu"
+    )
+    _worker["tts"] = tts_engine
+    _worker["precision"] = precision
+    _worker["latents"] = {}
+
+
+def _ping():
+    return os.getpid()
+
+
+def _synthesize(text, lang_code, speaker_wav):
+    from core.processor import synthesize_chunk
+
+    tts_engine = _worker["tts"]
+    voice_latents = None
+    tts_model = getattr(getattr(tts_engine, "synthesizer", None), "tts_model", None)
+    if speaker_wav and hasattr(tts_model, "get_conditioning_latents"):
+        # Conditioning latents are computed once per voice in each worker
+        key = (os.path.abspath(speaker_wav), os.path.getmtime(speaker_wav))
+        if key not in _worker["latents"]:
+            # Library voices are views into the shared mapped pack
+            library = VoiceLibrary.open()
+            voice = library.for_reference(speaker_wav) if library else None
+            if voice is not None:
+                _worker["latents"][key] = library.latents(voice["id"])
+            else:
+                _worker["latents"][key] = tts_model.get_conditioning_latents(audio_path=[speaker_wav])
+        voice_latents = _worker["latents"][key]
+
+    with inference_context("tts", _worker["precision"], "cpu"):
+        return synthesize_chunk(tts_engine, text, voice_latents, speaker_wav, lang_code)
@@ -0,0 +1,107 @@
+"""
+Pipe Handoff Module
+Passes stage outputs to ffmpeg through stdin and named pipes instead of temp files
+PCM is streamed into ffmpeg's stdin block by block; text inputs (subtitles) go
+through a FIFO where the OS has one
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+
+def pcm_input_args(sample_rate, channels=1):
+    """ffmpeg input options for raw 16-bit PCM on stdin"""
+    return ['-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0']
+
+
+def pcm_bytes(samples):
+    """Byte view of int16 samples for subprocess input (no copy)"""
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    return memoryview(samples).cast("B")
+
+
+@contextmanager
+def pcm_pipe(blocks):
+    """
+    Read end of an OS pipe fed with int16 `blocks` by a writer thread
+
+    Pass it as stdin= to the ffmpeg run: ffmpeg encodes the first blocks
+    while later ones are still being rendered, and the whole track is never
+    held as one byte buffer. Closing the read end on exit releases a writer
+    that ffmpeg stopped reading from.
+    """
+    read_fd, write_fd = os.pipe()
+
+    def feed():
+        try:
+            with os.fdopen(write_fd, "wb") as f:
+                for block in blocks:
+                    f.write(pcm_bytes(block))
+        except (BrokenPipeError, OSError):
+            pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        yield read_fd
+    finally:
+        os.close(read_fd)
+        writer.join(timeout=5)
+
+
+def read_pcm(stdout):
+    """int16 samples from raw s16le bytes captured from ffmpeg"""
+    return np.frombuffer(stdout, dtype=np.int16)
+
+
+@contextmanager
+def text_pipe(text, suffix=".txt", directory=None):
+    """
+    Path ffmpeg can open to read `text`
+
+    On POSIX this is a FIFO fed by a writer thread, so the text never lands
+    on disk; elsewhere it falls back to a temp file. Either is removed on exit.
+    """
+    directory = tempfile.mkdtemp(prefix="nataq_pipe_", dir=directory)
+    path = Path(directory) / f"input{suffix}"
+    data = text.encode("utf-8")
+
+    if not hasattr(os, "mkfifo"):
+        path.write_bytes(data)
+        try:
+            yield str(path)
+        finally:
+            path.unlink(missing_ok=True)
+            os.rmdir(directory)
+        return
+
+    os.mkfifo(path)
+
+    def feed():
+        # Blocks until the reader opens the FIFO
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except (BrokenPipeError, OSError):
+            pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        yield str(path)
+    finally:
+        if writer.is_alive():
+            # ffmpeg never opened it (it failed early): open the read end to release the writer
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+                writer.join(timeout=1)
+                os.close(fd)
+            except OSError:
+                pass
+            writer.join(timeout=1)
+        path.unlink(missing_ok=True)
+        os.rmdir(directory)
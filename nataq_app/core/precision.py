@@ -0,0 +1,129 @@
+"""
+Inference Precision Module
+Per-model numeric precision for Whisper, NLLB-200 and XTTS v2
+fp16 (CUDA), bf16 (autocast where the hardware has it) and int8 dynamic quantization (CPU)
+"""
+
+from contextlib import nullcontext
+from functools import lru_cache
+from utils.config import WHISPER_PRECISION, NLLB_PRECISION, XTTS_PRECISION
+
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")
+
+# Configured precision per model (keys as used by ModelManager)
+MODEL_PRECISION = {"whisper": WHISPER_PRECISION, "nllb": NLLB_PRECISION, "tts": XTTS_PRECISION}
+
+# What each model ran at before precision was configurable; cache keys only
+# change when a model runs at something else
+DEFAULT_PRECISION = {"whisper": "fp16", "nllb": "fp32", "tts": "fp32"}
+
+# Models with an int8 path (NLLB whole, Whisper's decoder); XTTS is not quantized
+INT8_MODELS = ("whisper", "nllb")
+
+
+@lru_cache(maxsize=None)
+def cpu_supports_bf16():
+    """Whether this CPU computes bf16 natively (AVX512-BF16 or AMX)"""
+    import torch
+    for probe in ("_is_avx512_bf16_supported", "_is_amx_tile_supported"):
+        check = getattr(torch.cpu, probe, None)
+        if check is not None and check():
+            return True
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return " avx512_bf16" in flags or " amx_bf16" in flags
+
+
+def resolve_precision(requested, device, model=None):
+    """
+    Precision a model can actually run at on `device`
+
+    Returns (precision, reason) where reason explains a fallback (else None):
+    fp16 needs CUDA, int8 dynamic quantization is CPU-only and limited to
+    INT8_MODELS, and bf16 needs hardware support.
+    """
+    if requested not in PRECISIONS:
+        raise ValueError(f"Unknown precision {requested!r}, expected one of {PRECISIONS}")
+    if requested == "int8" and model is not None and model not in INT8_MODELS:
+        return "fp32", f"int8 quantization covers {' and '.join(INT8_MODELS)} only"
+    if device == "cuda":
+        import torch
+        if requested == "int8":
+            return "fp16", "int8 dynamic quantization runs on CPU only"
+        if requested == "bf16" and not torch.cuda.is_bf16_supported():
+            return "fp16", "this GPU has no bf16 support"
+        return requested, None
+    if requested == "fp16":
+        return "fp32", "fp16 needs CUDA"
+    if requested == "bf16" and not cpu_supports_bf16():
+        return "fp32", "this CPU has no native bf16"
+    return requested, None
+
+
+def model_precisions(device, requested=None):
+    """{model: resolved precision} for the requested (default: configured) settings"""
+    return {model: resolve_precision(precision, device, model)[0]
+            for model, precision in (requested or MODEL_PRECISION).items()}
+
+
+def precision_tags(device, requested=None):
+    """Models running at something other than their historical precision (for cache keys)"""
+    tags = {}
+    for model, precision in model_precisions(device, requested).items():
+        if precision != resolve_precision(DEFAULT_PRECISION[model], device, model)[0]:
+            tags[model] = precision
+    return tags
+
+
+def quantize_linear(module):
+    """Dynamic int8 quantization of a module's Linear layers (weights int8, activations per batch)"""
+    import torch
+    from torch.nn.modules.linear import NonDynamicallyQuantizableLinear
+
+    # Subclasses that only override forward (Whisper's dtype-casting Linear)
+    # are quantized as plain Linear; attention projections read directly are left alone
+    for child in module.modules():
+        if (isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear
+                and not isinstance(child, NonDynamicallyQuantizableLinear)):
+            child.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8,
+                                                  inplace=True)
+
+
+def apply_precision(model_name, model, precision, device):
+    """
+    Convert a freshly loaded model for `precision` (returns the model to use)
+
+    NLLB casts its weights for fp16 and for bf16 on CUDA. Whisper keeps fp32
+    weights and takes fp16 through its own decode option. Other half-precision
+    cases run as autocast around inference (see inference_context). int8
+    quantizes Linear layers: all of NLLB and the Whisper decoder.
+    """
+    import torch
+    if precision == "int8":
+        if model_name == "whisper":
+            model.decoder = quantize_linear(model.decoder)
+            return model
+        if model_name == "nllb":
+            return quantize_linear(model)
+        raise ValueError(f"int8 is not supported for {model_name}")
+    if model_name == "nllb" and precision == "fp16":
+        return model.half()
+    if model_name == "nllb" and precision == "bf16" and device == "cuda":
+        return model.to(torch.bfloat16)
+    return model
+
+
+def inference_context(model_name, precision, device):
+    """Autocast for the precisions apply_precision leaves to inference time"""
+    if precision == "bf16" and not (model_name == "nllb" and device == "cuda"):
+        import torch
+        return torch.autocast(device_type=device, dtype=torch.bfloat16)
+    if precision == "fp16" and model_name == "tts":
+        import torch
+        return torch.autocast(device_type=device, dtype=torch.float16)
+    return nullcontext()
+
@@ -0,0 +1,103 @@
+"""
+Streaming Preview Module
+Plays the first translated segments while XTTS is still generating them
+Audio is piped to ffplay as raw float32 PCM; nothing waits for the full dub
+"""
+
+import shutil
+import subprocess
+import numpy as np
+from core.timeline import to_float32, TTS_SAMPLE_RATE
+
+# Silence between previewed segments
+PREVIEW_GAP_SECONDS = 0.15
+
+
+class PreviewPlayer:
+    """Raw PCM sink backed by an ffplay process (silently disabled without ffplay)"""
+
+    def __init__(self, sample_rate=TTS_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._process = None
+
+    @staticmethod
+    def available():
+        return shutil.which("ffplay") is not None
+
+    def start(self):
+        if self._process is not None or not self.available():
+            return self._process is not None
+        self._process = subprocess.Popen(
+            [
+                'ffplay',
+                '-nodisp',  # Audio only
+                '-autoexit',  # Quit once stdin is closed and drained
+                '-loglevel', 'quiet',
+                '-f', 'f32le',  # Raw float32 samples
+                '-ar', str(self.sample_rate),
+                '-ac', '1',
+                '-i', '-'
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return True
+
+    def write(self, samples):
+        """Queue samples for playback; returns False once the player has gone away"""
+        if self._process is None:
+            return False
+        try:
+            self._process.stdin.write(np.asarray(samples, dtype=np.float32).tobytes())
+            self._process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError):
+            self._process = None
+            return False
+
+    def write_silence(self, seconds):
+        return self.write(np.zeros(int(self.sample_rate * seconds), dtype=np.float32))
+
+    def finish(self, wait=True):
+        """Close the stream and let playback drain (or stop it immediately)"""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if wait:
+            process.wait()
+        else:
+            process.kill()
+
+    def stop(self):
+        self.finish(wait=False)
+
+
+def stream_segment(tts_engine, text, lang_code, voice_latents, speaker_wav=None,
+                   stream_chunk_size=20):
+    """
+    Yield float32 sample blocks for one segment as XTTS produces them
+
+    Uses inference_stream when the model has it and latents are available;
+    otherwise the whole segment is synthesized and yielded at once.
+    """
+    tts_model = getattr(getattr(tts_engine, "synthesizer", None), "tts_model", None)
+    if voice_latents is not None and hasattr(tts_model, "inference_stream"):
+        gpt_cond_latent, speaker_embedding = voice_latents
+        for block in tts_model.inference_stream(
+            text,
+            lang_code,
+            gpt_cond_latent,
+            speaker_embedding,
+            stream_chunk_size=stream_chunk_size,
+            enable_text_splitting=True
+        ):
+            yield to_float32(block)
+        return
+
+    from core.processor import synthesize_chunk
+    yield synthesize_chunk(tts_engine, text, voice_latents, speaker_wav, lang_code)
@@ -4,20 +4,42 @@ Handles video dubbing pipeline with pre-trained voices
 Fixed: Complete speech synthesis (no truncation)
 """
 
+import copy
 import os
-import whisper
-import torch
 from pathlib import Path
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from TTS.api import TTS
-from pydub import AudioSegment
-import subprocess
-import json
+import threading
+import time
+import uuid
+import numpy as np
+from contextlib import contextmanager, ExitStack
 from datetime import datetime
-from utils.config import (DEVICE, NLLB_MODEL, XTTS_MODEL, TEMP_DIR, 
-                         OUTPUT_DIR, NLLB_LANG_CODES, MODELS_DIR, VOICES_DIR)
+from utils.config import (get_device, NLLB_MODEL, TEMP_DIR, 
+                         OUTPUT_DIR, NLLB_LANG_CODES, VOICES_DIR,
+                         METRICS_FILE, METRICS_PORT, TRACE_JOBS, TRACES_DIR,
+                         TRANSLATION_BATCH_SIZE, JOB_CACHE_ENABLED, TRANSCRIPT_CACHE_ENABLED,
+                         PARALLEL_TTS, PREVIEW_SECONDS, PREVIEW_SEGMENTS,
+                         PREVIEW_STREAM_CHUNK_SIZE, PROJECTS_ENABLED, PROJECTS_DIR,
+                         PACKAGING_FORMATS_DEFAULT, PIPE_HANDOFF, SPLIT_ENCODE,
+                         SPLIT_ENCODE_MIN_SECONDS, DIARIZATION_ENABLED)
 from core.dialect_translator import DialectTranslator
 from core.subtitle_generator import SubtitleGenerator
+from core.segmenter import translation_units, tts_chunks, split_for_tts, joiner_for
+from core.metrics import pipeline_metrics, StageEvent, get_peak_rss
+from core.tracing import Tracer, NULL_TRACER
+from core.model_manager import ModelManager
+from core.precision import precision_tags
+from core.media_probe import probe_media, validate_media, keyframe_index
+from core.job_cache import JobCache, job_fingerprint, model_versions, file_hash
+from core.transcript_cache import TranscriptCache, fingerprint_wav, fingerprint_pcm
+from core.project import DubbingProject
+from core.packaging import StreamPackager, package_dir
+from core.pipes import pcm_input_args, pcm_pipe, read_pcm, text_pipe
+from core.timeline import TimelineAssembler, read_wav
+from core.voice_library import VoiceLibrary, speaker_excerpt
+from core.diarization import Diarizer
+
+# Languages XTTS v2 can speak
+XTTS_LANGUAGES = ["en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", "nl", "cs", "ar", "zh-cn", "ja", "hu", "ko"]
 
 # Pre-trained voice samples (embedded text for XTTS to use)
 PRETRAINED_VOICES_TEXT = {
@@ -25,21 +47,109 @@ PRETRAINED_VOICES_TEXT = {
     "female": "مرحباً، أنا صوت أنثى عربية احترافية. أستطيع التحدث بلهجة واضحة وطبيعية."
 }
 
+
+def _at_percent(progress_callback, percent):
+    """Progress callback that keeps the bar at `percent` (for out-of-order loads)"""
+    if not progress_callback:
+        return None
+    return lambda _, message: progress_callback(percent, message)
+
+
+def clip_window(duration, start_time=None, end_time=None):
+    """
+    Normalise a requested clip to (start_time, end_time) within the video
+    
+    Returns (None, None) for the whole video; raises ValueError for an empty window.
+    """
+    start = max(0.0, float(start_time)) if start_time else None
+    end = float(end_time) if end_time is not None else None
+    if end is not None and end >= duration:
+        end = None
+    if start is not None and start >= duration:
+        raise ValueError(f"Clip start {start:.1f}s is past the end of the video ({duration:.1f}s)")
+    if end is not None and end <= (start or 0):
+        raise ValueError("Clip end must be after clip start")
+    return start, end
+
+
+def xtts_language(language):
+    """XTTS language code for a target language (Arabic when unsupported)"""
+    return language if language in XTTS_LANGUAGES else "ar"
+
+
+def synthesize_chunk(tts_engine, text, voice_latents, speaker_wav, lang_code):
+    """Synthesize one chunk with a given XTTS engine (also used by pool workers)"""
+    from core.timeline import to_float32
+    
+    if voice_latents is not None:
+        # Voice cloning from cached conditioning latents
+        gpt_cond_latent, speaker_embedding = voice_latents
+        out = tts_engine.synthesizer.tts_model.inference(
+            text,
+            lang_code,
+            gpt_cond_latent,
+            speaker_embedding,
+            enable_text_splitting=True
+        )
+        return to_float32(out["wav"])
+    
+    if speaker_wav:
+        # Voice cloning mode
+        return to_float32(tts_engine.tts(text=text, speaker_wav=speaker_wav, language=lang_code))
+    
+    # Default voice mode: use the first built-in speaker if the model has any
+    if hasattr(tts_engine, 'speakers') and tts_engine.speakers:
+        return to_float32(tts_engine.tts(
+            text=text, speaker=tts_engine.speakers[0], language=lang_code
+        ))
+    return to_float32(tts_engine.tts(text=text, language=lang_code))
+
+
+# Whisper decode options (part of the transcript cache key)
+WHISPER_OPTIONS = {"task": "transcribe"}
+
+# Silence between the pieces of a segment too long for one XTTS call
+TTS_PIECE_GAP_SECONDS = 0.1
+
+
+class JobCancelled(Exception):
+    """Raised at the next stage checkpoint after a job's cancel event is set"""
+
+
+def unique_stamp():
+    """Timestamp plus a short random suffix so concurrent jobs never share file names"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
 class VideoProcessor:
     """Handles the complete video dubbing pipeline"""
     
-    def __init__(self):
-        self.whisper_model = None
-        self.nllb_model = None
-        self.nllb_tokenizer = None
-        self.tts_engine = None
-        self.device = DEVICE
+    def __init__(self, metrics=None, models=None):
+        # Warm models, shareable between processors
+        self.models = models or ModelManager()
         
         # Dialect-specific translator
         self.dialect_translator = None
         
+        # Stage metrics (shared registry aggregates across jobs)
+        self.metrics = metrics or pipeline_metrics
+        if METRICS_PORT:
+            self.metrics.serve(METRICS_PORT)
+        
+        # Per-job tracer (replaced by a real Tracer when tracing is enabled)
+        self.tracer = NULL_TRACER
+        
+        # Set by process_video; checked between stages and synthesized chunks
+        self.cancel_event = None
+        
         # Subtitle generator
-        self.subtitle_gen = SubtitleGenerator()
+        self.subtitle_gen = SubtitleGenerator(metrics=self.metrics)
+        
+        # Finished outputs keyed by job fingerprint
+        self.job_cache = JobCache() if JOB_CACHE_ENABLED else None
+        
+        # Whisper results keyed by audio fingerprint, model, language and options
+        self.transcript_cache = TranscriptCache() if TRANSCRIPT_CACHE_ENABLED else None
         
         # Pre-trained voice audio paths
         self.pretrained_voices = {
@@ -50,42 +160,135 @@ class VideoProcessor:
         # Ensure voices directory exists
         VOICES_DIR.mkdir(parents=True, exist_ok=True)
     
+    @property
+    def device(self):
+        """Model device, detected on first use so importing this module stays cheap"""
+        return get_device()
+    
+    @property
+    def whisper_model(self):
+        return self.models.whisper_model
+    
+    @property
+    def whisper_model_name(self):
+        return self.models.whisper_model_name
+    
+    @property
+    def nllb_model(self):
+        return self.models.nllb_model
+    
+    @property
+    def nllb_tokenizer(self):
+        return self.models.nllb_tokenizer
+    
+    @property
+    def tts_engine(self):
+        return self.models.tts_engine
+    
+    @contextmanager
+    def _stage(self, stage, items=0):
+        """Time a stage for metrics and, when tracing, as a trace span"""
+        with self.tracer.span(stage, "stage"):
+            with self.metrics.stage("processor", stage, items=items) as event:
+                yield event
+    
+    def _check_cancelled(self):
+        """Stop the job here if it has been cancelled"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise JobCancelled("Job cancelled")
+    
+    def _set_tracer(self, tracer):
+        """Attach a tracer to this processor and its helpers"""
+        self.tracer = tracer
+        self.subtitle_gen.tracer = tracer
+        if self.dialect_translator:
+            self.dialect_translator.tracer = tracer
+    
     def load_whisper(self, model_name="medium", progress_callback=None):
         """Load Whisper model for speech recognition"""
-        if progress_callback:
-            progress_callback(5, f"Loading Whisper {model_name} model...")
-        
-        self.whisper_model = whisper.load_model(model_name, device=self.device)
-        
-        if progress_callback:
-            progress_callback(10, f"✓ Whisper model loaded on {self.device}")
+        with self._stage("load_whisper") as event:
+            hit = self.models.load_whisper(model_name, progress_callback)
+            event.cache = "hit" if hit else "miss"
     
     def load_nllb(self, progress_callback=None):
         """Load NLLB-200 model for translation"""
-        if progress_callback:
-            progress_callback(15, "Loading NLLB-200 translation model...")
+        with self._stage("load_nllb") as event:
+            hit = self.models.load_nllb(progress_callback)
+            event.cache = "hit" if hit else "miss"
+    
+    def load_tts(self, progress_callback=None):
+        """Load XTTS v2 for voice synthesis (a pool of CPU workers in parallel mode)"""
+        with self._stage("load_tts") as event:
+            if self.use_parallel_tts():
+                hit = self.models.load_tts_pool(progress_callback)
+            else:
+                hit = self.models.load_tts(progress_callback)
+            event.cache = "hit" if hit else "miss"
+    
+    def use_parallel_tts(self):
+        """Shard synthesis across worker processes (CPU only; GPUs batch better in-process)"""
+        return PARALLEL_TTS and self.device == "cpu"
+    
+    def prewarm(self, whisper_model, voice_type="male", reference_audio=None,
+                progress_callback=None):
+        """
+        Load all models and the selected voice ahead of the first job
         
-        self.nllb_tokenizer = AutoTokenizer.from_pretrained(
-            NLLB_MODEL,
-            cache_dir=str(MODELS_DIR)
-        )
-        self.nllb_model = AutoModelForSeq2SeqLM.from_pretrained(
-            NLLB_MODEL,
-            cache_dir=str(MODELS_DIR)
-        ).to(self.device)
+        Safe to call from a background thread: jobs that start meanwhile
+        wait on the per-model locks and then reuse the warm instances.
+        With sequential residency only the first stage's model is loaded.
+        """
+        self.load_whisper(whisper_model, progress_callback)
+        if self.models.sequential:
+            if progress_callback:
+                progress_callback(100, "✓ Whisper ready (sequential residency)")
+            return
         
-        if progress_callback:
-            progress_callback(25, f"✓ NLLB-200 loaded on {self.device}")
+        self.load_nllb(progress_callback)
+        self.load_tts(progress_callback)
+        
+        try:
+            speaker_wav = self.resolve_speaker_wav(voice_type, reference_audio)
+        except FileNotFoundError:
+            speaker_wav = None
+        
+        if speaker_wav:
+            with self._stage("prewarm_voice", items=1):
+                self.models.get_voice_latents(speaker_wav)
+            if progress_callback:
+                progress_callback(100, f"✓ {voice_type.capitalize()} voice ready")
     
-    def load_tts(self, progress_callback=None):
-        """Load XTTS v2 for voice synthesis"""
-        if progress_callback:
-            progress_callback(30, "Loading XTTS v2 voice synthesis model...")
+    def preload(self, model, whisper_model=None):
+        """Load a model on a background thread while the current stage runs"""
+        loaders = {
+            "whisper": lambda: self.load_whisper(whisper_model or "medium"),
+            "nllb": self.load_nllb,
+            "tts": self.load_tts,
+        }
         
-        self.tts_engine = TTS(XTTS_MODEL).to(self.device)
+        def run():
+            # Errors resurface when the stage itself loads the model
+            try:
+                loaders[model]()
+            except Exception:
+                pass
         
-        if progress_callback:
-            progress_callback(35, f"✓ XTTS v2 loaded on {self.device}")
+        thread = threading.Thread(target=run, name=f"nataq-preload-{model}", daemon=True)
+        thread.start()
+        return thread
+    
+    def _release_model(self, model, held, progress_callback=None, percent=0):
+        """Drop this job's claim on a model; sequential residency unloads it"""
+        if model not in held:
+            return
+        held.discard(model)
+        if model == "nllb" and self.models.sequential:
+            # The dialect adapter holds references to the NLLB weights
+            self.dialect_translator = None
+        with self._stage(f"release_{model}"):
+            unloaded = self.models.release(model)
+        if unloaded and progress_callback:
+            progress_callback(percent, f"✓ Released {model} to free memory")
     
     def generate_pretrained_voice_sample(self, voice_type="male", progress_callback=None):
         """Generate pre-trained voice sample if it doesn't exist"""
@@ -114,15 +317,23 @@ class VideoProcessor:
         
         return str(voice_path)
     
-    def extract_audio(self, video_path, progress_callback=None):
-        """Extract audio from video using FFmpeg"""
+    def extract_audio(self, video_path, progress_callback=None, start_time=None, end_time=None):
+        """Extract audio from video using FFmpeg (optionally only start_time → end_time)"""
         if progress_callback:
             progress_callback(40, "Extracting audio from video...")
         
-        audio_path = TEMP_DIR / f"extracted_audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+        audio_path = TEMP_DIR / f"extracted_audio_{unique_stamp()}.wav"
+        
+        # Input seeking: ffmpeg only decodes the requested window
+        window = []
+        if start_time:
+            window += ['-ss', f"{start_time:.3f}"]
+        if end_time is not None:
+            window += ['-t', f"{end_time - (start_time or 0):.3f}"]
         
         cmd = [
             'ffmpeg',
+            *window,
             '-i', str(video_path),
             '-vn',  # No video
             '-acodec', 'pcm_s16le',  # PCM audio
@@ -132,33 +343,125 @@ class VideoProcessor:
             str(audio_path)
         ]
         
-        subprocess.run(cmd, capture_output=True, check=True)
+        with self._stage("extract_audio", items=1):
+            self.tracer.run(cmd, capture_output=True, check=True)
         
         if progress_callback:
             progress_callback(45, f"✓ Audio extracted: {audio_path.name}")
         
         return str(audio_path)
     
-    def transcribe_audio(self, audio_path, language, progress_callback=None):
-        """Transcribe audio using Whisper"""
+    def extract_audio_samples(self, video_path, progress_callback=None, start_time=None,
+                              end_time=None):
+        """Decode the audio track to 16 kHz mono int16 samples through a pipe (no WAV on disk)"""
+        if progress_callback:
+            progress_callback(40, "Extracting audio from video...")
+        
+        window = []
+        if start_time:
+            window += ['-ss', f"{start_time:.3f}"]
+        if end_time is not None:
+            window += ['-t', f"{end_time - (start_time or 0):.3f}"]
+        
+        cmd = [
+            'ffmpeg',
+            *window,
+            '-i', str(video_path),
+            '-vn',
+            '-f', 's16le',  # Raw PCM on stdout
+            '-ar', '16000',
+            '-ac', '1',
+            'pipe:1'
+        ]
+        
+        with self._stage("extract_audio", items=1):
+            samples = read_pcm(self.tracer.run(cmd, capture_output=True, check=True).stdout)
+        
+        if progress_callback:
+            progress_callback(45, f"✓ Audio extracted: {samples.size / 16000:.1f}s in memory")
+        
+        return samples
+    
+    def transcribe_audio(self, audio_path, language, progress_callback=None, model_name=None):
+        """Transcribe audio using Whisper (a WAV path, or int16 samples from extract_audio_samples)"""
         if progress_callback:
             progress_callback(50, f"Transcribing audio in {language}...")
         
-        result = self.whisper_model.transcribe(
-            audio_path,
-            language=language,
-            task="transcribe",
-            verbose=False
-        )
+        model_name = model_name or self.whisper_model_name
+        options = dict(WHISPER_OPTIONS, whisper_version=model_versions()["openai-whisper"])
+        precision = precision_tags(self.device, self.models.requested_precision)
+        if "whisper" in precision:
+            options["precision"] = precision["whisper"]
+        
+        # Same audio, model and options: reuse the transcript (any target or voice)
+        fingerprint = None
+        if self.transcript_cache:
+            with self._stage("transcript_lookup", items=1) as event:
+                if isinstance(audio_path, (str, os.PathLike)):
+                    fingerprint = fingerprint_wav(audio_path)
+                else:
+                    fingerprint = fingerprint_pcm(audio_path, 16000)
+                cached = self.transcript_cache.lookup(fingerprint, model_name, language, options)
+                event.cache = "hit" if cached else "miss"
+            if cached:
+                transcription, segments = cached
+                if progress_callback:
+                    progress_callback(55, f"✓ Reusing cached transcript: {len(transcription)} chars, {len(segments)} segments")
+                return transcription, segments
+        
+        audio = audio_path
+        if not isinstance(audio, (str, os.PathLike)):
+            # Whisper takes float32 in [-1, 1] at 16 kHz
+            audio = audio.astype("float32") / 32768.0
+        
+        with self._stage("transcribe") as event:
+            # Whisper is shared: another job may have switched sizes since we loaded
+            with self.models.using("whisper"):
+                if model_name and model_name != self.whisper_model_name:
+                    self.load_whisper(model_name, progress_callback)
+                with self.tracer.span("whisper.transcribe", "model", model=self.whisper_model_name):
+                    result = self.whisper_model.transcribe(
+                        audio,
+                        language=language,
+                        verbose=False,
+                        **self.whisper_options()
+                    )
+            
+            transcription = result["text"]
+            segments = result.get("segments", [])
+            event.items = len(segments)
         
-        transcription = result["text"]
-        segments = result.get("segments", [])
+        if fingerprint is not None:
+            try:
+                self.transcript_cache.store(fingerprint, model_name, language, options,
+                                            transcription, segments)
+            except OSError:
+                pass
         
         if progress_callback:
             progress_callback(55, f"✓ Transcription completed: {len(transcription)} chars, {len(segments)} segments")
         
         return transcription, segments
     
+    def transcribe_samples(self, samples, language):
+        """Transcribe 16 kHz mono float32 samples already in memory (no cache)"""
+        with self._stage("transcribe") as event:
+            with self.models.using("whisper"), \
+                    self.tracer.span("whisper.transcribe", "model", model=self.whisper_model_name):
+                result = self.whisper_model.transcribe(
+                    samples,
+                    language=language,
+                    verbose=None,
+                    **self.whisper_options()
+                )
+            segments = result.get("segments", [])
+            event.items = len(segments)
+        return result["text"], segments
+    
+    def whisper_options(self):
+        """Whisper decode options, with fp16 following the loaded model's precision"""
+        return dict(WHISPER_OPTIONS, fp16=self.models.precision.get("whisper") == "fp16")
+    
     def translate_text(self, text, source_lang, target_lang, dialect=None, progress_callback=None):
         """
         Translate text using NLLB-200 with dialect support
@@ -170,57 +473,101 @@ class VideoProcessor:
             dialect: Arabic dialect (if target is Arabic)
             progress_callback: Progress function
         """
+        # Untimed text: sentences packed up to NLLB_TOKEN_BUDGET tokens, translated as one batch
+        tokenizer = self.nllb_tokenizer
+        units = translation_units(
+            text, source_lang,
+            lambda unit: len(tokenizer(unit, add_special_tokens=False)["input_ids"])
+        )
+        translations = self.translate_texts(
+            units, source_lang, target_lang, dialect, progress_callback
+        )
+        return joiner_for(target_lang).join(t.strip() for t in translations if t.strip())
+    
+    def translate_segments(self, segments, source_lang, target_lang, dialect=None,
+                           progress_callback=None):
+        """
+        Translate Whisper segments in one batch, keeping ids and timings
+        
+        Returns a list of {"id", "start", "end", "source", "text"} dicts where
+        "text" is the translation. Subtitles and TTS consume this directly.
+        """
+        items = [seg for seg in segments if seg.get("text", "").strip()]
+        translations = self.translate_texts(
+            [seg["text"].strip() for seg in items], source_lang, target_lang, dialect,
+            progress_callback
+        )
+        
+        return [
+            {
+                "id": seg.get("id", i),
+                "start": float(seg.get("start", 0)),
+                "end": float(seg.get("end", seg.get("start", 0))),
+                "source": seg["text"].strip(),
+                "text": translation.strip()
+            }
+            for i, (seg, translation) in enumerate(zip(items, translations))
+        ]
+    
+    def translate_texts(self, texts, source_lang, target_lang, dialect=None, progress_callback=None):
+        """Translate a list of texts, returning translations in the same order"""
         if progress_callback:
             dialect_name = dialect if dialect else target_lang
             progress_callback(60, f"Translating {source_lang} → {target_lang} ({dialect_name})...")
         
-        # If target is Arabic and dialect specified, use dialect translator
-        if target_lang == "ar" and dialect and dialect != "msa":
-            # Initialize dialect translator if not already done
-            if not self.dialect_translator:
-                if progress_callback:
-                    progress_callback(61, "Loading dialect translation model...")
-                self.dialect_translator = DialectTranslator(NLLB_MODEL, self.device)
-            
-            # Get NLLB source code
-            src_code = NLLB_LANG_CODES.get(source_lang, "eng_Latn")
-            
-            # Translate to dialect
-            translation = self.dialect_translator.translate_to_dialect(
-                text, 
-                src_code,
-                dialect,
-                progress_callback
+        # Get NLLB language codes
+        src_code = NLLB_LANG_CODES.get(source_lang, "eng_Latn")
+        tgt_code = NLLB_LANG_CODES.get(target_lang, "arb_Arab")
+        use_dialect = target_lang == "ar" and dialect and dialect != "msa"
+        
+        with self._stage("translate", items=len(texts)):
+            # Dialects are adapted from the MSA translation
+            translations = self._translate_batch(
+                texts, src_code, "arb_Arab" if use_dialect else tgt_code, progress_callback
             )
             
-        else:
-            # Standard translation (MSA or non-Arabic)
-            # Get NLLB language codes
-            src_code = NLLB_LANG_CODES.get(source_lang, "eng_Latn")
-            tgt_code = NLLB_LANG_CODES.get(target_lang, "arb_Arab")
-            
-            # Split long text into chunks (max 512 tokens)
-            sentences = text.split('. ')
-            translations = []
-            
-            for i, sentence in enumerate(sentences):
-                if not sentence.strip():
-                    continue
-                    
+            if use_dialect:
+                if progress_callback:
+                    progress_callback(63, f"Adapting to {dialect} dialect...")
+                translator = self._get_dialect_translator()
+                with self.models.using("nllb"):
+                    translations = [translator.adapt_to_dialect(t, dialect) for t in translations]
+        
+        if progress_callback:
+            total_chars = sum(len(t) for t in translations)
+            progress_callback(65, f"✓ Translation completed: {len(translations)} segments, {total_chars} chars")
+        
+        return translations
+    
+    def _translate_batch(self, texts, src_code, tgt_code, progress_callback=None):
+        """Batched NLLB generation; inputs are length-sorted to minimise padding"""
+        import torch
+        
+        translations = [""] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        
+        for batch_start in range(0, len(order), TRANSLATION_BATCH_SIZE):
+            self._check_cancelled()
+            batch = order[batch_start:batch_start + TRANSLATION_BATCH_SIZE]
+            
+            # The tokenizer is shared, so its language is set under the model lock
+            with self.models.using("nllb"):
+                # Source language drives the tokenizer's language prefix token
+                self.nllb_tokenizer.src_lang = src_code
+                forced_bos_token_id = self.nllb_tokenizer.convert_tokens_to_ids(tgt_code)
+                
                 # Tokenize
                 inputs = self.nllb_tokenizer(
-                    sentence,
+                    [texts[i] for i in batch],
                     return_tensors="pt",
                     padding=True,
                     truncation=True,
                     max_length=512
                 ).to(self.device)
                 
-                # Force target language
-                forced_bos_token_id = self.nllb_tokenizer.lang_code_to_id[tgt_code]
-                
                 # Translate
-                with torch.no_grad():
+                with torch.no_grad(), self.tracer.span("nllb.generate", "model", batch=len(batch),
+                                                       tokens=int(inputs["input_ids"].numel())):
                     outputs = self.nllb_model.generate(
                         **inputs,
                         forced_bos_token_id=forced_bos_token_id,
@@ -228,195 +575,593 @@ class VideoProcessor:
                         num_beams=5
                     )
                 
-                sentence_translation = self.nllb_tokenizer.decode(outputs[0], skip_special_tokens=True)
-                translations.append(sentence_translation)
-                
-                if progress_callback and i % 5 == 0:
-                    progress = 60 + int((i / len(sentences)) * 5)
-                    progress_callback(progress, f"Translating... {i+1}/{len(sentences)} sentences")
+                decoded = self.nllb_tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for i, translation in zip(batch, decoded):
+                translations[i] = translation
             
-            translation = '. '.join(translations)
-        
-        if progress_callback:
-            progress_callback(65, f"✓ Translation completed: {len(translation)} chars")
+            if progress_callback:
+                done = min(batch_start + len(batch), len(order))
+                progress = 60 + int((done / len(order)) * 5)
+                progress_callback(progress, f"Translating... {done}/{len(order)} segments")
         
-        return translation
+        return translations
+    
+    def _get_dialect_translator(self):
+        """Dialect adapter sharing the already-loaded NLLB model"""
+        if not self.dialect_translator:
+            self.dialect_translator = DialectTranslator(
+                NLLB_MODEL, self.device, model=self.nllb_model, tokenizer=self.nllb_tokenizer
+            )
+            self.dialect_translator.tracer = self.tracer
+        return self.dialect_translator
     
     def synthesize_speech(self, text, voice_type="male", reference_audio=None, 
-                         language="ar", dialect=None, progress_callback=None):
+                         language="ar", dialect=None, progress_callback=None,
+                         segments=None, duration=None, project=None, in_memory=False,
+                         speaker_voices=None):
         """
         Generate speech using XTTS v2 with pre-trained or custom voice
-        FIXED: Process ALL text completely with proper chunking
+        
+        With timed `segments` ([{"start", "end", "text"}, ...]) each segment's
+        audio is placed at its source start on a preallocated timeline of
+        `duration` seconds; without them the text is chunked and spoken back
+        to back. Either way the track is assembled in one numpy pass.
+        A DubbingProject holding the same segments records each segment's
+        audio and placement for later incremental re-renders.
+        With in_memory the TimelineAssembler is returned instead of a WAV path,
+        for merge_audio_video to stream into ffmpeg.
+        With `speaker_voices` ({speaker: voice type}) segments carrying a
+        "speaker" label are spoken in that speaker's voice (voice_type for any
+        other), synthesized one speaker at a time.
         """
         if progress_callback:
             progress_callback(70, f"Synthesizing speech with {voice_type} voice...")
         
-        output_path = TEMP_DIR / f"synthesized_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+        output_path = TEMP_DIR / f"synthesized_{unique_stamp()}.wav"
         
         # Determine reference audio for voice cloning
-        if voice_type == "custom" and reference_audio and os.path.exists(reference_audio):
-            speaker_wav = reference_audio
-            use_speaker_wav = True
+        try:
+            speaker_wav = self.resolve_speaker_wav(voice_type, reference_audio)
+        except FileNotFoundError:
             if progress_callback:
+                progress_callback(71, f"⚠️ Pre-trained {voice_type} voice not found!")
+                progress_callback(72, "Please run: python create_voices.py")
+            raise
+        use_speaker_wav = speaker_wav is not None
+        
+        if progress_callback:
+            if voice_type == "custom" and use_speaker_wav:
                 progress_callback(72, "Using custom voice cloning...")
-        elif voice_type in ["male", "female"]:
-            # Use pre-trained voice
-            speaker_wav = str(self.pretrained_voices[voice_type])
-            if not os.path.exists(speaker_wav):
-                if progress_callback:
-                    progress_callback(71, f"⚠️ Pre-trained {voice_type} voice not found!")
-                    progress_callback(72, "Please run: python create_voices.py")
-                raise FileNotFoundError(
-                    f"Pre-trained {voice_type} voice not found at {speaker_wav}\n"
-                    f"Run 'python create_voices.py' first to generate voices."
-                )
-            use_speaker_wav = True
-            if progress_callback:
+            elif use_speaker_wav:
                 progress_callback(72, f"Using pre-trained {voice_type} voice...")
-        else:
-            speaker_wav = None
-            use_speaker_wav = False
-            if progress_callback:
+            else:
                 progress_callback(72, "Using default TTS voice...")
         
         # Language code for XTTS
-        lang_code = language if language in ["en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", "nl", "cs", "ar", "zh-cn", "ja", "hu", "ko"] else "ar"
-        
-        # CRITICAL FIX: Better text chunking to avoid truncation
-        # Split by sentences but keep reasonable chunk sizes
-        import re
-        
-        # Split on sentence boundaries (., !, ?, ؟, .)
-        sentences = re.split(r'[.!?؟。]\s+', text)
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        # Further chunk if sentences are too long (>200 chars)
-        final_chunks = []
-        for sent in sentences:
-            if len(sent) > 200:
-                # Split long sentences by commas or conjunctions
-                parts = re.split(r'[,،;]\s+', sent)
-                final_chunks.extend([p.strip() for p in parts if p.strip()])
+        lang_code = xtts_language(language)
+        
+        if segments:
+            # Timed mode: one TTS call per translated segment
+            chunks = [(seg["start"], seg["end"], seg["text"].strip()) for seg in segments]
+        else:
+            chunks = [(None, None, chunk) for chunk in tts_chunks(text, lang_code)]
+        
+        if progress_callback:
+            progress_callback(73, f"Processing {len(chunks)} text chunks...")
+        
+        sample_rate = self.tts_sample_rate()
+        todo = [(i, chunk) for i, (_, _, chunk) in enumerate(chunks) if chunk and len(chunk) >= 3]
+        speaker_of, speaker_wavs = {}, {}
+        if segments and speaker_voices:
+            speaker_of = {i: seg.get("speaker") for i, seg in enumerate(segments)}
+            speaker_wavs = {
+                speaker: self.resolve_speaker_wav(voice, reference_audio)
+                for speaker, voice in speaker_voices.items()
+            }
+        synthesized, failed_chunks = self._synthesize_speakers(
+            todo, speaker_of, speaker_wavs, speaker_wav, lang_code, sample_rate, progress_callback
+        )
+        
+        # Back in chunk order, whatever order the workers finished in
+        timed_audio = [(chunks[i][0], chunks[i][1], synthesized[i]) for i in sorted(synthesized)]
+        
+        # Report if chunks failed
+        if failed_chunks > 0 and progress_callback:
+            progress_callback(78, f"⚠️ {failed_chunks}/{len(chunks)} chunks failed")
+        
+        if not timed_audio:
+            raise Exception("No audio segments were generated. Check TTS model and text input.")
+        
+        if progress_callback:
+            progress_callback(78, f"Assembling {len(timed_audio)} audio segments...")
+        
+        with self._stage("assemble_timeline", items=len(timed_audio)):
+            if segments and project is not None:
+                # Placed through the project so it knows where every segment landed
+                for i, wav in synthesized.items():
+                    project.store_audio(project.segments[i], wav)
+                timeline, _ = project.rebuild_track()
+            elif segments:
+                timeline = TimelineAssembler(duration or 0, sample_rate=sample_rate)
+                timeline.place_segments(timed_audio)
             else:
-                final_chunks.append(sent)
+                # Untimed text: back to back with 150ms pauses, sized up front
+                gap = int(sample_rate * 0.15)
+                total = sum(wav.size for _, _, wav in timed_audio) + gap * (len(timed_audio) - 1)
+                timeline = TimelineAssembler(total / sample_rate, sample_rate=sample_rate)
+                position = 0
+                for _, _, wav in timed_audio:
+                    timeline.buffer[position:position + wav.size] = wav
+                    position += wav.size + gap
+            
+            if not in_memory:
+                timeline.write_wav(output_path)
         
         if progress_callback:
-            progress_callback(73, f"Processing {len(final_chunks)} text chunks...")
+            if timeline.stretched:
+                progress_callback(79, f"Time-compressed {timeline.stretched} segments to fit their slots")
+            progress_callback(80, f"✓ Complete speech: {timeline.duration:.1f}s, {len(timed_audio)} segments")
+        
+        return timeline if in_memory else str(output_path)
+    
+    def tts_sample_rate(self):
+        """Output sample rate of the loaded XTTS model"""
+        from core.timeline import TTS_SAMPLE_RATE
+        return getattr(getattr(self.tts_engine, "synthesizer", None),
+                       "output_sample_rate", None) or TTS_SAMPLE_RATE
+    
+    def synthesize_texts(self, todo, speaker_wav, lang_code, sample_rate, progress_callback=None):
+        """
+        Synthesize [(index, text), ...] on the pool or the in-process model
+        
+        Returns ({index: float32 samples}, number of failed chunks).
+        """
+        # Conditioning latents are computed once per voice (or were prewarmed);
+        # pool workers keep their own
+        pool = self.models.tts_pool if self.use_parallel_tts() else None
+        voice_latents = None
+        if speaker_wav and pool is None:
+            voice_latents = self.models.get_voice_latents(speaker_wav)
         
-        audio_segments = []
         failed_chunks = 0
         
-        for i, chunk in enumerate(final_chunks):
-            if not chunk or len(chunk) < 3:
-                continue
-            
-            temp_output = TEMP_DIR / f"temp_chunk_{i}_{datetime.now().strftime('%H%M%S')}.wav"
+        # Segments already heard in a preview are not synthesized again
+        synthesized = {}
+        for i, chunk in todo:
+            wav = self.models.get_segment_audio(speaker_wav, lang_code, chunk)
+            if wav is not None:
+                synthesized[i] = wav
+        if synthesized:
+            todo = [(i, chunk) for i, chunk in todo if i not in synthesized]
+            if progress_callback:
+                progress_callback(73, f"Reusing {len(synthesized)} previewed segments")
+        
+        with self._stage("synthesize") as event:
+            if pool is not None:
+                if progress_callback:
+                    progress_callback(73, f"Synthesizing on {pool.workers} worker processes...")
+                results = pool.synthesize(todo, lang_code, speaker_wav)
+            else:
+                results = self._synthesize_serial(todo, voice_latents, speaker_wav, lang_code)
             
             try:
-                # Generate audio for this chunk
-                if use_speaker_wav and speaker_wav:
-                    # Voice cloning mode
-                    self.tts_engine.tts_to_file(
-                        text=chunk,
-                        speaker_wav=speaker_wav,
-                        language=lang_code,
-                        file_path=str(temp_output)
-                    )
-                else:
-                    # Default voice mode
-                    # Check if model has speakers
-                    if hasattr(self.tts_engine, 'speakers') and self.tts_engine.speakers:
-                        # Use first speaker as default
-                        speaker = self.tts_engine.speakers[0]
-                        self.tts_engine.tts_to_file(
-                            text=chunk,
-                            speaker=speaker,
-                            language=lang_code,
-                            file_path=str(temp_output)
-                        )
-                    else:
-                        self.tts_engine.tts_to_file(
-                            text=chunk,
-                            language=lang_code,
-                            file_path=str(temp_output)
-                        )
-                
-                # Load audio segment
-                if temp_output.exists() and temp_output.stat().st_size > 1000:
-                    audio_segments.append(AudioSegment.from_wav(str(temp_output)))
+                for done, (i, wav) in enumerate(results, 1):
+                    self._check_cancelled()
                     
-                    # Update progress
-                    if progress_callback and (i % 3 == 0 or i == len(final_chunks) - 1):
-                        progress = 73 + int((i / len(final_chunks)) * 7)
-                        progress_callback(progress, f"Synthesized {i+1}/{len(final_chunks)} chunks")
-                else:
-                    failed_chunks += 1
+                    if isinstance(wav, Exception):
+                        failed_chunks += 1
+                        if progress_callback:
+                            progress_callback(73, f"⚠️ Failed chunk {i+1}: {str(wav)[:50]}")
+                    elif wav.size > sample_rate // 20:
+                        synthesized[i] = wav
+                        
+                        # Update progress
+                        if progress_callback and (done % 3 == 0 or done == len(todo)):
+                            progress = 73 + int((done / len(todo)) * 7)
+                            progress_callback(progress, f"Synthesized {done}/{len(todo)} chunks")
+                    else:
+                        failed_chunks += 1
+                        if progress_callback:
+                            progress_callback(73, f"⚠️ Chunk {i+1} produced no audio")
+            finally:
+                results.close()
+            event.items = len(synthesized)
+        
+        return synthesized, failed_chunks
+    
+    def _synthesize_speakers(self, todo, speaker_of, speaker_wavs, default_wav, lang_code,
+                             sample_rate, progress_callback=None):
+        """
+        Synthesize [(index, text), ...] grouped by speaker
+        
+        Each speaker's conditioning latents are fetched once and all of their
+        chunks run back to back before the next voice, instead of switching
+        voices chunk by chunk. `speaker_of` maps index → speaker and
+        `speaker_wavs` speaker → reference audio (default_wav otherwise).
+        Texts over XTTS's per-language limit are spoken in sentence-packed
+        pieces and rejoined, instead of being truncated by the model.
+        """
+        pieces = {}
+        groups = {}
+        for i, chunk in todo:
+            for part in split_for_tts(chunk, lang_code):
+                piece = len(pieces)
+                pieces[piece] = i
+                groups.setdefault(speaker_of.get(i), []).append((piece, part))
+        
+        spoken = {}
+        for speaker, group in groups.items():
+            self._check_cancelled()
+            speaker_wav = speaker_wavs.get(speaker, default_wav)
+            if progress_callback and speaker:
+                voice = os.path.basename(speaker_wav) if speaker_wav else "default voice"
+                progress_callback(73, f"🗣️ {speaker}: {len(group)} segments ({voice})")
+            done, _ = self.synthesize_texts(group, speaker_wav, lang_code, sample_rate,
+                                            progress_callback)
+            spoken.update(done)
+        
+        # A text is kept only when all of its pieces were spoken
+        parts = {}
+        for piece, i in pieces.items():
+            parts.setdefault(i, []).append(spoken.get(piece))
+        gap = np.zeros(int(sample_rate * TTS_PIECE_GAP_SECONDS), dtype=np.float32)
+        synthesized = {}
+        for i, waves in parts.items():
+            if all(wav is not None for wav in waves):
+                synthesized[i] = waves[0] if len(waves) == 1 else np.concatenate(
+                    [w for wav in waves for w in (wav, gap)][:-1]
+                )
+        return synthesized, len(todo) - len(synthesized)
+    
+    def preview(self, video_path, voice_type, reference_audio, source_lang, target_lang,
+                dialect, whisper_model, progress_callback=None, stop_event=None,
+                max_segments=PREVIEW_SEGMENTS, start_time=None, end_time=None):
+        """
+        Speak the first translated segments while they are being synthesized
+        
+        Only the first PREVIEW_SECONDS of audio (from start_time) are transcribed. Each segment
+        is streamed from XTTS into ffplay as it is generated, and the finished
+        samples are kept so the full dub does not synthesize them again.
+        
+        Returns the number of segments previewed.
+        """
+        from core.preview import PreviewPlayer, PREVIEW_GAP_SECONDS
+        
+        media = self.validate_input(video_path, progress_callback)
+        start_time, end_time = clip_window(media.duration, start_time, end_time)
+        preview_end = (start_time or 0) + PREVIEW_SECONDS
+        if end_time is not None:
+            preview_end = min(preview_end, end_time)
+        
+        self.load_whisper(whisper_model, progress_callback)
+        self.load_nllb(progress_callback)
+        # Streaming needs the in-process model, even when jobs use the worker pool
+        with self._stage("load_tts") as event:
+            event.cache = "hit" if self.models.load_tts(progress_callback) else "miss"
+        
+        audio_path = self.extract_audio(video_path, progress_callback, start_time, preview_end)
+        try:
+            _, segments = self.transcribe_audio(audio_path, source_lang, progress_callback,
+                                                model_name=whisper_model)
+            if voice_type == "auto":
+                excerpt = speaker_excerpt(read_wav(audio_path)[0], segments)
+        finally:
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+        
+        segments = [seg for seg in segments if seg.get("text", "").strip()][:max_segments]
+        if not segments:
+            if progress_callback:
+                progress_callback(100, "⚠️ No speech found at the start of the video")
+            return 0
+        
+        translated = self.translate_segments(segments, source_lang, target_lang, dialect,
+                                             progress_callback)
+        
+        if voice_type == "auto":
+            voice_type = self.select_auto_voice(excerpt, target_lang, progress_callback)
+        speaker_wav = self.resolve_speaker_wav(voice_type, reference_audio)
+        voice_latents = self.models.get_voice_latents(speaker_wav) if speaker_wav else None
+        lang_code = xtts_language(target_lang)
+        sample_rate = self.tts_sample_rate()
+        
+        player = PreviewPlayer(sample_rate)
+        if not player.start() and progress_callback:
+            progress_callback(70, "⚠️ ffplay not found: preview audio will be prepared but not played")
+        
+        previewed = 0
+        try:
+            with self._stage("preview", items=len(translated)) as event:
+                for n, seg in enumerate(translated, 1):
+                    if stop_event is not None and stop_event.is_set():
+                        break
                     if progress_callback:
-                        progress_callback(73, f"⚠️ Chunk {i+1} produced no audio")
-                
+                        progress_callback(70 + int(n / len(translated) * 30),
+                                          f"🔊 Preview {n}/{len(translated)}: {seg['text'][:60]}")
+                    
+                    complete = self._preview_segment(seg["text"], lang_code, voice_latents,
+                                                     speaker_wav, player, stop_event)
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    if complete:
+                        previewed += 1
+                    player.write_silence(PREVIEW_GAP_SECONDS)
+                event.items = previewed
+        finally:
+            if stop_event is not None and stop_event.is_set():
+                player.stop()
+            else:
+                player.finish()
+        
+        if progress_callback:
+            progress_callback(100, f"✓ Preview finished ({previewed} segments kept for the full dub)")
+        return previewed
+    
+    def _preview_segment(self, text, lang_code, voice_latents, speaker_wav, player, stop_event=None):
+        """
+        Stream one segment into the preview player, piece by piece
+        
+        The text is split exactly as the full dub splits it (split_for_tts),
+        and each finished piece is stored under the key the dub looks up.
+        Returns True when every piece was spoken.
+        """
+        from core.preview import stream_segment
+        
+        pieces = split_for_tts(text, lang_code)
+        for n, piece in enumerate(pieces):
+            if n:
+                player.write_silence(TTS_PIECE_GAP_SECONDS)
+            blocks = []
+            with self.models.using("tts"), \
+                    self.tracer.span("xtts.inference_stream", "model", chars=len(piece)):
+                for block in stream_segment(self.tts_engine, piece, lang_code, voice_latents,
+                                            speaker_wav, PREVIEW_STREAM_CHUNK_SIZE):
+                    blocks.append(block)
+                    player.write(block)
+                    if stop_event is not None and stop_event.is_set():
+                        return False
+            if not blocks:
+                return False
+            # Complete pieces are kept for the final dub
+            self.models.store_segment_audio(speaker_wav, lang_code, piece, np.concatenate(blocks))
+        return True
+    
+    def _synthesize_serial(self, todo, voice_latents, speaker_wav, lang_code):
+        """Yield (index, samples or exception) for each chunk on the in-process model"""
+        for i, chunk in todo:
+            self._check_cancelled()
+            try:
+                # Chunks from concurrent jobs interleave on the shared XTTS model
+                with self.models.using("tts"), \
+                        self.tracer.span("xtts.tts", "model", chunk=i, chars=len(chunk)):
+                    wav = self._synthesize_chunk(chunk, voice_latents, speaker_wav, lang_code)
+            except JobCancelled:
+                raise
             except Exception as e:
-                failed_chunks += 1
-                if progress_callback:
-                    progress_callback(73, f"⚠️ Failed chunk {i+1}: {str(e)[:50]}")
+                yield i, e
                 continue
-            
-            finally:
-                # Clean up temp file
-                if temp_output.exists():
-                    try:
-                        temp_output.unlink()
-                    except:
-                        pass
+            yield i, wav
+    
+    def _synthesize_chunk(self, text, voice_latents, speaker_wav, lang_code):
+        """Synthesize one chunk in memory and return float32 samples"""
+        return synthesize_chunk(self.tts_engine, text, voice_latents, speaker_wav, lang_code)
+    
+    def resolve_speaker_wav(self, voice_type, reference_audio=None):
+        """
+        Reference audio for the selected voice (None means the model default)
         
-        # Report if chunks failed
-        if failed_chunks > 0 and progress_callback:
-            progress_callback(78, f"⚠️ {failed_chunks}/{len(final_chunks)} chunks failed")
+        voice_type may also be a voice library id (see build_voice_library.py).
+        "auto" resolves to None here; jobs replace it with select_auto_voice.
+        """
+        if voice_type == "custom" and reference_audio and os.path.exists(reference_audio):
+            return reference_audio
         
-        # Combine all audio segments
-        if audio_segments:
+        library = VoiceLibrary.open()
+        if library and voice_type in library:
+            return library.audio_path(voice_type)
+        
+        if voice_type in ["male", "female"]:
+            speaker_wav = str(self.pretrained_voices[voice_type])
+            if not os.path.exists(speaker_wav) and library:
+                # No loose WAV: the library's Arabic voice of that gender
+                matches = library.find(language="ar", gender=voice_type)
+                if matches:
+                    return library.audio_path(matches[0]["id"])
+            if not os.path.exists(speaker_wav):
+                raise FileNotFoundError(
+                    f"Pre-trained {voice_type} voice not found at {speaker_wav}\n"
+                    f"Run 'python create_voices.py' first to generate voices."
+                )
+            return speaker_wav
+        
+        return None
+    
+    def select_auto_voice(self, excerpt, target_lang, progress_callback=None):
+        """
+        Library voice closest to the original speaker (voice_type="auto")
+        
+        `excerpt` is 16 kHz float32 speech from speaker_excerpt. It is embedded
+        with the XTTS speaker encoder and matched by cosine similarity against
+        the library's embedding matrix in one product. Falls back to the male
+        voice when there is no library, no speech or no speaker encoder.
+        """
+        library = VoiceLibrary.open()
+        problem = None
+        if not library or not len(library):
+            problem = "no voice library (python build_voice_library.py)"
+        elif not excerpt.size:
+            problem = "no speech found to match"
+        elif not self.load_speaker_encoder(progress_callback):
+            problem = "the loaded TTS model has no speaker encoder"
+        
+        if problem is not None:
             if progress_callback:
-                progress_callback(78, f"Combining {len(audio_segments)} audio segments...")
-            
-            combined = audio_segments[0]
-            for segment in audio_segments[1:]:
-                # Add small pause between chunks (150ms)
-                silence = AudioSegment.silent(duration=150)
-                combined = combined + silence + segment
-            
-            # Export combined audio
-            combined.export(str(output_path), format="wav")
-            
+                progress_callback(68, f"⚠️ Auto voice: {problem}, using male voice")
+            return "male"
+        
+        with self._stage("select_voice", items=len(library)):
+            embedding = self.speaker_embedding(excerpt)
+            voice, similarity = library.nearest(embedding, language=target_lang)
+        
+        if progress_callback:
+            progress_callback(68, f"🧭 Auto voice: {voice.get('name', voice['id'])} "
+                                  f"(similarity {similarity:.2f})")
+        return voice["id"]
+    
+    def load_speaker_encoder(self, progress_callback=None):
+        """
+        Make sure the in-process XTTS (and its speaker encoder) is loaded
+        
+        With parallel TTS, load_tts starts only the worker pool; speaker
+        embeddings for diarization and auto voice need a model in this process.
+        Returns True when a speaker encoder is available.
+        """
+        if self.tts_engine is None:
+            with self._stage("load_speaker_encoder") as event:
+                hit = self.models.load_tts(_at_percent(progress_callback, 68))
+                event.cache = "hit" if hit else "miss"
+        return self.has_speaker_encoder()
+    
+    def has_speaker_encoder(self):
+        """Whether the loaded XTTS model can embed speakers"""
+        tts_model = getattr(getattr(self.tts_engine, "synthesizer", None), "tts_model", None)
+        return hasattr(tts_model, "get_speaker_embedding")
+    
+    def speaker_embedding(self, samples):
+        """XTTS speaker-encoder embedding of 16 kHz float32 samples (None without XTTS)"""
+        if not self.has_speaker_encoder():
+            return None
+        tts_model = self.tts_engine.synthesizer.tts_model
+        
+        import torch
+        with self.models.using("tts"), torch.inference_mode():
+            embedding = tts_model.get_speaker_embedding(
+                torch.from_numpy(np.ascontiguousarray(samples, dtype=np.float32)).unsqueeze(0), 16000
+            )
+        return embedding.float().cpu().numpy().reshape(-1)
+    
+    def diarize_segments(self, samples, segments, num_speakers=None, progress_callback=None):
+        """
+        Label segments with "speaker" ("S1", "S2", ...) in place
+        
+        Returns {speaker: mean speaker embedding}; empty when the loaded TTS
+        model has no speaker encoder (every segment is then "S1").
+        """
+        if not self.load_speaker_encoder(progress_callback):
+            for seg in segments:
+                seg["speaker"] = "S1"
             if progress_callback:
-                total_duration = len(combined) / 1000.0  # in seconds
-                progress_callback(80, f"✓ Complete speech: {total_duration:.1f}s, {len(audio_segments)} segments")
-        else:
-            raise Exception("No audio segments were generated. Check TTS model and text input.")
+                progress_callback(68, "⚠️ No speaker encoder available: dubbing with one voice")
+            return {}
         
-        return str(output_path)
+        if progress_callback:
+            progress_callback(68, f"Identifying speakers in {len(segments)} segments...")
+        with self._stage("diarize", items=len(segments)):
+            labels, centroids = Diarizer(self.speaker_embedding, num_speakers=num_speakers) \
+                .diarize(samples, segments)
+        for seg, label in zip(segments, labels):
+            seg["speaker"] = label
+        
+        if progress_callback:
+            progress_callback(69, f"✓ {len(set(labels))} speakers found")
+        return centroids
+    
+    def assign_speaker_voices(self, speakers, voice_type, target_lang, speaker_voices=None,
+                              centroids=None, progress_callback=None):
+        """
+        Voice type for each speaker
+        
+        Explicit `speaker_voices` entries win. Other speakers get the closest
+        library voice to their embedding, each a different one while the
+        library lasts; without a library they alternate between the male and
+        female voices, the first speaker keeping voice_type.
+        """
+        voices = dict(speaker_voices or {})
+        library = VoiceLibrary.open()
+        taken = {voices[s] for s in voices}
+        fallback = ["male", "female"]
+        if voice_type in fallback:
+            fallback.remove(voice_type)
+            fallback.insert(0, voice_type)
+        
+        for n, speaker in enumerate(speakers):
+            if speaker in voices:
+                continue
+            if library and len(library) and centroids and speaker in centroids:
+                voice, _ = library.nearest(centroids[speaker], language=target_lang, exclude=taken)
+                voices[speaker] = voice["id"]
+            elif n == 0 and voice_type != "auto":
+                voices[speaker] = voice_type
+            else:
+                voices[speaker] = fallback[n % len(fallback)]
+            taken.add(voices[speaker])
+        
+        if progress_callback:
+            progress_callback(69, "🗣️ Voices: " + ", ".join(f"{s} → {voices[s]}" for s in speakers))
+        return voices
     
-    def merge_audio_video(self, video_path, audio_path, progress_callback=None):
-        """Merge new audio with video using FFmpeg"""
+    def merge_audio_video(self, video_path, audio_path, progress_callback=None,
+                          start_time=None, end_time=None, media=None, subtitles=None):
+        """
+        Merge new audio with video using FFmpeg
+        
+        With start_time/end_time only that window of the video is kept. The
+        video stream is copied when the window starts on a keyframe (from the
+        file's full keyframe index) and re-encoded otherwise, so the cut is exact.
+        
+        audio_path may be a TimelineAssembler, whose PCM is streamed to
+        ffmpeg's stdin. SRT text in `subtitles` is burned in during the same
+        pass (read through a pipe), so no intermediate video is written.
+        """
         if progress_callback:
             progress_callback(85, "Merging audio with video...")
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_path = OUTPUT_DIR / f"dubbed_{timestamp}.mp4"
+        prefix = "dubbed_subtitled" if subtitles else "dubbed"
+        output_path = OUTPUT_DIR / f"{prefix}_{unique_stamp()}.mp4"
         
-        cmd = [
-            'ffmpeg',
-            '-i', str(video_path),
-            '-i', str(audio_path),
-            '-c:v', 'copy',  # Copy video stream
-            '-c:a', 'aac',  # AAC audio codec
-            '-b:a', '192k',  # Audio bitrate
-            '-map', '0:v:0',  # Video from first input
-            '-map', '1:a:0',  # Audio from second input
-            '-shortest',  # Match shortest stream
-            '-y',  # Overwrite
-            str(output_path)
-        ]
+        audio_input = ['-i', str(audio_path)]
+        if isinstance(audio_path, TimelineAssembler):
+            audio_input = pcm_input_args(audio_path.sample_rate)
+        
+        window = []
+        video_codec = ['-c:v', 'copy']  # Copy video stream
+        if start_time:
+            window += ['-ss', f"{start_time:.3f}"]
+            # The probe only scans the opening seconds; clips can start anywhere
+            keyframes = keyframe_index(video_path, run=self.tracer.run)
+            if not any(abs(k - start_time) < 0.001 for k in keyframes):
+                video_codec = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18']
+        if end_time is not None:
+            window += ['-t', f"{end_time - (start_time or 0):.3f}"]
         
-        subprocess.run(cmd, capture_output=True, check=True)
+        with ExitStack() as stack:
+            pcm = None
+            if isinstance(audio_path, TimelineAssembler):
+                # Streamed in blocks while ffmpeg is already reading
+                pcm = stack.enter_context(pcm_pipe(audio_path.int16_blocks()))
+            if subtitles:
+                srt_path = stack.enter_context(text_pipe(subtitles, ".srt", TEMP_DIR))
+                video_codec = ['-vf', self.subtitle_gen.subtitles_filter(srt_path),
+                               '-c:v', 'libx264', '-preset', 'fast']
+            
+            cmd = [
+                'ffmpeg',
+                *window,
+                '-i', str(video_path),
+                *audio_input,
+                *video_codec,
+                '-c:a', 'aac',  # AAC audio codec
+                '-b:a', '192k',  # Audio bitrate
+                '-map', '0:v:0',  # Video from first input
+                '-map', '1:a:0',  # Audio from second input
+                # No -shortest: the dub track is laid out on the video's own timeline
+                '-y',  # Overwrite
+                str(output_path)
+            ]
+            
+            stage = "merge_burn_subtitles" if subtitles else "merge_audio_video"
+            with self._stage(stage, items=1):
+                self.tracer.run(cmd, stdin=pcm, capture_output=True, check=True)
         
         if progress_callback:
             progress_callback(95, f"✓ Video merged: {output_path.name}")
@@ -424,13 +1169,17 @@ class VideoProcessor:
         return str(output_path)
     
     def process_video(self, video_path, voice_type, reference_audio, source_lang, target_lang,
-                     dialect, whisper_model, add_subtitles=True, progress_callback=None):
+                     dialect, whisper_model, add_subtitles=True, progress_callback=None,
+                     trace=None, cancel_event=None, output_path=None, use_cache=True,
+                     start_time=None, end_time=None, package=None, diarize=None,
+                     speaker_voices=None, num_speakers=None):
         """
         Complete video dubbing pipeline with subtitle support
         
         Args:
             video_path: Path to input video
-            voice_type: "male", "female", or "custom"
+            voice_type: "male", "female", "custom", "auto" (closest library voice to
+                        the original speaker) or a voice library id
             reference_audio: Path to custom voice (if voice_type == "custom")
             source_lang: Source language code
             target_lang: Target language code
@@ -438,110 +1187,533 @@ class VideoProcessor:
             whisper_model: Whisper model size
             add_subtitles: Whether to add burned-in subtitles
             progress_callback: Function to report progress
+            trace: Write a Chrome trace of this job (defaults to TRACE_JOBS)
+            cancel_event: threading.Event; when set the job stops with JobCancelled
+            output_path: Also place the result here (hard link, or copy across filesystems)
+            use_cache: Return a finished output for an identical earlier job
+            start_time: Only dub from this many seconds into the video
+            end_time: Only dub up to this many seconds into the video
+            package: Streaming formats ("hls", "dash") to write next to the MP4
+                     (defaults to PACKAGING_FORMATS_DEFAULT)
+            diarize: Dub each speaker with their own voice (defaults to DIARIZATION_ENABLED)
+            speaker_voices: {"S1": voice type, ...} overrides for diarized speakers
+            num_speakers: Known number of speakers (otherwise found by clustering)
         
         Returns:
             Path to dubbed video
         """
+        job_start = time.time()
+        package = list(PACKAGING_FORMATS_DEFAULT if package is None else package)
+        diarize = DIARIZATION_ENABLED if diarize is None else diarize
+        self.cancel_event = cancel_event
+        temp_files = []
+        
+        # Claim every model this job needs; each claim is dropped when its stage ends
+        sequential = self.models.sequential
+        held = {"whisper", "nllb", "tts"}
+        for model in held:
+            self.models.acquire(model)
+        
+        # Opt-in per-job timeline trace
+        if trace if trace is not None else TRACE_JOBS:
+            self._set_tracer(Tracer(f"Nataq job: {Path(video_path).name}"))
+        job_span = ExitStack()
+        job_span.enter_context(self.tracer.span(
+            "job", "job", video=str(video_path), voice_type=voice_type,
+            source_lang=source_lang, target_lang=target_lang, dialect=dialect,
+            whisper_model=whisper_model, add_subtitles=add_subtitles,
+            start_time=start_time, end_time=end_time
+        ))
+        
         try:
+            # Reject unusable input before spending time on model loads
+            media = self.validate_input(video_path, progress_callback)
+            start_time, end_time = clip_window(media.duration, start_time, end_time)
+            if progress_callback and (start_time or end_time is not None):
+                progress_callback(3, f"✂️ Processing clip {start_time or 0:.1f}s → "
+                                     f"{end_time if end_time is not None else media.duration:.1f}s")
+            
+            # Identical earlier job: hand back its output without running anything
+            fingerprint = None
+            if self.job_cache:
+                with self._stage("job_fingerprint", items=1) as event:
+                    voice = {}
+                    if voice_type == "auto":
+                        # The pick depends on the video and on which library is installed
+                        library = VoiceLibrary.open()
+                        voice = {"voice": f"auto:{library.manifest['pack'] if library else None}"}
+                    if diarize:
+                        voice.update(diarize=True, speaker_voices=speaker_voices,
+                                     num_speakers=num_speakers)
+                    precision = precision_tags(self.device, self.models.requested_precision)
+                    if precision:
+                        # Reduced-precision outputs differ slightly from the fp32 ones
+                        voice["precision"] = precision
+                    fingerprint = job_fingerprint(
+                        video_path, self.resolve_speaker_wav(voice_type, reference_audio),
+                        source_lang, target_lang, dialect, whisper_model, add_subtitles,
+                        start_time=start_time, end_time=end_time, **voice
+                    )
+                    cached = self.job_cache.lookup(fingerprint) if use_cache else None
+                    if cached and package and not all(
+                            os.path.exists(m) for m in
+                            StreamPackager.manifests(package_dir(cached), package).values()):
+                        # The MP4 is cached but its streaming package is not
+                        cached = None
+                    event.cache = "hit" if cached else "miss"
+                
+                if cached:
+                    result = self.job_cache.materialize(cached, output_path) if output_path else cached
+                    if progress_callback:
+                        progress_callback(100, f"✅ Reusing finished output: {os.path.basename(cached)}")
+                    self.metrics.record(StageEvent("processor", "job", job_start, time.time(),
+                                                   items=1, peak_rss_bytes=get_peak_rss(), cache="hit"))
+                    self.export_metrics()
+                    return result
+            
             # Load models
             self.load_whisper(whisper_model, progress_callback)
-            self.load_nllb(progress_callback)
-            self.load_tts(progress_callback)
+            if sequential:
+                # Only one stage's model at a time; the next loads in the background
+                self.preload("nllb")
+            else:
+                self.load_nllb(progress_callback)
+                self.load_tts(progress_callback)
             
-            # Extract audio
-            audio_path = self.extract_audio(video_path, progress_callback)
+            # Extract audio (through a pipe into memory, or to a temp WAV)
+            self._check_cancelled()
+            if PIPE_HANDOFF:
+                audio_path = self.extract_audio_samples(video_path, progress_callback,
+                                                        start_time, end_time)
+            else:
+                audio_path = self.extract_audio(video_path, progress_callback, start_time, end_time)
+                temp_files.append(audio_path)
             
             # Transcribe
+            self._check_cancelled()
             transcription, segments = self.transcribe_audio(
-                audio_path, source_lang, progress_callback
+                audio_path, source_lang, progress_callback, model_name=whisper_model
             )
+            speech = None
+            if voice_type == "auto" or (diarize and segments):
+                # The original speakers, kept for picking voices once TTS is loaded
+                speech = read_wav(audio_path)[0] if isinstance(audio_path, str) \
+                    else audio_path.astype("float32") / 32768.0
+                if not diarize:
+                    excerpt = speaker_excerpt(speech, segments)
+                    speech = None
+            audio_path = None  # In-memory samples are not needed past transcription
+            self._check_cancelled()
             
             if progress_callback:
                 progress_callback(57, f"Original text: {transcription[:100]}...")
             
-            # Translate with dialect support
-            translation = self.translate_text(
-                transcription, source_lang, target_lang, dialect, progress_callback
-            )
+            self._release_model("whisper", held, progress_callback, 57)
+            if sequential:
+                self.load_nllb(_at_percent(progress_callback, 58))
+                self.preload("tts")
+            
+            # Translate once, keyed by Whisper segment (dialect support included)
+            if segments:
+                translated_segments = self.translate_segments(
+                    segments, source_lang, target_lang, dialect, progress_callback
+                )
+                translation = " ".join(seg["text"] for seg in translated_segments)
+            else:
+                translated_segments = None
+                translation = self.translate_text(
+                    transcription, source_lang, target_lang, dialect, progress_callback
+                )
             
             if progress_callback:
                 progress_callback(67, f"Translated text ({dialect}): {translation[:100]}...")
             
-            # Synthesize speech (FIXED: complete synthesis)
+            self._release_model("nllb", held, progress_callback, 67)
+            
+            # Video (or clip) duration sizes the dubbing timeline and untimed subtitles;
+            # segment times are relative to the clip start
+            duration = (end_time if end_time is not None else media.duration) - (start_time or 0)
+            
+            if sequential:
+                self.load_tts(_at_percent(progress_callback, 68))
+            
+            voices = None
+            if speech is not None and translated_segments:
+                centroids = self.diarize_segments(speech, translated_segments, num_speakers,
+                                                  progress_callback)
+                speakers = list(dict.fromkeys(seg["speaker"] for seg in translated_segments))
+                voices = self.assign_speaker_voices(speakers, voice_type, target_lang,
+                                                    speaker_voices, centroids, progress_callback)
+                if voice_type == "auto":
+                    voice_type = voices[speakers[0]]
+                speech = None
+            elif voice_type == "auto":
+                excerpt = speaker_excerpt(speech, segments) if speech is not None else excerpt
+                voice_type = self.select_auto_voice(excerpt, target_lang, progress_callback)
+            
+            # Editable project: segments, translations and per-segment audio
+            project = None
+            if PROJECTS_ENABLED and translated_segments:
+                project_dir = PROJECTS_DIR / (
+                    fingerprint[:16] if fingerprint else f"{Path(video_path).stem}_{unique_stamp()}"
+                )
+                speaker_wav = self.resolve_speaker_wav(voice_type, reference_audio)
+                speakers = {}
+                for speaker, voice in (voices or {}).items():
+                    wav = self.resolve_speaker_wav(voice, reference_audio)
+                    speakers[speaker] = {"voice_type": voice, "reference_audio": wav,
+                                         "voice": file_hash(wav) if wav else "default"}
+                project = DubbingProject.create(
+                    project_dir, video_path, {
+                        "voice_type": voice_type, "reference_audio": speaker_wav,
+                        "source_lang": source_lang, "target_lang": target_lang,
+                        "dialect": dialect, "whisper_model": whisper_model,
+                        "add_subtitles": add_subtitles,
+                        "start_time": start_time, "end_time": end_time
+                    },
+                    duration, file_hash(speaker_wav) if speaker_wav else "default",
+                    sample_rate=self.tts_sample_rate(), speakers=speakers
+                )
+                project.set_segments(translated_segments)
+            
+            # Synthesize speech placed at the source segment timestamps
+            self._check_cancelled()
             dubbed_audio = self.synthesize_speech(
-                translation, voice_type, reference_audio, target_lang, dialect, progress_callback
+                translation, voice_type, reference_audio, target_lang, dialect, progress_callback,
+                segments=translated_segments, duration=duration, project=project,
+                in_memory=PIPE_HANDOFF, speaker_voices=voices
             )
+            if not PIPE_HANDOFF:
+                temp_files.append(dubbed_audio)
+            self._release_model("tts", held, progress_callback, 80)
             
-            # Merge audio and video
-            temp_output = self.merge_audio_video(
-                video_path, dubbed_audio, progress_callback
+            # Merge audio and video, then subtitles
+            result = self.finalize_video(
+                video_path, dubbed_audio, translated_segments, translation, duration,
+                add_subtitles, progress_callback, start_time, end_time, media
             )
             
-            # Add subtitles if requested
-            if add_subtitles:
-                if progress_callback:
-                    progress_callback(88, "Creating subtitles...")
-                
-                # Create SRT file
-                srt_path = TEMP_DIR / f"subtitles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.srt"
-                
-                # Get video duration for subtitle timing
-                duration = self.subtitle_gen.get_video_duration(video_path)
-                
-                # Create subtitles with Whisper segment timing if available
-                if segments:
-                    self.subtitle_gen.create_subtitles_with_timing(translation, segments, srt_path)
-                else:
-                    self.subtitle_gen.create_srt_file(translation, duration, srt_path)
-                
-                # Burn subtitles into video
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                final_output = OUTPUT_DIR / f"dubbed_subtitled_{timestamp}.mp4"
-                
-                self.subtitle_gen.burn_subtitles_into_video(
-                    temp_output, srt_path, final_output, progress_callback=progress_callback
+            # Deterministic name derived from the fingerprint (idempotent resubmits)
+            if fingerprint:
+                result = self.job_cache.publish(result, fingerprint, add_subtitles, settings={
+                    "video": os.path.basename(str(video_path)), "voice_type": voice_type,
+                    "source_lang": source_lang, "target_lang": target_lang, "dialect": dialect,
+                    "whisper_model": whisper_model, "add_subtitles": add_subtitles,
+                    "start_time": start_time, "end_time": end_time
+                })
+            
+            # Adaptive-bitrate ladder straight from the source and the dubbed track
+            if package:
+                self.package_streams(
+                    video_path, dubbed_audio, package_dir(result), package, translated_segments,
+                    translation, duration, source_lang, target_lang, progress_callback,
+                    media, start_time, end_time
                 )
-                
-                # Clean up temp video
-                if os.path.exists(temp_output):
-                    os.remove(temp_output)
-                if os.path.exists(srt_path):
-                    os.remove(srt_path)
-                
-                output_path = str(final_output)
-            else:
-                output_path = temp_output
+            if output_path:
+                result = JobCache.materialize(result, output_path)
+            
+            if project:
+                project.data["output"] = result
+                project.save()
+                if progress_callback:
+                    progress_callback(97, f"Project saved: {project.path}")
             
             # Cleanup temporary files
             if progress_callback:
                 progress_callback(98, "Cleaning up temporary files...")
             
-            for temp_file in [audio_path, dubbed_audio]:
+            for temp_file in temp_files:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
             
             if progress_callback:
                 progress_callback(100, "✅ Processing complete!")
             
-            return output_path
+            self.metrics.record(StageEvent("processor", "job", job_start, time.time(), items=1,
+                                           peak_rss_bytes=get_peak_rss(), cache="miss"))
+            self.export_metrics()
+            
+            return result
+            
+        except JobCancelled:
+            for temp_file in temp_files:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            self.metrics.record(StageEvent("processor", "job", job_start, time.time(),
+                                           peak_rss_bytes=get_peak_rss(), success=False))
+            if progress_callback:
+                progress_callback(0, "⏹ Job cancelled")
+            raise
             
         except Exception as e:
+            self.metrics.record(StageEvent("processor", "job", job_start, time.time(),
+                                           peak_rss_bytes=get_peak_rss(), success=False))
+            self.export_metrics()
             if progress_callback:
                 progress_callback(0, f"❌ Error: {str(e)}")
             raise e
+        
+        finally:
+            for model in list(held):
+                self._release_model(model, held)
+            self.cancel_event = None
+            job_span.close()
+            self.write_trace(progress_callback)
     
-    def get_video_info(self, video_path):
-        """Get video metadata using FFprobe"""
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            str(video_path)
-        ]
+    def finalize_video(self, video_path, dubbed_audio, segments, translation, duration,
+                       add_subtitles, progress_callback=None, start_time=None, end_time=None,
+                       media=None):
+        """
+        Mux the dubbed track into the video and burn subtitles if requested
+        
+        A TimelineAssembler track is streamed into one ffmpeg pass that also
+        burns the subtitles (read through a pipe). Long subtitled videos that
+        split-encode hand the track over as a WAV instead, since the parallel
+        pieces each read the files.
+        """
+        self._check_cancelled()
+        if isinstance(dubbed_audio, TimelineAssembler):
+            if not (add_subtitles and SPLIT_ENCODE and duration >= SPLIT_ENCODE_MIN_SECONDS):
+                subtitles = None
+                if add_subtitles:
+                    if progress_callback:
+                        progress_callback(88, "Creating subtitles...")
+                    subtitles = self.srt_text(segments, translation, duration)
+                return self.merge_audio_video(video_path, dubbed_audio, progress_callback,
+                                              start_time, end_time, media, subtitles=subtitles)
+            
+            track_path = dubbed_audio.write_wav(TEMP_DIR / f"synthesized_{unique_stamp()}.wav")
+            try:
+                return self.finalize_video(video_path, track_path, segments, translation,
+                                           duration, add_subtitles, progress_callback,
+                                           start_time, end_time, media)
+            finally:
+                if os.path.exists(track_path):
+                    os.remove(track_path)
+        
+        temp_output = self.merge_audio_video(
+            video_path, dubbed_audio, progress_callback, start_time, end_time, media
+        )
+        if not add_subtitles:
+            return temp_output
+        
+        srt_path = TEMP_DIR / f"subtitles_{unique_stamp()}.srt"
+        try:
+            self._check_cancelled()
+            if progress_callback:
+                progress_callback(88, "Creating subtitles...")
+            
+            # Create subtitles from the segment-aligned translation if available
+            if segments:
+                self.subtitle_gen.create_srt_from_translated_segments(segments, srt_path)
+            else:
+                self.subtitle_gen.create_srt_file(translation, duration, srt_path)
+            
+            # Burn subtitles into video
+            final_output = OUTPUT_DIR / f"dubbed_subtitled_{unique_stamp()}.mp4"
+            
+            self.subtitle_gen.burn_subtitles_into_video(
+                temp_output, srt_path, final_output, progress_callback=progress_callback
+            )
+        finally:
+            # Clean up temp video
+            for temp_file in [temp_output, srt_path]:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+        
+        return str(final_output)
+    
+    def srt_text(self, segments, translation, duration):
+        """SRT content for a job: segment-aligned when there are segments, else spread over duration"""
+        with self._stage("create_srt", items=len(segments or ())):
+            if segments:
+                return self.subtitle_gen.build_srt_from_translated_segments(segments)
+            return self.subtitle_gen.build_srt(translation, duration)
+    
+    def package_streams(self, video_path, dubbed_audio, output_dir, formats, segments,
+                        translation, duration, source_lang, target_lang, progress_callback=None,
+                        media=None, start_time=None, end_time=None):
+        """Write an HLS/DASH ladder of the dubbed video with WebVTT subtitles"""
+        self._check_cancelled()
+        if progress_callback:
+            progress_callback(96, f"Packaging {' + '.join(f.upper() for f in formats)} ladder...")
+        
+        subtitles = self.srt_text(segments, translation, duration)
+        with self._stage("package", items=len(formats)):
+            manifests = StreamPackager(run=self.tracer.run).package(
+                video_path, dubbed_audio, output_dir, formats, media=media,
+                subtitles=subtitles, target_lang=target_lang, source_lang=source_lang,
+                start_time=start_time, end_time=end_time
+            )
+        
+        if progress_callback:
+            progress_callback(97, f"✓ Streaming package: {', '.join(manifests.values())}")
+        return manifests
+    
+    def rerender_project(self, project_path, progress_callback=None, cancel_event=None,
+                         output_path=None):
+        """
+        Re-render an edited project, redoing only what the edits invalidate
+        
+        Segments whose source changed are re-translated, segments whose text
+        changed are re-synthesized, and only their stretch of the dubbing
+        track is rebuilt before the final mux.
+        
+        Args:
+            project_path: Project directory or its project.json
+            progress_callback: Function to report progress
+            cancel_event: threading.Event; when set the job stops with JobCancelled
+            output_path: Also place the result here (hard link, or copy across filesystems)
+        
+        Returns:
+            Path to dubbed video
+        """
+        job_start = time.time()
+        self.cancel_event = cancel_event
+        project = DubbingProject.load(project_path)
+        settings = project.settings
+        held = set()
+        dubbed_audio = None
+        
+        try:
+            media = self.validate_input(project.video_path, progress_callback)
+            
+            # Source edits: translate just those segments
+            pending = project.needs_translation()
+            if pending:
+                held.add("nllb")
+                self.models.acquire("nllb")
+                self.load_nllb(progress_callback)
+                translations = self.translate_texts(
+                    [seg["source"] for seg in pending], settings["source_lang"],
+                    settings["target_lang"], settings["dialect"], progress_callback
+                )
+                for seg, translation in zip(pending, translations):
+                    project.set_translation(seg, translation.strip())
+                self._release_model("nllb", held, progress_callback, 67)
+            
+            # Text edits (including fresh translations): synthesize just those segments;
+            # lines cleared by the reviewer only lose their audio
+            pending = project.needs_audio()
+            for seg in pending:
+                if not project.speakable(seg):
+                    project.drop_audio(seg)
+            to_voice = [seg for seg in pending if project.speakable(seg)]
+            if to_voice:
+                held.add("tts")
+                self.models.acquire("tts")
+                self.load_tts(progress_callback)
+                if progress_callback:
+                    progress_callback(70, f"Re-synthesizing {len(to_voice)}/{len(project.segments)} segments...")
+                speaker_wav = settings.get("reference_audio")
+                synthesized, failed = self._synthesize_speakers(
+                    [(i, seg["text"].strip()) for i, seg in enumerate(to_voice)],
+                    {i: seg.get("speaker") for i, seg in enumerate(to_voice)},
+                    project.speaker_references(), speaker_wav,
+                    xtts_language(settings["target_lang"]), project.sample_rate, progress_callback
+                )
+                for i, seg in enumerate(to_voice):
+                    if i in synthesized:
+                        project.store_audio(seg, synthesized[i])
+                    else:
+                        project.drop_audio(seg)
+                if failed and progress_callback:
+                    progress_callback(78, f"⚠️ {failed}/{len(to_voice)} segments failed")
+                self._release_model("tts", held, progress_callback, 80)
+            
+            # Rebuild only the touched part of the track
+            self._check_cancelled()
+            with self._stage("assemble_timeline") as event:
+                timeline, placed = project.rebuild_track(pending)
+                event.items = placed
+                if PIPE_HANDOFF:
+                    dubbed_audio = timeline
+                else:
+                    dubbed_audio = TEMP_DIR / f"synthesized_{unique_stamp()}.wav"
+                    timeline.write_wav(dubbed_audio)
+            if progress_callback:
+                progress_callback(82, f"✓ Re-placed {placed} segments on the dubbing track")
+            
+            result = self.finalize_video(
+                project.video_path, dubbed_audio, project.segments,
+                " ".join(seg["text"] for seg in project.segments), project.duration,
+                settings["add_subtitles"], progress_callback,
+                settings.get("start_time"), settings.get("end_time"), media
+            )
+            if output_path:
+                result = JobCache.materialize(result, output_path)
+            
+            project.data["output"] = result
+            project.save()
+            
+            if progress_callback:
+                progress_callback(100, "✅ Re-render complete!")
+            self.metrics.record(StageEvent("processor", "rerender", job_start, time.time(),
+                                           items=len(pending), peak_rss_bytes=get_peak_rss()))
+            self.export_metrics()
+            return result
+            
+        except Exception as e:
+            self.metrics.record(StageEvent("processor", "rerender", job_start, time.time(),
+                                           peak_rss_bytes=get_peak_rss(), success=False))
+            if progress_callback and not isinstance(e, JobCancelled):
+                progress_callback(0, f"❌ Error: {str(e)}")
+            raise
+        
+        finally:
+            # Keep whatever was re-done so far, even if a later stage failed
+            project.save()
+            if isinstance(dubbed_audio, Path) and os.path.exists(dubbed_audio):
+                os.remove(dubbed_audio)
+            for model in list(held):
+                self._release_model(model, held)
+            self.cancel_event = None
+    
+    def write_trace(self, progress_callback=None):
+        """Write the current job's trace to TRACES_DIR and detach the tracer"""
+        if not self.tracer.enabled:
+            return None
+        
+        trace_path = TRACES_DIR / f"trace_{unique_stamp()}.json"
+        try:
+            self.tracer.write(trace_path)
+            if progress_callback:
+                progress_callback(100, f"Trace written: {trace_path.name} (open in ui.perfetto.dev)")
+        except OSError:
+            trace_path = None
+        finally:
+            self._set_tracer(NULL_TRACER)
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        info = json.loads(result.stdout)
+        return str(trace_path) if trace_path else None
+    
+    def export_metrics(self):
+        """Write aggregated metrics to METRICS_FILE if configured"""
+        if METRICS_FILE:
+            try:
+                self.metrics.write_file(METRICS_FILE)
+            except OSError:
+                pass
+    
+    def validate_input(self, video_path, progress_callback=None):
+        """Probe and validate the input video (format, size, streams)"""
+        with self._stage("probe_media", items=1):
+            media = validate_media(video_path, run=self.tracer.run)
         
-        return info
+        if progress_callback:
+            video = media.video_stream
+            audio = media.audio_stream
+            progress_callback(
+                2,
+                f"✓ Input: {media.duration:.1f}s, {media.size_mb:.1f} MB, "
+                f"{video.codec_name} {video.width}x{video.height}, "
+                f"{audio.codec_name} {audio.sample_rate} Hz"
+            )
+        return media
+    
+    def get_video_info(self, video_path):
+        """Get video metadata: the ffprobe JSON (format and streams) from the cached media probe"""
+        return copy.deepcopy(self.get_media_info(video_path).raw)
+    
+    def get_media_info(self, video_path):
+        """Typed video metadata (MediaInfo) from the cached media probe"""
+        return probe_media(video_path, run=self.tracer.run)
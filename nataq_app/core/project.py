@@ -0,0 +1,294 @@
+"""
+Dubbing Project Module
+Saves a job's segments, translations, per-segment audio and timing as an editable project
+Re-rendering redoes only what an edit invalidates and rebuilds only the touched audio
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from core.timeline import TimelineAssembler, slot_ends, read_wav, write_wav, TTS_SAMPLE_RATE
+
+PROJECT_FILE = "project.json"
+PROJECT_VERSION = 1
+
+# Float copy of the assembled dubbing track (WAV is int16 and peak-normalised)
+TRACK_FILE = "track.npy"
+
+# Shorter texts are not synthesized; clearing a line's text deletes its audio
+MIN_SPEAKABLE_CHARS = 3
+
+
+def content_hash(*parts):
+    """Short stable digest of the given values"""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class DubbingProject:
+    """
+    Editable record of a dubbing job
+
+    Each segment keeps what its outputs were made from, so edits propagate
+    along source → translation → audio → placement:
+      - "translated_from": hash of the source text that was translated
+      - "audio_of": hash of the text (and voice) the segment audio speaks
+      - "slot": [start, slot end] the audio was placed with
+      - "placed": [first, last) sample range it occupies on the track
+    Diarized jobs also label each segment with a "speaker", whose voice is
+    listed under "speakers".
+    Reviewers edit "source", "text", "start" or "end" in project.json;
+    clearing a segment's text removes its audio from the track.
+    """
+
+    def __init__(self, project_dir, data):
+        self.project_dir = Path(project_dir)
+        self.data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, project_dir, video_path, settings, duration, voice_id,
+               sample_rate=TTS_SAMPLE_RATE, speakers=None):
+        """
+        New project for a job (segments are added with set_segments)
+
+        `speakers` maps a speaker label to {"voice_type", "reference_audio", "voice"}
+        (voice being the voice id, like voice_id) for multi-speaker dubs.
+        """
+        project_dir = Path(project_dir)
+        (project_dir / "segments").mkdir(parents=True, exist_ok=True)
+        return cls(project_dir, {
+            "version": PROJECT_VERSION,
+            "video": os.path.abspath(str(video_path)),
+            "settings": dict(settings),
+            "duration": duration,
+            "sample_rate": sample_rate,
+            "voice": voice_id,
+            "speakers": dict(speakers or {}),
+            "segments": [],
+            "output": None,
+        })
+
+    @classmethod
+    def load(cls, path):
+        """Open a project from its directory or its project.json"""
+        path = Path(path)
+        project_dir = path.parent if path.suffix == ".json" else path
+        with open(project_dir / PROJECT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != PROJECT_VERSION:
+            raise ValueError(f"Unsupported project version: {data.get('version')}")
+        return cls(project_dir, data)
+
+    @property
+    def path(self):
+        return self.project_dir / PROJECT_FILE
+
+    @property
+    def video_path(self):
+        return self.data["video"]
+
+    @property
+    def settings(self):
+        return self.data["settings"]
+
+    @property
+    def segments(self):
+        return self.data["segments"]
+
+    @property
+    def duration(self):
+        return self.data["duration"]
+
+    @property
+    def sample_rate(self):
+        return self.data["sample_rate"]
+
+    def set_segments(self, translated_segments):
+        """Record translated segments ({"id", "start", "end", "source", "text"})"""
+        self.data["segments"] = [
+            {
+                "id": seg["id"],
+                "start": float(seg["start"]),
+                "end": float(seg["end"]),
+                "source": seg["source"],
+                "text": seg["text"],
+                "speaker": seg.get("speaker"),
+                "translated_from": content_hash(seg["source"]),
+                "audio": None,
+                "audio_of": None,
+                "slot": None,
+                "placed": None,
+            }
+            for seg in translated_segments
+        ]
+
+    def audio_key(self, segment):
+        """What a segment's audio depends on: its text, the voice and the language"""
+        speaker = self.data.get("speakers", {}).get(segment.get("speaker"), {})
+        return content_hash(segment["text"].strip(), speaker.get("voice", self.data["voice"]),
+                            self.settings.get("target_lang"))
+    
+    def speaker_references(self):
+        """{speaker: reference audio} for multi-speaker projects"""
+        return {speaker: info.get("reference_audio")
+                for speaker, info in self.data.get("speakers", {}).items()}
+
+    def needs_translation(self):
+        """Segments whose source text changed since it was translated"""
+        return [seg for seg in self.segments
+                if seg["translated_from"] != content_hash(seg["source"])]
+
+    def set_translation(self, segment, text):
+        segment["text"] = text
+        segment["translated_from"] = content_hash(segment["source"])
+
+    def speakable(self, segment):
+        """Whether a segment's text is long enough to synthesize"""
+        return len(segment["text"].strip()) >= MIN_SPEAKABLE_CHARS
+
+    def needs_audio(self):
+        """
+        Segments with no audio, or audio of a different text
+
+        Segments whose text was cleared are included while they still have
+        audio: it has to be dropped (see drop_audio) rather than synthesized.
+        """
+        pending = []
+        for seg in self.segments:
+            if not self.speakable(seg):
+                if seg.get("audio"):
+                    pending.append(seg)
+                continue
+            audio = seg.get("audio")
+            if not audio or not (self.project_dir / audio).exists() or \
+                    seg["audio_of"] != self.audio_key(seg):
+                pending.append(seg)
+        return pending
+
+    def store_audio(self, segment, wav):
+        """Save a segment's synthesized audio and what it was made from"""
+        name = f"segments/seg_{segment['id']}.wav"
+        write_wav(self.project_dir / name, np.asarray(wav, dtype=np.float32), self.sample_rate)
+        segment["audio"] = name
+        segment["audio_of"] = self.audio_key(segment)
+
+    def drop_audio(self, segment):
+        """Forget a segment's audio (e.g. its text no longer synthesizes)"""
+        segment["audio"] = None
+        segment["audio_of"] = None
+
+    def load_audio(self, segment):
+        if not segment.get("audio"):
+            return None
+        try:
+            samples, _ = read_wav(self.project_dir / segment["audio"])
+        except (OSError, EOFError):
+            return None
+        return samples
+
+    def rebuild_track(self, changed=()):
+        """
+        Bring the stored dubbing track up to date and return its TimelineAssembler
+
+        Segments in `changed` (new audio) and segments whose slot moved are
+        re-placed. Only their old and new ranges are silenced, widened to any
+        neighbour whose audio overlaps them, and that neighbour is re-placed
+        from its stored audio; the rest of the track is untouched. Segments
+        whose text was cleared lose their audio, so their range is silenced.
+        Returns (timeline, number of segments placed).
+        """
+        for seg in self.segments:
+            if seg.get("audio") and not self.speakable(seg):
+                self.drop_audio(seg)
+
+        timeline = TimelineAssembler(self.duration, sample_rate=self.sample_rate)
+        track = self._load_track()
+        rebuild_all = track is None
+        if not rebuild_all:
+            timeline._ensure_length(track.size)
+            timeline.buffer[:track.size] = track
+
+        changed = {seg["id"] for seg in changed}
+        voiced = sorted((seg for seg in self.segments if seg.get("audio")),
+                        key=lambda seg: seg["start"])
+        slots = {
+            seg["id"]: [round(seg["start"], 3), round(slot_end, 3)]
+            for seg, slot_end in zip(voiced, slot_ends(
+                [(seg["start"], seg["end"]) for seg in voiced], timeline.duration))
+        }
+
+        # Segments whose audio must be (re)placed, and the sample ranges to silence
+        dirty = set()
+        ranges = []
+        for seg in self.segments:
+            slot = slots.get(seg["id"])
+            if rebuild_all or seg["id"] in changed or seg.get("slot") != slot:
+                if seg.get("placed"):
+                    ranges.append(tuple(seg["placed"]))
+                if slot:
+                    dirty.add(seg["id"])
+                    ranges.append(self._sample_range(slot))
+
+        # Widen to neighbours overlapping a cleared range until nothing new is pulled in
+        placed = {seg["id"]: tuple(seg["placed"]) for seg in voiced if seg.get("placed")}
+        grown = True
+        while grown and not rebuild_all:
+            grown = False
+            for seg_id, (a, b) in placed.items():
+                if seg_id not in dirty and any(a < end and start < b for start, end in ranges):
+                    dirty.add(seg_id)
+                    ranges.append((a, b))
+                    grown = True
+
+        if rebuild_all:
+            timeline.buffer[:] = 0
+        else:
+            for start, end in ranges:
+                timeline.clear(start / self.sample_rate, end / self.sample_rate)
+
+        for seg in self.segments:
+            if seg["id"] not in slots:
+                seg["slot"] = seg["placed"] = None
+
+        count = 0
+        for seg in voiced:
+            if seg["id"] not in dirty:
+                continue
+            wav = self.load_audio(seg)
+            slot = slots[seg["id"]]
+            result = timeline.place(seg["start"], wav, slot[1]) if wav is not None else None
+            seg["slot"] = slot
+            seg["placed"] = list(result) if result else None
+            count += 1
+
+        self._save_track(timeline.buffer)
+        return timeline, count
+
+    def _sample_range(self, slot):
+        return (int(round(slot[0] * self.sample_rate)), int(round(slot[1] * self.sample_rate)))
+
+    def _load_track(self):
+        try:
+            return np.load(self.project_dir / TRACK_FILE)
+        except (OSError, ValueError):
+            return None
+
+    def _save_track(self, buffer):
+        tmp_path = self.project_dir / f"{TRACK_FILE}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, buffer)
+        os.replace(tmp_path, self.project_dir / TRACK_FILE)
+
+    def save(self):
+        """Write project.json atomically"""
+        with self._lock:
+            self.project_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.project_dir / f"{PROJECT_FILE}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        return str(self.path)
@@ -0,0 +1,184 @@
+"""
+Text Segmentation Module
+One language-aware sentence segmenter shared by translation, TTS and subtitles
+A packer merges neighbouring units up to a model budget (NLLB tokens, XTTS characters)
+"""
+
+import re
+from utils.config import NLLB_TOKEN_BUDGET
+
+# XTTS v2 per-language text limit (characters); longer inputs are truncated by the model
+XTTS_CHAR_LIMITS = {
+    "en": 250, "de": 253, "fr": 273, "es": 239, "it": 213, "pt": 203, "pl": 224,
+    "zh-cn": 82, "ar": 166, "cs": 186, "ru": 182, "nl": 251, "tr": 226, "ja": 71,
+    "hu": 224, "ko": 95,
+}
+DEFAULT_CHAR_LIMIT = 166
+
+# Scripts written without spaces between words
+NO_SPACE_LANGUAGES = ("ja", "zh", "zh-cn")
+
+# Languages written in Arabic script
+ARABIC_SCRIPT_LANGUAGES = ("ar", "fa", "ur", "ps")
+
+# Sentence ends: Latin and Arabic-script terminals (؟ Arabic question mark, ۔ Urdu full stop)
+# need following whitespace; CJK terminals do not. Closing quotes/brackets stay with the sentence.
+_CLOSERS = r"[\"'»”’)\]]*"
+_LATIN_END = rf"[.!?…]+{_CLOSERS}(?=\s)"
+_ARABIC_END = rf"[.!?؟۔…]+{_CLOSERS}(?=\s)"
+_CJK_END = rf"[。！？]+{_CLOSERS}"
+_LINE_END = r"\n\s*"
+
+SENTENCE_END = re.compile(rf"(?:{_ARABIC_END}|{_CJK_END}|{_LINE_END})")  # any script
+SENTENCE_ENDS = {
+    "latin": re.compile(rf"(?:{_LATIN_END}|{_LINE_END})"),
+    "arabic": re.compile(rf"(?:{_ARABIC_END}|{_LINE_END})"),
+    "cjk": re.compile(rf"(?:{_CJK_END}|{_LATIN_END}|{_LINE_END})"),
+}
+
+# Clause breaks for sentences over budget (، Arabic comma, ؛ Arabic semicolon)
+CLAUSE_END = re.compile(r"(?<=[,،;؛:])\s+|(?<=[、，；：])")
+
+# Dots that do not end a sentence: initials ("U.S.") and common abbreviations per language.
+# Latin-script languages without their own set use the English one; Arabic and CJK have none.
+_INITIALS = re.compile(r"(?:\b\w\.)+$")
+ABBREVIATIONS = {
+    "en": {"mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "e.g", "i.e", "fig", "approx",
+           "dept", "jr", "sr", "inc", "ltd", "co"},
+    "fr": {"m", "mme", "mlle", "dr", "pr", "st", "etc", "cf", "env", "p.ex", "fig"},
+    "de": {"dr", "prof", "hr", "fr", "bzw", "usw", "z.b", "d.h", "ca", "vgl", "evtl", "abb"},
+    "es": {"sr", "sra", "srta", "dr", "dra", "ud", "uds", "etc", "p.ej", "aprox", "fig"},
+}
+# Abbreviations only when a number follows ("No. 5"); "No." alone ends a sentence
+NUMBER_ABBREVIATIONS = {"no", "nos", "nr", "vol", "pp"}
+
+
+def xtts_char_limit(language):
+    """Characters XTTS speaks reliably in one call for a language"""
+    return XTTS_CHAR_LIMITS.get(language, XTTS_CHAR_LIMITS.get((language or "").split("-")[0],
+                                                               DEFAULT_CHAR_LIMIT))
+
+
+def _script(language):
+    base = (language or "").lower().split("-")[0]
+    if base in ARABIC_SCRIPT_LANGUAGES:
+        return "arabic"
+    if base in ("ja", "zh"):
+        return "cjk"
+    return "latin"
+
+
+def joiner_for(language):
+    """What goes between packed units: nothing for CJK, a space otherwise"""
+    return "" if language in NO_SPACE_LANGUAGES else " "
+
+
+def split_sentences(text, language=None):
+    """
+    Sentences of `text`, terminal punctuation kept, whitespace trimmed
+
+    `language` picks the sentence terminals and abbreviations (see
+    SENTENCE_ENDS and ABBREVIATIONS); without one every script's terminals
+    count and English abbreviations apply.
+    """
+    ends = SENTENCE_ENDS[_script(language)] if language else SENTENCE_END
+    sentences = []
+    start = 0
+    for match in ends.finditer(text):
+        end = match.end()
+        candidate = text[start:end].strip()
+        if match.group().startswith(".") and _is_abbreviation(candidate, text[end:], language):
+            continue
+        if candidate:
+            sentences.append(candidate)
+        start = end
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _is_abbreviation(candidate, following, language):
+    # "Dr." / "e.g." / "U.S." / "No. 5" end with a dot but not a sentence
+    words = candidate.rstrip(".\"'»”’)]").split()
+    if not words:
+        return False
+    last = words[-1].lower()
+    if last in NUMBER_ABBREVIATIONS:
+        return following.lstrip()[:1].isdigit()
+    if _script(language) != "latin":
+        return False
+    known = ABBREVIATIONS.get((language or "en").lower().split("-")[0], ABBREVIATIONS["en"])
+    return last in known or bool(_INITIALS.search(words[-1] + "."))
+
+
+def split_clauses(sentence):
+    """Clauses of a sentence, split after commas, semicolons and colons"""
+    return [part.strip() for part in CLAUSE_END.split(sentence) if part.strip()]
+
+
+def pack(units, budget, size=len, joiner=" ", joiner_size=None):
+    """
+    Merge neighbouring units into as few pieces as fit `budget`
+
+    `size` measures a unit (characters by default, or e.g. tokens) and sizes
+    are treated as additive, with joiner_size (len(joiner) by default)
+    between units. Units over budget are split at clauses, then words, then
+    characters, so no piece exceeds it.
+    """
+    joiner_size = len(joiner) if joiner_size is None else joiner_size
+    packed = []
+    current = []
+    current_size = 0
+    for unit in units:
+        for piece in _fit(unit, budget, size, joiner, joiner_size):
+            piece_size = size(piece)
+            if current and current_size + joiner_size + piece_size > budget:
+                packed.append(joiner.join(current))
+                current, current_size = [], 0
+            current_size += piece_size + (joiner_size if current else 0)
+            current.append(piece)
+    if current:
+        packed.append(joiner.join(current))
+    return packed
+
+
+def _fit(unit, budget, size, joiner, joiner_size):
+    # A unit over budget, cut at the coarsest boundary that exists in it
+    if size(unit) <= budget:
+        return [unit]
+    for splitter in (split_clauses, str.split):
+        parts = splitter(unit)
+        if len(parts) > 1:
+            return pack(parts, budget, size, joiner, joiner_size)
+
+    # One unbroken run (a very long word, or CJK without punctuation)
+    step = max(1, int(len(unit) * budget / size(unit)))
+    while step > 1 and any(size(unit[i:i + step]) > budget for i in range(0, len(unit), step)):
+        step -= max(1, step // 10)
+    return [unit[i:i + step] for i in range(0, len(unit), step)]
+
+
+def tts_chunks(text, language):
+    """Untimed text as XTTS inputs: whole sentences packed up to the language's limit"""
+    return pack(split_sentences(text, language), xtts_char_limit(language),
+                joiner=joiner_for(language))
+
+
+def split_for_tts(text, language):
+    """One segment's text in XTTS-sized pieces (a single piece when it fits)"""
+    text = text.strip()
+    if len(text) <= xtts_char_limit(language):
+        return [text]
+    return tts_chunks(text, language)
+
+
+def translation_units(text, language, count_tokens, budget=NLLB_TOKEN_BUDGET):
+    """Untimed text as NLLB inputs: whole sentences packed up to `budget` tokens"""
+    return pack(split_sentences(text, language), budget, size=count_tokens,
+                joiner=joiner_for(language), joiner_size=0)
+
+
+def subtitle_units(text, language=None, max_chars=84):
+    """Subtitle cues: sentences packed up to max_chars (two lines by default)"""
+    return pack(split_sentences(text, language), max_chars, joiner=joiner_for(language))
@@ -4,18 +4,70 @@ Creates burned-in subtitles for deaf/hard-of-hearing accessibility
 Supports Arabic RTL text rendering
 """
 
-import subprocess
 import os
+import shutil
+import uuid
 from pathlib import Path
 from datetime import datetime
 import textwrap
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from core.metrics import pipeline_metrics
+from core.tracing import NULL_TRACER
+from core.media_probe import probe_media, keyframe_index
+from core.segmenter import split_sentences, subtitle_units
+from utils.config import (SPLIT_ENCODE, SPLIT_ENCODE_WORKERS, SPLIT_ENCODE_THREADS,
+                          SPLIT_ENCODE_MIN_SECONDS, SPLIT_ENCODE_MIN_PIECE_SECONDS)
+
+# Style used for burned-in subtitles
+SUBTITLE_FORCE_STYLE = "FontName=Arial,FontSize=20,PrimaryColour=&HFFFFFF,OutlineColour=&H000000,Bold=1,Outline=2,Shadow=2,Alignment=2,MarginV=20"
+
+
+def split_encode_workers(workers=None, threads=SPLIT_ENCODE_THREADS):
+    """Parallel encodes for this machine (each gets `threads` x264 threads)"""
+    if workers or SPLIT_ENCODE_WORKERS:
+        return max(1, workers or SPLIT_ENCODE_WORKERS)
+    return max(1, (os.cpu_count() or 1) // max(1, threads))
+
+
+def plan_ranges(keyframes, duration, pieces, min_piece=SPLIT_ENCODE_MIN_PIECE_SECONDS):
+    """
+    Cut [0, duration] into about `pieces` ranges that start on keyframes
+
+    Returns [(start, end), ...]; a single range when the video is too short
+    or has too few keyframes to split.
+    """
+    pieces = max(1, min(pieces, int(duration // max(min_piece, 1e-3))))
+    cuts = [0.0]
+    for k in range(1, pieces):
+        target = duration * k / pieces
+        candidates = [t for t in keyframes if cuts[-1] + min_piece <= t <= duration - min_piece]
+        if not candidates:
+            break
+        cut = min(candidates, key=lambda t: abs(t - target))
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    return list(zip(cuts, cuts[1:] + [duration]))
 
 class SubtitleGenerator:
     """Handles subtitle generation and burning into video"""
     
-    def __init__(self):
+    def __init__(self, metrics=None):
         self.temp_dir = Path("temp")
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Stage metrics (shared registry aggregates across jobs)
+        self.metrics = metrics or pipeline_metrics
+        
+        # Job tracer, set by VideoProcessor while a traced job runs
+        self.tracer = NULL_TRACER
+    
+    @contextmanager
+    def _stage(self, stage, items=0):
+        """Time a stage for metrics and, when tracing, as a trace span"""
+        with self.tracer.span(f"subtitles.{stage}", "stage"):
+            with self.metrics.stage("subtitles", stage, items=items) as event:
+                yield event
     
     def create_srt_file(self, text, duration, output_path, max_chars_per_line=50):
         """
@@ -30,11 +82,20 @@ class SubtitleGenerator:
         Returns:
             Path to created SRT file
         """
+        srt_text = self.build_srt(text, duration, max_chars_per_line)
         
-        # Split text into sentences
-        import re
-        sentences = re.split(r'[.!?؟。]\s*', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # Write SRT file
+        with self._stage("create_srt", items=srt_text.count(" --> ")):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(srt_text)
+        
+        return output_path
+    
+    def build_srt(self, text, duration, max_chars_per_line=50, language=None):
+        """SRT content for untimed text, spread evenly over `duration` seconds"""
+        
+        # Sentences, short neighbours sharing a cue of up to two lines
+        sentences = subtitle_units(text, language, max_chars=2 * max_chars_per_line)
         
         # Calculate timing for each subtitle
         time_per_sentence = duration / len(sentences) if sentences else duration
@@ -63,11 +124,7 @@ class SubtitleGenerator:
             
             current_time = end_time
         
-        # Write SRT file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(srt_content))
-        
-        return output_path
+        return '\n'.join(srt_content)
     
     def _format_timestamp(self, seconds):
         """Convert seconds to SRT timestamp format (HH:MM:SS,mmm)"""
@@ -79,24 +136,40 @@ class SubtitleGenerator:
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
     
     def burn_subtitles_into_video(self, video_path, srt_path, output_path, 
-                                   subtitle_style=None, progress_callback=None):
+                                   subtitle_style=None, progress_callback=None, split=None):
         """
         Burn subtitles permanently into video using FFmpeg
         SIMPLIFIED: Use SRT directly for better Windows compatibility
+        Long videos are split-encoded in parallel (split defaults to SPLIT_ENCODE)
         """
         
         if progress_callback:
             progress_callback(90, "Burning subtitles into video...")
         
+        # Long videos: encode keyframe-aligned pieces in parallel processes
+        if SPLIT_ENCODE if split is None else split:
+            try:
+                result = self.burn_subtitles_split(
+                    video_path, srt_path, output_path, progress_callback=progress_callback
+                )
+            except Exception as e:
+                result = None
+                if progress_callback:
+                    progress_callback(91, f"⚠️ Split encode failed, encoding in one pass: {str(e)[:60]}")
+            if result:
+                if progress_callback:
+                    progress_callback(95, "✓ Subtitles burned into video")
+                return result
+        
         # Use SRT directly with subtitles filter (works better on Windows)
         # Convert path to use forward slashes
-        srt_path_ffmpeg = str(srt_path).replace('\\', '/').replace(':', '\\:')
+        srt_path_ffmpeg = self._ffmpeg_path(srt_path)
         
         # FFmpeg command using subtitles filter with SRT
         cmd = [
             'ffmpeg',
             '-i', str(video_path),
-            '-vf', f"subtitles='{srt_path_ffmpeg}':force_style='FontName=Arial,FontSize=20,PrimaryColour=&HFFFFFF,OutlineColour=&H000000,Bold=1,Outline=2,Shadow=2,Alignment=2,MarginV=20'",
+            '-vf', self.subtitles_filter(srt_path),
             '-c:v', 'libx264',
             '-preset', 'fast',
             '-c:a', 'copy',
@@ -108,34 +181,174 @@ class SubtitleGenerator:
             progress_callback(92, "Processing video with subtitles...")
         
         # Run FFmpeg
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with self._stage("burn_subtitles", items=1):
+            result = self.tracer.run(cmd, capture_output=True, text=True)
         
-        if result.returncode != 0:
-            # If subtitles filter fails, try without force_style
-            if progress_callback:
-                progress_callback(91, "Retrying with basic subtitles...")
+            if result.returncode != 0:
+                # If subtitles filter fails, try without force_style
+                if progress_callback:
+                    progress_callback(91, "Retrying with basic subtitles...")
             
-            cmd_simple = [
-                'ffmpeg',
-                '-i', str(video_path),
-                '-vf', f"subtitles='{srt_path_ffmpeg}'",
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-c:a', 'copy',
-                '-y',
-                str(output_path)
-            ]
+                cmd_simple = [
+                    'ffmpeg',
+                    '-i', str(video_path),
+                    '-vf', f"subtitles='{srt_path_ffmpeg}'",
+                    '-c:v', 'libx264',
+                    '-preset', 'fast',
+                    '-c:a', 'copy',
+                    '-y',
+                    str(output_path)
+                ]
             
-            result = subprocess.run(cmd_simple, capture_output=True, text=True)
+                result = self.tracer.run(cmd_simple, capture_output=True, text=True)
             
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg subtitle burning failed: {result.stderr}")
+                if result.returncode != 0:
+                    raise Exception(f"FFmpeg subtitle burning failed: {result.stderr}")
         
         if progress_callback:
             progress_callback(95, "✓ Subtitles burned into video")
         
         return output_path
     
+    def burn_subtitles_split(self, video_path, srt_path, output_path, workers=None,
+                             threads=SPLIT_ENCODE_THREADS, progress_callback=None):
+        """
+        Burn subtitles by encoding keyframe-aligned pieces in parallel
+        
+        The video is cut at keyframes into time ranges; each range gets its
+        own SRT shifted to start at zero and is encoded (video only) by a
+        separate ffmpeg process. The pieces are joined with the concat demuxer
+        without re-encoding, and the original audio is copied alongside.
+        
+        Returns output_path, or None when the video is too short to split.
+        """
+        workers = split_encode_workers(workers, threads)
+        media = probe_media(video_path, run=self.tracer.run)
+        if workers < 2 or media.duration < SPLIT_ENCODE_MIN_SECONDS:
+            return None
+        
+        keyframes = keyframe_index(video_path, run=self.tracer.run)
+        # Twice as many pieces as workers keeps every worker busy to the end
+        ranges = plan_ranges(keyframes, media.duration, workers * 2)
+        if len(ranges) < 2:
+            return None
+        
+        with open(srt_path, 'r', encoding='utf-8') as f:
+            entries = self._parse_srt_seconds(f.read())
+        
+        work_dir = self.temp_dir / f"split_{uuid.uuid4().hex[:8]}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            pieces = []
+            for k, (start, end) in enumerate(ranges):
+                piece_srt = work_dir / f"piece_{k:03d}.srt"
+                self._write_shifted_srt(entries, start, end, piece_srt)
+                pieces.append((start, end, piece_srt, work_dir / f"piece_{k:03d}.mp4"))
+            
+            if progress_callback:
+                progress_callback(91, f"Encoding {len(pieces)} pieces on {workers} parallel encoders...")
+            
+            def encode(piece):
+                start, end, piece_srt, piece_out = piece
+                cmd = [
+                    'ffmpeg',
+                    '-ss', f"{start:.6f}",
+                    '-t', f"{end - start:.6f}",
+                    '-i', str(video_path),
+                    '-vf', self.subtitles_filter(piece_srt),
+                    '-map', '0:v:0',
+                    '-c:v', 'libx264',
+                    '-preset', 'fast',
+                    '-threads', str(threads),
+                    '-an',
+                    '-y',
+                    str(piece_out)
+                ]
+                result = self.tracer.run(cmd, capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise Exception(f"FFmpeg piece encode failed: {result.stderr[-300:]}")
+            
+            with self._stage("burn_subtitles_split", items=len(pieces)):
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(encode, piece) for piece in pieces]
+                    # Completions are counted here, in one thread, as pieces finish
+                    for done, future in enumerate(as_completed(futures), 1):
+                        future.result()
+                        if progress_callback:
+                            progress_callback(91 + int(3 * done / len(pieces)),
+                                              f"Encoded {done}/{len(pieces)} pieces")
+                
+                # Lossless join; audio comes from the source untouched
+                concat_list = work_dir / "pieces.txt"
+                with open(concat_list, 'w', encoding='utf-8') as f:
+                    for _, _, _, piece_out in pieces:
+                        escaped = str(piece_out.resolve()).replace("'", "'\\''")
+                        f.write(f"file '{escaped}'\n")
+                
+                cmd = [
+                    'ffmpeg',
+                    '-f', 'concat',
+                    '-safe', '0',
+                    '-i', str(concat_list),
+                    '-i', str(video_path),
+                    '-map', '0:v:0',
+                    '-map', '1:a?',
+                    '-c', 'copy',
+                    '-movflags', '+faststart',
+                    '-y',
+                    str(output_path)
+                ]
+                result = self.tracer.run(cmd, capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise Exception(f"FFmpeg concat failed: {result.stderr[-300:]}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        return output_path
+    
+    def subtitles_filter(self, srt_path):
+        """-vf value that burns an SRT in with the house style"""
+        return f"subtitles='{self._ffmpeg_path(srt_path)}':force_style='{SUBTITLE_FORCE_STYLE}'"
+    
+    def _ffmpeg_path(self, path):
+        """Path quoted for an ffmpeg filter argument (forward slashes, escaped drive colon)"""
+        return str(path).replace('\\', '/').replace(':', '\\:')
+    
+    def _parse_srt_seconds(self, srt_content):
+        """Parse SRT content into [(start seconds, end seconds, text), ...]"""
+        entries = []
+        for block in srt_content.strip().split('\n\n'):
+            lines = block.split('\n')
+            if len(lines) >= 3 and ' --> ' in lines[1]:
+                start_str, end_str = lines[1].split(' --> ')
+                entries.append((self._srt_seconds(start_str), self._srt_seconds(end_str),
+                                '\n'.join(lines[2:])))
+        return entries
+    
+    def _srt_seconds(self, srt_time):
+        """Convert an SRT timestamp (HH:MM:SS,mmm) to seconds"""
+        time_part, millis_part = srt_time.strip().split(',')
+        h, m, s = time_part.split(':')
+        return int(h) * 3600 + int(m) * 60 + int(s) + int(millis_part) / 1000
+    
+    def _write_shifted_srt(self, entries, start, end, output_path):
+        """Write the entries visible in [start, end) with times relative to start"""
+        srt_content = []
+        index = 1
+        for entry_start, entry_end, text in entries:
+            if entry_end <= start or entry_start >= end:
+                continue
+            srt_content.append(f"{index}")
+            srt_content.append(f"{self._format_timestamp(max(entry_start - start, 0))} --> "
+                               f"{self._format_timestamp(min(entry_end, end) - start)}")
+            srt_content.append(text)
+            srt_content.append("")
+            index += 1
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(srt_content))
+        return output_path
+    
     def _convert_srt_to_ass(self, srt_path, ass_path, style):
         """
         Convert SRT to ASS format with custom styling
@@ -243,13 +456,46 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             # Fallback to duration-based splitting
             return self.create_srt_file(text, 0, output_path)
     
+    def create_srt_from_translated_segments(self, segments, output_path, max_chars_per_line=50):
+        """
+        Create SRT from segment-aligned translations
+        
+        Args:
+            segments: [{"id", "start", "end", "text"}, ...] from
+                      VideoProcessor.translate_segments
+            output_path: Output SRT path
+            max_chars_per_line: Maximum characters per subtitle line
+        """
+        srt_text = self.build_srt_from_translated_segments(segments, max_chars_per_line)
+        
+        # Write SRT file
+        with self._stage("create_srt", items=len(segments)):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(srt_text)
+        
+        return output_path
+    
+    def build_srt_from_translated_segments(self, segments, max_chars_per_line=50):
+        """SRT content for segment-aligned translations"""
+        srt_content = []
+        
+        for i, segment in enumerate(segments, 1):
+            wrapped_lines = textwrap.wrap(segment["text"], width=max_chars_per_line)
+            start_time = segment.get('start', 0)
+            end_time = segment.get('end', start_time + 2)
+            
+            srt_content.append(f"{i}")
+            srt_content.append(f"{self._format_timestamp(start_time)} --> {self._format_timestamp(end_time)}")
+            srt_content.append('\n'.join(wrapped_lines))
+            srt_content.append("")
+        
+        return '\n'.join(srt_content)
+    
     def _create_srt_from_segments(self, translated_text, segments, output_path):
         """Create SRT using Whisper segment timing"""
         
         # Split translated text into parts matching number of segments
-        import re
-        sentences = re.split(r'[.!?؟。]\s*', translated_text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = split_sentences(translated_text)
         
         # Match sentences to segments (approximate)
         srt_content = []
@@ -276,24 +522,15 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             srt_content.append("")
         
         # Write SRT file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(srt_content))
+        with self._stage("create_srt", items=len(segments)):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(srt_content))
         
         return output_path
     
     def get_video_duration(self, video_path):
-        """Get video duration using FFprobe"""
-        cmd = [
-            'ffprobe',
-            '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            str(video_path)
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        """Get video duration from the (cached) media probe"""
         try:
-            duration = float(result.stdout.strip())
-            return duration
-        except:
+            return probe_media(video_path, run=self.tracer.run).duration
+        except (OSError, ValueError):
             return 0
@@ -0,0 +1,235 @@
+"""
+Dubbing Timeline Module
+Places synthesized segments at their source timestamps on a preallocated buffer
+Vectorized silence trimming and phase-vocoder time-stretching (numpy only)
+"""
+
+import math
+import wave
+import numpy as np
+
+# XTTS v2 output sample rate
+TTS_SAMPLE_RATE = 24000
+
+# Never speed speech up more than this to fit a slot
+MAX_STRETCH = 1.5
+
+
+def to_float32(wav):
+    """Convert TTS output (list, tensor or array) to a mono float32 array"""
+    if hasattr(wav, "detach"):
+        wav = wav.detach().cpu().numpy()
+    wav = np.asarray(wav, dtype=np.float32)
+    return wav.reshape(-1)
+
+
+def trim_silence(wav, threshold_db=-40.0, pad_ms=30, sample_rate=TTS_SAMPLE_RATE):
+    """Strip leading and trailing samples quieter than threshold_db below peak"""
+    if wav.size == 0:
+        return wav
+
+    peak = float(np.max(np.abs(wav)))
+    if peak <= 0:
+        return wav[:0]
+
+    threshold = peak * (10 ** (threshold_db / 20))
+    loud = np.flatnonzero(np.abs(wav) > threshold)
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, loud[0] - pad)
+    end = min(wav.size, loud[-1] + pad + 1)
+    return wav[start:end]
+
+
+def time_stretch(wav, factor, n_fft=1024):
+    """
+    Shorten (factor > 1) or lengthen (factor < 1) audio without changing pitch
+
+    Phase vocoder done as whole-array operations: frames are gathered with
+    one fancy-index, the STFT is a single rfft over all frames, phase
+    accumulation is a cumsum, and overlap-add uses four strided adds.
+    There is no per-frame Python loop.
+    """
+    target_len = int(round(wav.size / factor))
+    if target_len <= 0:
+        return wav[:0]
+    if abs(factor - 1.0) < 1e-3:
+        return wav
+    if wav.size < n_fft * 2:
+        # Too short for a vocoder: plain resampling is inaudible at this length
+        return np.interp(
+            np.linspace(0, wav.size - 1, target_len), np.arange(wav.size), wav
+        ).astype(np.float32)
+
+    overlap = 4
+    hop = n_fft // overlap
+    window = np.hanning(n_fft).astype(np.float32)
+
+    # Analysis STFT (frames x bins)
+    padded = np.pad(wav, (n_fft, n_fft))
+    n_frames = 1 + (padded.size - n_fft) // hop
+    idx = (np.arange(n_frames) * hop)[:, None] + np.arange(n_fft)
+    spec = np.fft.rfft(padded[idx] * window, axis=1)
+
+    # Fractional analysis positions for each synthesis frame
+    steps = np.arange(0, n_frames - 1, factor)
+    i = steps.astype(np.int64)
+    alpha = (steps - i)[:, None]
+    magnitude = (1 - alpha) * np.abs(spec[i]) + alpha * np.abs(spec[i + 1])
+
+    # Phase advance per step, unwrapped around each bin's expected advance
+    expected = 2 * np.pi * hop * np.arange(spec.shape[1]) / n_fft
+    delta = np.angle(spec[i + 1]) - np.angle(spec[i]) - expected
+    delta = delta - 2 * np.pi * np.round(delta / (2 * np.pi)) + expected
+    phase = np.angle(spec[0]) + np.vstack([np.zeros((1, spec.shape[1])), np.cumsum(delta, axis=0)[:-1]])
+
+    frames = np.fft.irfft(magnitude * np.exp(1j * phase), n=n_fft, axis=1).astype(np.float32) * window
+
+    # Overlap-add: frames k, k+4, k+8... tile the output without overlapping
+    out_len = (frames.shape[0] - 1) * hop + n_fft
+    out = np.zeros(out_len + n_fft, dtype=np.float32)
+    norm = np.zeros_like(out)
+    window_sq = window ** 2
+    for k in range(overlap):
+        block = frames[k::overlap]
+        offset = k * hop
+        out[offset:offset + block.size] += block.reshape(-1)
+        norm[offset:offset + block.size] += np.tile(window_sq, block.shape[0])
+
+    out = out[:out_len] / np.maximum(norm[:out_len], 1e-3)
+
+    # Drop the analysis padding (scaled to the new time base)
+    start = int(round(n_fft / factor))
+    out = out[start:start + target_len]
+    if out.size < target_len:
+        out = np.pad(out, (0, target_len - out.size))
+    return out
+
+
+class TimelineAssembler:
+    """Builds a dubbing track in one pass on a preallocated buffer"""
+
+    def __init__(self, duration, sample_rate=TTS_SAMPLE_RATE, max_stretch=MAX_STRETCH):
+        self.sample_rate = sample_rate
+        self.max_stretch = max_stretch
+        self.buffer = np.zeros(int(math.ceil(max(duration, 0) * sample_rate)), dtype=np.float32)
+        self.stretched = 0
+        self.overruns = 0
+
+    @property
+    def duration(self):
+        return self.buffer.size / self.sample_rate
+
+    def _ensure_length(self, n_samples):
+        # Only grows when speech runs past the end of the video
+        if n_samples > self.buffer.size:
+            self.buffer = np.pad(self.buffer, (0, n_samples - self.buffer.size))
+
+    def place(self, start, wav, slot_end=None, trim=True):
+        """
+        Mix a segment into the buffer at `start` seconds
+
+        Audio longer than its slot (start → slot_end) is time-compressed,
+        up to max_stretch. Returns the (start, end) sample range written.
+        """
+        wav = to_float32(wav)
+        if trim:
+            wav = trim_silence(wav, sample_rate=self.sample_rate)
+        if wav.size == 0:
+            return None
+
+        start_sample = max(0, int(round(start * self.sample_rate)))
+        if slot_end is not None:
+            slot = int(round(slot_end * self.sample_rate)) - start_sample
+            if slot > 0 and wav.size > slot:
+                factor = min(wav.size / slot, self.max_stretch)
+                wav = time_stretch(wav, factor)
+                self.stretched += 1
+                if wav.size > slot:
+                    self.overruns += 1
+
+        end_sample = start_sample + wav.size
+        self._ensure_length(end_sample)
+        self.buffer[start_sample:end_sample] += wav
+        return start_sample, end_sample
+
+    def place_segments(self, timed_audio):
+        """
+        Place [(start, end, wav), ...] sorted by start in a single pass
+
+        Each segment may use the time up to the next segment's start.
+        """
+        timed_audio = sorted(timed_audio, key=lambda item: item[0])
+        ends = slot_ends([(start, end) for start, end, _ in timed_audio], self.duration)
+        for (start, _, wav), slot_end in zip(timed_audio, ends):
+            self.place(start, wav, slot_end)
+        return self.buffer
+
+    def clear(self, start, end):
+        """Silence a time range (used before re-placing edited segments)"""
+        a = max(0, int(round(start * self.sample_rate)))
+        b = min(self.buffer.size, int(round(end * self.sample_rate)))
+        if b > a:
+            self.buffer[a:b] = 0
+
+    def to_int16(self):
+        """Clip-safe 16-bit PCM rendition of the buffer"""
+        return self._pcm16(self.buffer, self._peak())
+
+    def int16_blocks(self, block_seconds=1.0):
+        """to_int16 rendered block by block, for streaming into ffmpeg as it is produced"""
+        peak = self._peak()
+        step = max(1, int(self.sample_rate * block_seconds))
+        for start in range(0, self.buffer.size, step):
+            yield self._pcm16(self.buffer[start:start + step], peak)
+
+    def _peak(self):
+        return float(np.max(np.abs(self.buffer))) if self.buffer.size else 0.0
+
+    @staticmethod
+    def _pcm16(audio, peak):
+        # Tracks that overshoot are scaled down as a whole, not clipped
+        if peak > 1.0:
+            audio = audio / peak
+        return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+    def write_wav(self, path):
+        """Write the assembled track as a mono 16-bit WAV"""
+        write_wav(path, self.to_int16(), self.sample_rate)
+        return str(path)
+
+
+def slot_ends(timings, duration):
+    """
+    End of the slot each (start, end) may fill, for timings sorted by start
+
+    A segment may use the time up to the next segment's start (the last one
+    up to `duration`), and never less than its own end.
+    """
+    ends = []
+    for i, (_, end) in enumerate(timings):
+        following = timings[i + 1][0] if i + 1 < len(timings) else duration
+        ends.append(max(end, following))
+    return ends
+
+
+def write_wav(path, samples, sample_rate):
+    """Write mono int16 (or float, converted) samples with the stdlib wave module"""
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def read_wav(path):
+    """Read a mono 16-bit WAV into (float32 samples, sample_rate)"""
+    with wave.open(str(path), "rb") as f:
+        sample_rate = f.getframerate()
+        channels = f.getnchannels()
+        frames = f.readframes(f.getnframes())
+    samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
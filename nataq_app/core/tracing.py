@@ -0,0 +1,139 @@
+"""
+Job Tracing Module
+Records nested spans (stages, model calls, subprocesses) for one dubbing job
+Writes Chrome trace-event JSON that opens in Perfetto / chrome://tracing
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Collects complete ("X") trace events for a single job"""
+
+    def __init__(self, job_name="nataq_job"):
+        self.job_name = job_name
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return True
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _tid(self):
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        # Spans open from worker threads too; the name table is shared like the events
+        with self._lock:
+            self._threads.setdefault(tid, thread.name)
+        return tid
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        """Record a span around the enclosed block; nesting follows call order"""
+        start = self._now_us()
+        tid = self._tid()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = str(e)[:200]
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now_us() - start,
+                "pid": self.pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {key: _jsonable(value) for key, value in args.items()}
+            with self._lock:
+                self._events.append(event)
+
+    def instant(self, name, category="mark", **args):
+        """Record a zero-duration marker"""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "t",
+            "ts": self._now_us(),
+            "pid": self.pid,
+            "tid": self._tid(),
+            "args": {key: _jsonable(value) for key, value in args.items()},
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def run(self, cmd, **kwargs):
+        """subprocess.run wrapped in a span carrying the full command line"""
+        program = os.path.basename(str(cmd[0])) if cmd else "subprocess"
+        with self.span(program, "subprocess", cmd=subprocess.list2cmdline([str(c) for c in cmd])):
+            return subprocess.run(cmd, **kwargs)
+
+    def to_dict(self):
+        """Chrome trace-event document"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+
+        metadata = [{
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": self.job_name},
+        }]
+        for tid, thread_name in threads.items():
+            metadata.append({
+                "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                "args": {"name": thread_name},
+            })
+
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write(self, path):
+        """Write the trace JSON and return its path"""
+        path = str(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+
+class NullTracer:
+    """No-op tracer used when tracing is disabled"""
+
+    enabled = False
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        yield
+
+    def instant(self, name, category="mark", **args):
+        pass
+
+    def run(self, cmd, **kwargs):
+        return subprocess.run(cmd, **kwargs)
+
+    def write(self, path):
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
@@ -0,0 +1,206 @@
+"""
+Transcript Cache Module
+Stores Whisper results keyed by a fingerprint of the decoded 16 kHz audio
+Re-encoded copies of a source match through a tolerant loudness-envelope comparison
+"""
+
+import hashlib
+import json
+import os
+import threading
+import wave
+import numpy as np
+from utils.config import CACHE_DIR
+
+# Envelope resolution: one loudness value per quarter second
+ENVELOPE_FRAME_SECONDS = 0.25
+
+# Loudness floor relative to the loudest frame
+ENVELOPE_FLOOR_DB = -60.0
+
+# A re-encode changes frame loudness by well under this (mean absolute dB)
+ENVELOPE_MATCH_DB = 1.0
+
+# Durations must agree this closely for an envelope match
+DURATION_TOLERANCE_S = 0.5
+
+
+class AudioFingerprint:
+    """Exact PCM hash plus a coarse loudness envelope of the same audio"""
+
+    def __init__(self, pcm_sha256, duration, envelope):
+        self.pcm_sha256 = pcm_sha256
+        self.duration = duration
+        self.envelope = envelope
+
+
+def fingerprint_wav(path, chunk_seconds=30):
+    """Fingerprint a PCM WAV in one streaming pass (no full decode in memory)"""
+    with wave.open(str(path), "rb") as f:
+        sample_rate = f.getframerate()
+        channels = f.getnchannels()
+        chunk_frames = _chunk_frames(sample_rate, chunk_seconds)
+        chunks = iter(lambda: f.readframes(chunk_frames), b"")
+        return _fingerprint_chunks(chunks, sample_rate, channels, f.getnframes())
+
+
+def fingerprint_pcm(samples, sample_rate, chunk_seconds=30):
+    """Fingerprint mono int16 samples already in memory (same result as the WAV of them)"""
+    data = memoryview(np.ascontiguousarray(samples, dtype=np.int16)).cast("B")
+    chunk_bytes = _chunk_frames(sample_rate, chunk_seconds) * 2
+    chunks = (data[i:i + chunk_bytes] for i in range(0, len(data), chunk_bytes))
+    return _fingerprint_chunks(chunks, sample_rate, 1, len(data) // 2)
+
+
+def _chunk_frames(sample_rate, chunk_seconds):
+    frame_len = int(sample_rate * ENVELOPE_FRAME_SECONDS)
+    return frame_len * max(1, int(chunk_seconds / ENVELOPE_FRAME_SECONDS))
+
+
+def _fingerprint_chunks(chunks, sample_rate, channels, total):
+    # PCM hash and per-frame energy over int16 byte chunks
+    digest = hashlib.sha256()
+    energies = []
+    frame_len = int(sample_rate * ENVELOPE_FRAME_SECONDS)
+    leftover = np.zeros(0, dtype=np.float32)
+
+    for data in chunks:
+        digest.update(data)
+
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        samples = np.concatenate([leftover, samples])
+
+        usable = (samples.size // frame_len) * frame_len
+        if usable:
+            frames = samples[:usable].reshape(-1, frame_len)
+            energies.append(np.mean(frames ** 2, axis=1))
+        leftover = samples[usable:]
+
+    if leftover.size:
+        energies.append(np.array([np.mean(leftover ** 2)], dtype=np.float32))
+
+    energy = np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+    return AudioFingerprint(digest.hexdigest(), total / sample_rate, _envelope_db(energy))
+
+
+def _envelope_db(energy):
+    # Loudness relative to the loudest frame, so gain changes do not matter
+    if energy.size == 0:
+        return energy
+    db = 10 * np.log10(np.maximum(energy, 1e-10))
+    db = np.maximum(db - db.max(), ENVELOPE_FLOOR_DB)
+    return np.round(db, 1).astype(np.float32)
+
+
+def envelopes_match(a, b, tolerance_db=ENVELOPE_MATCH_DB):
+    """Whether two envelopes describe the same audio (allowing a frame of drift)"""
+    if a.size == 0 or b.size == 0 or abs(a.size - b.size) > 2:
+        return False
+    n = min(a.size, b.size)
+    return float(np.mean(np.abs(a[:n] - b[:n]))) <= tolerance_db
+
+
+class TranscriptCache:
+    """Whisper transcripts on disk, looked up by audio fingerprint and decode settings"""
+
+    def __init__(self, cache_dir=CACHE_DIR / "transcripts"):
+        self.cache_dir = cache_dir
+        self.index_path = cache_dir / "index.jsonl"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def settings_key(model_name, language, options):
+        """Hash of everything besides the audio that changes Whisper's output"""
+        canonical = json.dumps({"model": model_name, "language": language, "options": options},
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    def _entry_key(self, fingerprint, settings_key):
+        return f"{fingerprint.pcm_sha256[:32]}_{settings_key}"
+
+    def lookup(self, fingerprint, model_name, language, options):
+        """
+        Cached (text, segments) for this audio and settings, or None
+
+        Exact PCM matches are found directly; otherwise entries with the same
+        settings and duration are compared by loudness envelope.
+        """
+        settings_key = self.settings_key(model_name, language, options)
+
+        entry = self._load(self._entry_key(fingerprint, settings_key))
+        if entry is not None:
+            return entry["text"], entry["segments"]
+
+        for candidate in self._candidates(settings_key, fingerprint.duration):
+            try:
+                envelope = np.load(self.cache_dir / f"{candidate}.npy")
+            except (OSError, ValueError):
+                continue
+            if envelopes_match(fingerprint.envelope, envelope):
+                entry = self._load(candidate)
+                if entry is not None:
+                    return entry["text"], entry["segments"]
+        return None
+
+    def store(self, fingerprint, model_name, language, options, text, segments):
+        """Save a transcript for this audio and settings"""
+        settings_key = self.settings_key(model_name, language, options)
+        key = self._entry_key(fingerprint, settings_key)
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            entry_path = self.cache_dir / f"{key}.json"
+            tmp_path = self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model": model_name,
+                    "language": language,
+                    "options": options,
+                    "duration": fingerprint.duration,
+                    "text": text,
+                    "segments": segments,
+                }, f, ensure_ascii=False, default=_jsonable)
+            os.replace(tmp_path, entry_path)
+
+            with open(self.cache_dir / f"{key}.npy", "wb") as f:
+                np.save(f, fingerprint.envelope)
+
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "settings": settings_key,
+                                    "duration": round(fingerprint.duration, 3)}) + "\n")
+        return key
+
+    def _load(self, key):
+        try:
+            with open(self.cache_dir / f"{key}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _candidates(self, settings_key, duration):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+
+        keys = []
+        for line in lines:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item.get("settings") == settings_key and \
+                    abs(item.get("duration", -1) - duration) <= DURATION_TOLERANCE_S:
+                keys.append(item["key"])
+        return keys
+
+
+def _jsonable(value):
+    # Whisper segments may carry numpy scalars or arrays
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
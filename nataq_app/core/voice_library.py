@@ -0,0 +1,326 @@
+"""
+Voice Library Module
+Reference voices with precomputed XTTS speaker embeddings and conditioning latents
+Everything lives in one memory-mapped float32 pack plus a JSON manifest, so using a
+voice is an index lookup instead of a WAV decode and an encoder pass
+"""
+
+import json
+import os
+import subprocess
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from core.job_cache import file_hash
+from utils.config import (VOICE_LIBRARY_DIR, VOICE_LIBRARY_SAMPLE_RATE, VOICE_LIBRARY_MAX_SECONDS,
+                          VOICE_LIBRARY_WORKERS, AUTO_VOICE_SECONDS)
+
+LIBRARY_MANIFEST = "voices.json"
+LIBRARY_VERSION = 1
+
+# Loudness-normalize and trim leading silence so every reference conditions XTTS alike
+NORMALIZE_FILTER = "silenceremove=start_periods=1:start_threshold=-50dB,loudnorm=I=-20:TP=-2:LRA=11"
+
+_open_lock = threading.Lock()
+_open_libraries = {}
+
+
+def normalize_clip(source, output_path, run=subprocess.run, sample_rate=VOICE_LIBRARY_SAMPLE_RATE,
+                   max_seconds=VOICE_LIBRARY_MAX_SECONDS):
+    """Mono, fixed-rate, loudness-normalized WAV of at most max_seconds"""
+    cmd = [
+        'ffmpeg',
+        '-i', str(source),
+        '-vn',
+        '-af', NORMALIZE_FILTER,
+        '-ar', str(sample_rate),
+        '-ac', '1',
+        '-acodec', 'pcm_s16le',
+        '-t', str(max_seconds),
+        '-y',
+        str(output_path)
+    ]
+    result = run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"Could not normalize {source}: {result.stderr[-300:]}")
+    return str(output_path)
+
+
+def speaker_excerpt(samples, segments, sample_rate=16000, seconds=AUTO_VOICE_SECONDS):
+    """
+    Up to `seconds` of speech from float32 samples, taken from the transcript segments
+
+    Falls back to the start of the audio when there are no segments.
+    """
+    limit = int(seconds * sample_rate)
+    pieces = []
+    taken = 0
+    for seg in segments or ():
+        start = max(0, int(seg["start"] * sample_rate))
+        end = min(samples.size, int(seg["end"] * sample_rate), start + limit - taken)
+        if end > start:
+            pieces.append(samples[start:end])
+            taken += end - start
+        if taken >= limit:
+            break
+    if not pieces:
+        return samples[:limit].astype(np.float32)
+    return np.concatenate(pieces).astype(np.float32)
+
+
+class VoiceLibrary:
+    """
+    Read-only view of a built library
+
+    The pack holds the speaker embedding matrix ([voices, dim], one row per
+    manifest entry) followed by each voice's GPT conditioning latent. Arrays
+    handed out are views into the mapping: pages are shared between jobs and
+    worker processes and nothing is decoded.
+    """
+
+    def __init__(self, directory, manifest, pack):
+        self.directory = Path(directory)
+        self.manifest = manifest
+        self.pack = pack
+        self.voices = manifest["voices"]
+        self._by_id = {voice["id"]: voice for voice in self.voices}
+        self._by_hash = {}
+        for voice in self.voices:
+            self._by_hash[voice["hash"]] = voice
+            if voice.get("source_hash"):
+                self._by_hash.setdefault(voice["source_hash"], voice)
+        # Row-normalized embedding matrix, made on the first nearest() call
+        self._unit_matrix = None
+
+    @classmethod
+    def open(cls, directory=VOICE_LIBRARY_DIR):
+        """Map the library in `directory`, or None if none has been built (shared per process)"""
+        directory = Path(directory)
+        manifest_path = directory / LIBRARY_MANIFEST
+        try:
+            stamp = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+        key = str(directory.resolve())
+        with _open_lock:
+            cached = _open_libraries.get(key)
+            if cached and cached[0] == stamp:
+                return cached[1]
+
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != LIBRARY_VERSION:
+                raise ValueError(f"Unsupported voice library version: {manifest.get('version')}")
+            # Copy-on-write mapping: writable views for torch, never written back
+            pack = np.memmap(directory / manifest["pack"], dtype=np.float32, mode="c") \
+                if manifest["size"] else np.zeros(0, dtype=np.float32)
+            library = cls(directory, manifest, pack)
+            _open_libraries[key] = (stamp, library)
+            return library
+
+    def __len__(self):
+        return len(self.voices)
+
+    def __contains__(self, voice_id):
+        return voice_id in self._by_id
+
+    def get(self, voice_id):
+        return self._by_id.get(voice_id)
+
+    def find(self, language=None, gender=None, dialect=None):
+        """Voices matching every given attribute"""
+        return [
+            voice for voice in self.voices
+            if (language is None or voice.get("language") == language)
+            and (gender is None or voice.get("gender") == gender)
+            and (dialect is None or voice.get("dialect") == dialect)
+        ]
+
+    def for_reference(self, path):
+        """Library voice made from this audio file (by content hash), or None"""
+        try:
+            return self._by_hash.get(file_hash(path))
+        except OSError:
+            return None
+
+    def audio_path(self, voice_id):
+        """Normalized reference WAV of a voice"""
+        return str(self.directory / self._by_id[voice_id]["file"])
+
+    @property
+    def embedding_matrix(self):
+        """[voices, dim] speaker embeddings, in manifest order"""
+        dim = self.manifest["embedding_dim"]
+        return self.pack[:len(self.voices) * dim].reshape(len(self.voices), dim)
+
+    def nearest(self, embedding, language=None, exclude=()):
+        """
+        Library voice whose speaker embedding is closest (cosine) to `embedding`
+
+        Voices in `language` are preferred when there are any, and voice ids
+        in `exclude` are skipped unless nothing else is left. Returns
+        (voice, similarity), or (None, 0.0) for an empty library.
+        """
+        rows = list(range(len(self.voices)))
+        for keep in (lambda voice: language is None or voice.get("language") == language,
+                     lambda voice: voice["id"] not in exclude):
+            narrowed = [i for i in rows if keep(self.voices[i])]
+            rows = narrowed or rows
+        if not rows:
+            return None, 0.0
+
+        if self._unit_matrix is None:
+            matrix = np.asarray(self.embedding_matrix)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._unit_matrix = matrix / np.maximum(norms, 1e-8)
+
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-8)
+        similarities = self._unit_matrix[rows] @ query
+        best = int(np.argmax(similarities))
+        return self.voices[rows[best]], float(similarities[best])
+
+    def arrays(self, voice_id):
+        """(gpt_cond_latent, speaker_embedding) as views into the pack"""
+        voice = self._by_id[voice_id]
+        latent = voice["latent"]
+        gpt_cond_latent = self.pack[latent["offset"]:latent["offset"] + int(np.prod(latent["shape"]))]
+        speaker_embedding = self.embedding_matrix[voice["row"]]
+        return (gpt_cond_latent.reshape(latent["shape"]),
+                speaker_embedding.reshape(self.manifest["embedding_shape"]))
+
+    def latents(self, voice_id, device=None):
+        """XTTS conditioning latents of a voice as torch tensors (zero-copy on CPU)"""
+        import torch
+        tensors = tuple(torch.from_numpy(array) for array in self.arrays(voice_id))
+        if device is not None and str(device) != "cpu":
+            tensors = tuple(tensor.to(device) for tensor in tensors)
+        return tensors
+
+
+class VoiceLibraryBuilder:
+    """
+    Ingests reference clips into a library directory
+
+    Clips are normalized in parallel ffmpeg processes; latents are computed
+    one voice at a time on the single loaded XTTS model. Voices whose
+    normalized audio is unchanged keep their stored latents.
+    """
+
+    def __init__(self, tts_model, directory=VOICE_LIBRARY_DIR, workers=VOICE_LIBRARY_WORKERS,
+                 run=subprocess.run):
+        self.tts_model = tts_model
+        self.directory = Path(directory)
+        self.workers = max(1, workers)
+        self.run = run
+
+    def build(self, sources, progress_callback=None):
+        """
+        Add or refresh voices and rewrite the pack
+
+        Args:
+            sources: [{"id", "file", "name", "language", "gender", "dialect"}, ...]
+            progress_callback: Function to report progress
+
+        Returns:
+            The rebuilt VoiceLibrary
+        """
+        (self.directory / "clips").mkdir(parents=True, exist_ok=True)
+        previous = VoiceLibrary.open(self.directory)
+        entries = {voice["id"]: dict(voice) for voice in previous.voices} if previous else {}
+
+        def normalize(source):
+            name = f"clips/{source['id']}.wav"
+            normalize_clip(source["file"], self.directory / name, run=self.run)
+            return source, name
+
+        if progress_callback:
+            progress_callback(5, f"Normalizing {len(sources)} clips ({self.workers} workers)...")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            normalized = list(pool.map(normalize, sources))
+
+        arrays = {}
+        for i, (source, name) in enumerate(normalized, 1):
+            audio_hash = file_hash(self.directory / name)
+            old = entries.get(source["id"])
+            if previous and old and old["hash"] == audio_hash:
+                # Same audio as last build: keep its latents
+                arrays[source["id"]] = tuple(np.array(a) for a in previous.arrays(source["id"]))
+            else:
+                gpt_cond_latent, speaker_embedding = self.tts_model.get_conditioning_latents(
+                    audio_path=[str(self.directory / name)]
+                )
+                arrays[source["id"]] = (_to_numpy(gpt_cond_latent), _to_numpy(speaker_embedding))
+
+            entries[source["id"]] = {
+                "id": source["id"],
+                "name": source.get("name", source["id"]),
+                "language": source.get("language"),
+                "gender": source.get("gender"),
+                "dialect": source.get("dialect"),
+                "file": name,
+                "hash": audio_hash,
+                "source_hash": file_hash(source["file"]),
+            }
+            if progress_callback:
+                progress_callback(10 + int(80 * i / len(normalized)),
+                                  f"✓ {source['id']} ({i}/{len(normalized)})")
+
+        # Voices not rebuilt this time come from the previous pack
+        for voice_id in entries:
+            if voice_id not in arrays:
+                arrays[voice_id] = tuple(np.array(a) for a in previous.arrays(voice_id))
+        previous = None
+
+        self._write(entries, arrays)
+        library = VoiceLibrary.open(self.directory)
+        if progress_callback:
+            progress_callback(100, f"✅ Voice library: {len(library)} voices in {self.directory}")
+        return library
+
+    def _write(self, entries, arrays):
+        # Pack: embedding matrix first, then each latent. Every build writes a new
+        # pack file and the manifest switches to it, so readers never mix the two.
+        ids = sorted(entries)
+        embedding_shape = list(arrays[ids[0]][1].shape) if ids else [1, 0, 1]
+        dim = int(np.prod(embedding_shape))
+
+        pack_name = f"voices_{uuid.uuid4().hex[:8]}.pack"
+        offset = len(ids) * dim
+        with open(self.directory / pack_name, "wb") as f:
+            for row, voice_id in enumerate(ids):
+                np.ascontiguousarray(arrays[voice_id][1], dtype=np.float32).reshape(-1).tofile(f)
+                entries[voice_id]["row"] = row
+            for voice_id in ids:
+                latent = np.ascontiguousarray(arrays[voice_id][0], dtype=np.float32)
+                latent.reshape(-1).tofile(f)
+                entries[voice_id]["latent"] = {"offset": offset, "shape": list(latent.shape)}
+                offset += latent.size
+
+        manifest_tmp = self.directory / f"{LIBRARY_MANIFEST}.{threading.get_ident()}.tmp"
+        with open(manifest_tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": LIBRARY_VERSION,
+                "embedding_dim": dim,
+                "embedding_shape": embedding_shape,
+                "pack": pack_name,
+                "size": offset,
+                "voices": [entries[voice_id] for voice_id in ids],
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(manifest_tmp, self.directory / LIBRARY_MANIFEST)
+
+        for old_pack in self.directory.glob("voices_*.pack"):
+            if old_pack.name != pack_name:
+                try:
+                    old_pack.unlink()
+                except OSError:
+                    pass  # Still mapped by a reader (Windows); removed by a later build
+
+
+def _to_numpy(tensor):
+    if hasattr(tensor, "detach"):
+        tensor = tensor.detach().float().cpu().numpy()
+    return np.asarray(tensor, dtype=np.float32)
@@ -4,7 +4,8 @@ Generate high-quality reference voices ONCE, then reuse for fast processing
 
 IMPORTANT: Run this script ONCE before using the main application
 It creates male and female Arabic voice samples that will be used
-for all future video dubbing (3-5x faster than voice cloning)
+for all future video dubbing (3-5x faster than voice cloning),
+and can add them to the indexed voice library in the same run
 """
 
 import os
@@ -13,12 +14,15 @@ from pathlib import Path
 from TTS.api import TTS
 import torch
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.config import PRETRAINED_VOICES, VOICES_DIR, VOICE_LIBRARY_DIR
+
 # Set environment
 os.environ["COQUI_TOS_AGREED"] = "1"
 
 # Paths
-BASE_DIR = Path(__file__).parent
-VOICES_DIR = BASE_DIR / "voices"
 VOICES_DIR.mkdir(parents=True, exist_ok=True)
 
 # Check GPU
@@ -107,6 +111,18 @@ def generate_voice_with_speaker(voice_type, text, output_path):
         traceback.print_exc()
         return False
 
+def add_to_library():
+    """Normalize the pre-trained voices and precompute their latents into the voice library"""
+    from build_voice_library import pretrained_sources, print_progress
+    from core.voice_library import VoiceLibraryBuilder
+    
+    print(f"\nLoading XTTS v2 to index the voices in {VOICE_LIBRARY_DIR}...")
+    tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(DEVICE)
+    library = VoiceLibraryBuilder(tts.synthesizer.tts_model, VOICE_LIBRARY_DIR).build(
+        pretrained_sources(), print_progress
+    )
+    print(f"✓ Voice library: {len(library)} voices")
+
 def verify_voice_quality(voice_path):
     """Check if generated voice file is valid"""
     if not voice_path.exists():
@@ -132,8 +148,8 @@ def main():
     print()
     
     # Check if voices already exist
-    male_path = VOICES_DIR / "male_arabic.wav"
-    female_path = VOICES_DIR / "female_arabic.wav"
+    male_path = VOICES_DIR / PRETRAINED_VOICES["male_ar"]["file"]
+    female_path = VOICES_DIR / PRETRAINED_VOICES["female_ar"]["file"]
     
     if male_path.exists() or female_path.exists():
         print("⚠️  WARNING: Voice files already exist!")
@@ -209,6 +225,12 @@ def main():
     if all(results.values()):
         print("✓ SUCCESS! All voices generated successfully.")
         print()
+        response = input("Add them to the indexed voice library now? (y/n): ").strip().lower()
+        if response == 'y':
+            add_to_library()
+        else:
+            print("Later: python build_voice_library.py")
+        print()
         print("Next steps:")
         print("  1. Run the main application: python main.py")
         print("  2. Select 'Arabic Male Voice' or 'Arabic Female Voice'")
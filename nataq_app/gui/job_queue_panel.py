@@ -0,0 +1,196 @@
+"""
+Job Queue Panel
+Table of queued dubbing jobs with per-job progress, cancel and retry controls
+Rows are refreshed on a timer, so busy workers never flood the UI thread
+"""
+
+import os
+import threading
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QProgressBar,
+                             QHeaderView, QFileDialog, QMessageBox)
+from PyQt5.QtCore import QTimer
+from utils.config import SUPPORTED_VIDEO_FORMATS, PROGRESS_FPS
+from core.job_queue import RUNNING, FAILED, CANCELLED, DONE
+
+COLUMNS = ["Video", "Voice", "Languages", "Status", "Progress", "Actions"]
+
+
+class JobQueuePanel(QWidget):
+    """Queue tab: add many videos, run them concurrently, cancel or retry each"""
+
+    def __init__(self, scheduler, settings_provider, parent=None):
+        """
+        Args:
+            scheduler: JobScheduler running the jobs
+            settings_provider: Function returning the current dubbing settings
+                               (process_video keyword arguments) or None
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.settings_provider = settings_provider
+        self.rows = {}  # job id -> (row, job, progress bar, cancel button, retry button)
+
+        # Worker threads only mark jobs dirty; the timer redraws them
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self.scheduler.on_update = self._mark_dirty
+
+        self.init_ui()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, int(1000 / PROGRESS_FPS)))
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        controls = QHBoxLayout()
+
+        self.add_btn = QPushButton("➕ Add Videos...")
+        self.add_btn.clicked.connect(self.add_videos)
+        controls.addWidget(self.add_btn)
+
+        controls.addWidget(QLabel("Concurrent jobs:"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 8)
+        self.concurrency_spin.setValue(self.scheduler.concurrency)
+        self.concurrency_spin.setToolTip("Jobs share the loaded models; more than 2 rarely helps on one GPU")
+        self.concurrency_spin.valueChanged.connect(self.scheduler.set_concurrency)
+        controls.addWidget(self.concurrency_spin)
+
+        controls.addStretch()
+
+        self.clear_btn = QPushButton("🧹 Clear Finished")
+        self.clear_btn.clicked.connect(self.clear_finished)
+        controls.addWidget(self.clear_btn)
+
+        layout.addLayout(controls)
+
+        info = QLabel("New jobs use the voice, language and model settings from the Video Dubbing tab.")
+        info.setStyleSheet("color: #666; font-style: italic;")
+        layout.addWidget(info)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+    def add_videos(self):
+        """Queue one job per selected video with the current settings"""
+        settings = self.settings_provider()
+        if settings is None:
+            return
+
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Add Videos to Queue",
+            "",
+            f"Video Files (*{' *'.join(SUPPORTED_VIDEO_FORMATS)})"
+        )
+        for file_path in file_paths:
+            self.add_job(file_path, settings)
+
+    def add_job(self, video_path, settings):
+        """Submit a job and give it a row"""
+        job = self.scheduler.submit(video_path, **settings)
+        self._add_row(job)
+        return job
+
+    def _add_row(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+
+        settings = job.settings
+        languages = f"{settings.get('source_lang')} → {settings.get('target_lang')}"
+        if settings.get("dialect"):
+            languages += f" ({settings['dialect']})"
+
+        self.table.setItem(row, 0, QTableWidgetItem(os.path.basename(job.video_path)))
+        self.table.setItem(row, 1, QTableWidgetItem(settings.get("voice_type", "")))
+        self.table.setItem(row, 2, QTableWidgetItem(languages))
+        self.table.setItem(row, 3, QTableWidgetItem(job.message))
+
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        progress_bar.setValue(job.progress)
+        self.table.setCellWidget(row, 4, progress_bar)
+
+        actions = QWidget()
+        actions_layout = QHBoxLayout(actions)
+        actions_layout.setContentsMargins(2, 2, 2, 2)
+        cancel_btn = QPushButton("⏹ Cancel")
+        cancel_btn.clicked.connect(lambda _, j=job: self.scheduler.cancel(j))
+        actions_layout.addWidget(cancel_btn)
+        retry_btn = QPushButton("🔁 Retry")
+        retry_btn.clicked.connect(lambda _, j=job: self.scheduler.retry(j))
+        retry_btn.setEnabled(False)
+        actions_layout.addWidget(retry_btn)
+        self.table.setCellWidget(row, 5, actions)
+
+        self.rows[job.id] = (row, job, progress_bar, cancel_btn, retry_btn)
+
+    def _mark_dirty(self, job):
+        # Called from worker threads
+        with self._dirty_lock:
+            self._dirty.add(job.id)
+
+    def refresh(self):
+        """Redraw rows whose jobs changed since the last tick"""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+
+        for job_id in dirty:
+            if job_id not in self.rows:
+                continue
+            row, job, progress_bar, cancel_btn, retry_btn = self.rows[job_id]
+
+            status = job.message
+            if job.state == FAILED and job.error:
+                self.table.item(row, 3).setToolTip(job.error)
+            elif job.state == DONE and job.output_path:
+                status = f"✅ {os.path.basename(job.output_path)}"
+                self.table.item(row, 3).setToolTip(job.output_path)
+            if job.attempts > 1 and job.state == RUNNING:
+                status = f"[attempt {job.attempts}] {status}"
+
+            self.table.item(row, 3).setText(status)
+            progress_bar.setValue(job.progress)
+            cancel_btn.setEnabled(not job.finished)
+            retry_btn.setEnabled(job.state in (FAILED, CANCELLED))
+
+    def clear_finished(self):
+        """Drop finished jobs from the scheduler and the table"""
+        self.scheduler.remove_finished()
+        remaining = [job for _, job, *_ in sorted(self.rows.values(), key=lambda r: r[0])
+                     if not job.finished]
+        self.table.setRowCount(0)
+        self.rows = {}
+        for job in remaining:
+            self._add_row(job)
+
+    def has_active_jobs(self):
+        return any(not job.finished for _, job, *_ in self.rows.values())
+
+    def confirm_close(self):
+        """Ask before closing with jobs still queued or running"""
+        if not self.has_active_jobs():
+            return True
+        answer = QMessageBox.question(
+            self,
+            "Jobs Running",
+            "Some queued jobs have not finished. Cancel them and quit?"
+        )
+        if answer != QMessageBox.Yes:
+            return False
+        for _, job, *_ in self.rows.values():
+            if not job.finished:
+                self.scheduler.cancel(job)
+        return True
@@ -5,17 +5,24 @@ Professional GUI with Arabic RTL Support
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QComboBox, QProgressBar,
-                             QTextEdit, QFileDialog, QGroupBox, QGridLayout,
+                             QPlainTextEdit, QFileDialog, QGroupBox, QGridLayout,
                              QTabWidget, QMessageBox, QApplication, QRadioButton,
-                             QButtonGroup, QCheckBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+                             QButtonGroup, QCheckBox, QDoubleSpinBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QSize
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap
 import os
+import threading
+from datetime import datetime
 from pathlib import Path
 from utils.config import (LANGUAGES, ARABIC_DIALECTS, WHISPER_MODELS, 
                          DEFAULT_WHISPER_MODEL, SUPPORTED_VIDEO_FORMATS,
-                         SUPPORTED_AUDIO_FORMATS, get_device_info, VOICES_DIR)
+                         SUPPORTED_AUDIO_FORMATS, get_device_info, VOICES_DIR,
+                         LOGS_DIR, PROGRESS_FPS, LOG_MAX_LINES, MAX_CONCURRENT_JOBS,
+                         PROJECTS_DIR)
 from core.processor import VideoProcessor
+from core.job_queue import JobScheduler
+from gui.progress_bus import ProgressBus
+from gui.job_queue_panel import JobQueuePanel
 
 class ProcessingThread(QThread):
     """Background thread for video processing"""
@@ -24,9 +31,11 @@ class ProcessingThread(QThread):
     error = pyqtSignal(str)
     
     def __init__(self, processor, video_path, voice_type, reference_audio, source_lang, 
-                 target_lang, dialect, whisper_model, add_subtitles):
+                 target_lang, dialect, whisper_model, add_subtitles, progress_bus=None,
+                 start_time=None, end_time=None, diarize=False):
         super().__init__()
         self.processor = processor
+        self.progress_bus = progress_bus
         self.video_path = video_path
         self.voice_type = voice_type
         self.reference_audio = reference_audio
@@ -35,6 +44,9 @@ class ProcessingThread(QThread):
         self.dialect = dialect
         self.whisper_model = whisper_model
         self.add_subtitles = add_subtitles
+        self.start_time = start_time
+        self.end_time = end_time
+        self.diarize = diarize
     
     def run(self):
         try:
@@ -47,7 +59,10 @@ class ProcessingThread(QThread):
                 dialect=self.dialect,
                 whisper_model=self.whisper_model,
                 add_subtitles=self.add_subtitles,
-                progress_callback=self.update_progress
+                progress_callback=self.update_progress,
+                start_time=self.start_time,
+                end_time=self.end_time,
+                diarize=self.diarize
             )
             self.finished.emit(output_path, True)
         except Exception as e:
@@ -55,7 +70,96 @@ class ProcessingThread(QThread):
             self.finished.emit("", False)
     
     def update_progress(self, percent, message):
-        self.progress.emit(percent, message)
+        # The bus coalesces updates; a signal per message would flood the UI thread
+        if self.progress_bus:
+            self.progress_bus.post(percent, message)
+        else:
+            self.progress.emit(percent, message)
+
+class ModelPrewarmThread(QThread):
+    """Loads the selected models and voice in the background"""
+    status = pyqtSignal(str)
+    
+    def __init__(self, processor, whisper_model, voice_type, reference_audio):
+        super().__init__()
+        self.processor = processor
+        self.whisper_model = whisper_model
+        self.voice_type = voice_type
+        self.reference_audio = reference_audio
+    
+    def run(self):
+        try:
+            self.processor.prewarm(
+                self.whisper_model,
+                voice_type=self.voice_type,
+                reference_audio=self.reference_audio,
+                progress_callback=self.update_status
+            )
+            self.status.emit(f"✓ Models ready (Whisper {self.whisper_model})")
+        except Exception as e:
+            self.status.emit(f"⚠️ Model prewarm failed: {str(e)[:60]}")
+    
+    def update_status(self, percent, message):
+        self.status.emit(message)
+
+class PreviewThread(QThread):
+    """Streams the first dubbed segments to the speakers"""
+    done = pyqtSignal(str)
+    
+    def __init__(self, processor, settings, video_path, progress_bus):
+        super().__init__()
+        self.processor = processor
+        self.settings = dict(settings)
+        self.settings.pop("add_subtitles", None)
+        self.video_path = video_path
+        self.progress_bus = progress_bus
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        try:
+            count = self.processor.preview(
+                self.video_path,
+                progress_callback=self.progress_bus.post,
+                stop_event=self.stop_event,
+                **self.settings
+            )
+            self.done.emit(f"Preview played {count} segments")
+        except Exception as e:
+            self.done.emit(f"❌ Preview failed: {str(e)}")
+    
+    def stop(self):
+        self.stop_event.set()
+
+class ProjectRenderThread(QThread):
+    """Re-renders an edited project in the background"""
+    finished = pyqtSignal(str, bool)
+    error = pyqtSignal(str)
+    
+    def __init__(self, processor, project_path, progress_bus):
+        super().__init__()
+        self.processor = processor
+        self.project_path = project_path
+        self.progress_bus = progress_bus
+    
+    def run(self):
+        try:
+            output_path = self.processor.rerender_project(
+                self.project_path, progress_callback=self.progress_bus.post
+            )
+            self.finished.emit(output_path, True)
+        except Exception as e:
+            self.error.emit(str(e))
+            self.finished.emit("", False)
+
+class DeviceInfoThread(QThread):
+    """Detects GPU/CPU in the background (importing torch takes seconds)"""
+    detected = pyqtSignal(str)
+    
+    def run(self):
+        try:
+            self.detected.emit(get_device_info())
+        except Exception as e:
+            self.detected.emit(f"Device detection failed: {e}")
 
 class NataqMainWindow(QMainWindow):
     """Main application window"""
@@ -67,10 +171,37 @@ class NataqMainWindow(QMainWindow):
         self.output_path = None
         self.processor = VideoProcessor()
         self.processing_thread = None
+        self.preview_thread = None
+        
+        # Queued jobs share the processor's warm models
+        self.job_scheduler = JobScheduler(
+            models=self.processor.models,
+            metrics=self.processor.metrics,
+            concurrency=MAX_CONCURRENT_JOBS
+        )
+        self.prewarm_thread = None
+        self.prewarm_pending = False
         self.current_language = "en"  # Start with English
         
+        # Rate-limited progress/log updates (full session log spilled to disk)
+        self.progress_bus = ProgressBus(
+            fps=PROGRESS_FPS,
+            max_pending=LOG_MAX_LINES,
+            log_path=LOGS_DIR / f"nataq_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log",
+            parent=self
+        )
+        
         self.init_ui()
         self.apply_styles()
+        
+        # Hardware detection runs off the UI thread so the window appears immediately
+        self.device_info_text = None
+        self.device_thread = DeviceInfoThread()
+        self.device_thread.detected.connect(self.on_device_detected)
+        self.device_thread.start()
+        
+        # Start loading models once the window is on screen
+        QTimer.singleShot(500, self.start_prewarm)
     
     def init_ui(self):
         """Initialize the user interface"""
@@ -91,12 +222,14 @@ class NataqMainWindow(QMainWindow):
         # Tab widget for different sections
         tabs = QTabWidget()
         tabs.addTab(self.create_dubbing_tab(), "🎬 Video Dubbing")
+        self.queue_panel = JobQueuePanel(self.job_scheduler, self.current_job_settings)
+        tabs.addTab(self.queue_panel, "📋 Job Queue")
         tabs.addTab(self.create_settings_tab(), "⚙️ Settings")
         tabs.addTab(self.create_about_tab(), "ℹ️ About")
         main_layout.addWidget(tabs)
         
         # Status bar
-        self.statusBar().showMessage(f"Ready | {get_device_info()}")
+        self.statusBar().showMessage("Ready | Detecting hardware...")
     
     def create_header(self):
         """Create application header with branding"""
@@ -118,6 +251,11 @@ class NataqMainWindow(QMainWindow):
         layout.addLayout(title_layout)
         layout.addStretch()
         
+        # Background model load status
+        self.model_status_label = QLabel("Models: waiting to load...")
+        self.model_status_label.setStyleSheet("color: #666; font-style: italic;")
+        layout.addWidget(self.model_status_label)
+        
         # Language toggle
         self.lang_toggle = QPushButton("عربي")
         self.lang_toggle.setFixedSize(80, 35)
@@ -173,9 +311,15 @@ class NataqMainWindow(QMainWindow):
         self.voice_button_group.addButton(self.female_voice_radio, 1)
         voice_layout.addWidget(self.female_voice_radio)
         
+        self.auto_voice_radio = QRadioButton("🧭 Auto: Closest Library Voice to the Speaker")
+        self.auto_voice_radio.setToolTip("Needs a voice library (python build_voice_library.py)")
+        self.voice_button_group.addButton(self.auto_voice_radio, 3)
+        voice_layout.addWidget(self.auto_voice_radio)
+        
         self.custom_voice_radio = QRadioButton("📁 Custom Voice (Upload 5-30 sec audio)")
         self.voice_button_group.addButton(self.custom_voice_radio, 2)
         self.custom_voice_radio.toggled.connect(self.on_voice_type_changed)
+        self.voice_button_group.buttonClicked.connect(lambda _: self.start_prewarm())
         voice_layout.addWidget(self.custom_voice_radio)
         
         # Custom voice upload section (hidden by default)
@@ -195,6 +339,11 @@ class NataqMainWindow(QMainWindow):
         self.custom_voice_widget = custom_voice_widget
         voice_layout.addWidget(custom_voice_widget)
         
+        self.diarize_checkbox = QCheckBox("👥 Multiple speakers: dub each speaker with their own voice")
+        self.diarize_checkbox.setToolTip("Interviews and panels: speakers are told apart and each gets a "
+                                         "different voice (library voices when one is built)")
+        voice_layout.addWidget(self.diarize_checkbox)
+        
         voice_group.setLayout(voice_layout)
         layout.addWidget(voice_group)
         
@@ -248,6 +397,35 @@ class NataqMainWindow(QMainWindow):
         subtitle_group.setLayout(subtitle_layout)
         layout.addWidget(subtitle_group)
         
+        # Clip range (dub only part of the video)
+        clip_group = QGroupBox("✂️ Clip Range")
+        clip_layout = QHBoxLayout()
+        
+        self.clip_checkbox = QCheckBox("Only process")
+        self.clip_checkbox.setToolTip("Dub a selected clip instead of the whole video")
+        self.clip_checkbox.toggled.connect(self.on_clip_toggled)
+        clip_layout.addWidget(self.clip_checkbox)
+        
+        self.clip_start = QDoubleSpinBox()
+        self.clip_start.setRange(0, 24 * 3600)
+        self.clip_start.setDecimals(1)
+        self.clip_start.setSuffix(" s")
+        clip_layout.addWidget(QLabel("from"))
+        clip_layout.addWidget(self.clip_start)
+        
+        self.clip_end = QDoubleSpinBox()
+        self.clip_end.setRange(0.1, 24 * 3600)
+        self.clip_end.setDecimals(1)
+        self.clip_end.setSuffix(" s")
+        self.clip_end.setValue(30)
+        clip_layout.addWidget(QLabel("to"))
+        clip_layout.addWidget(self.clip_end)
+        clip_layout.addStretch()
+        
+        self.on_clip_toggled(False)
+        clip_group.setLayout(clip_layout)
+        layout.addWidget(clip_group)
+        
         # Whisper model selection
         model_group = QGroupBox("🤖 AI Model Settings")
         model_layout = QHBoxLayout()
@@ -258,6 +436,7 @@ class NataqMainWindow(QMainWindow):
         self.whisper_model = QComboBox()
         self.whisper_model.addItems(WHISPER_MODELS)
         self.whisper_model.setCurrentText(DEFAULT_WHISPER_MODEL)
+        self.whisper_model.currentTextChanged.connect(lambda _: self.start_prewarm())
         model_layout.addWidget(self.whisper_model)
         
         model_info = QLabel("(base=fastest, medium=balanced, large=best quality)")
@@ -268,13 +447,32 @@ class NataqMainWindow(QMainWindow):
         model_group.setLayout(model_layout)
         layout.addWidget(model_group)
         
-        # Process button
+        # Process buttons
+        process_layout = QHBoxLayout()
+        
         self.process_btn = QPushButton("🚀 Start Dubbing")
         self.process_btn.setMinimumHeight(50)
         self.process_btn.setFont(QFont("Segoe UI", 12, QFont.Bold))
         self.process_btn.clicked.connect(self.start_processing)
         self.process_btn.setEnabled(False)
-        layout.addWidget(self.process_btn)
+        process_layout.addWidget(self.process_btn, 3)
+        
+        self.preview_audio_btn = QPushButton("🎧 Preview")
+        self.preview_audio_btn.setMinimumHeight(50)
+        self.preview_audio_btn.setToolTip("Hear the first dubbed sentences within seconds; "
+                                          "they are reused in the full dub")
+        self.preview_audio_btn.clicked.connect(self.toggle_preview)
+        self.preview_audio_btn.setEnabled(False)
+        process_layout.addWidget(self.preview_audio_btn, 1)
+        
+        self.queue_btn = QPushButton("➕ Add to Queue")
+        self.queue_btn.setMinimumHeight(50)
+        self.queue_btn.setToolTip("Run this video in the Job Queue tab alongside other jobs")
+        self.queue_btn.clicked.connect(self.add_to_queue)
+        self.queue_btn.setEnabled(False)
+        process_layout.addWidget(self.queue_btn, 1)
+        
+        layout.addLayout(process_layout)
         
         # Progress section
         progress_group = QGroupBox("📊 Processing Progress")
@@ -287,12 +485,16 @@ class NataqMainWindow(QMainWindow):
         self.progress_bar.setTextVisible(True)
         progress_layout.addWidget(self.progress_bar)
         
-        self.progress_text = QTextEdit()
+        self.progress_text = QPlainTextEdit()
         self.progress_text.setReadOnly(True)
         self.progress_text.setMaximumHeight(150)
+        self.progress_text.setMaximumBlockCount(LOG_MAX_LINES)  # ring buffer of lines
         self.progress_text.setPlaceholderText("Processing logs will appear here...")
         progress_layout.addWidget(self.progress_text)
         
+        self.progress_bus.progress_changed.connect(self.progress_bar.setValue)
+        self.progress_bus.lines_ready.connect(self.append_log_lines)
+        
         progress_group.setLayout(progress_layout)
         layout.addWidget(progress_group)
         
@@ -314,6 +516,11 @@ class NataqMainWindow(QMainWindow):
         self.open_folder_btn.setEnabled(False)
         output_layout.addWidget(self.open_folder_btn)
         
+        self.rerender_btn = QPushButton("🔁 Re-render Project")
+        self.rerender_btn.setToolTip("Apply edits from a saved project.json, redoing only changed segments")
+        self.rerender_btn.clicked.connect(self.rerender_project)
+        output_layout.addWidget(self.rerender_btn)
+        
         output_group.setLayout(output_layout)
         layout.addWidget(output_group)
         
@@ -334,9 +541,9 @@ class NataqMainWindow(QMainWindow):
         device_group = QGroupBox("🖥️ Hardware Information")
         device_layout = QVBoxLayout()
         
-        device_info = QLabel(get_device_info())
-        device_info.setFont(QFont("Segoe UI", 10))
-        device_layout.addWidget(device_info)
+        self.device_info_label = QLabel("Detecting hardware...")
+        self.device_info_label.setFont(QFont("Segoe UI", 10))
+        device_layout.addWidget(self.device_info_label)
         
         device_group.setLayout(device_layout)
         layout.addWidget(device_group)
@@ -416,6 +623,48 @@ class NataqMainWindow(QMainWindow):
         
         return widget
     
+    def selected_voice_type(self):
+        """Voice type for the current radio selection"""
+        if self.female_voice_radio.isChecked():
+            return "female"
+        if self.custom_voice_radio.isChecked():
+            return "custom"
+        if self.auto_voice_radio.isChecked():
+            return "auto"
+        return "male"
+    
+    def start_prewarm(self):
+        """Load the selected Whisper size, NLLB, XTTS and voice in the background"""
+        if self.prewarm_thread and self.prewarm_thread.isRunning():
+            # Re-run with the latest selection once the current load finishes
+            self.prewarm_pending = True
+            return
+        
+        self.prewarm_pending = False
+        self.prewarm_thread = ModelPrewarmThread(
+            self.processor,
+            self.whisper_model.currentText(),
+            self.selected_voice_type(),
+            self.reference_audio
+        )
+        self.prewarm_thread.status.connect(self.update_model_status)
+        self.prewarm_thread.finished.connect(self.on_prewarm_finished)
+        self.prewarm_thread.start()
+    
+    def on_prewarm_finished(self):
+        if self.prewarm_pending:
+            self.start_prewarm()
+    
+    def update_model_status(self, message):
+        """Show background model load status in the header"""
+        self.model_status_label.setText(f"Models: {message}")
+    
+    def on_device_detected(self, info):
+        """Show detected hardware in the status bar and settings tab"""
+        self.device_info_text = info
+        self.device_info_label.setText(info)
+        self.statusBar().showMessage(f"Ready | {info}")
+    
     def on_voice_type_changed(self, checked):
         """Show/hide custom voice upload based on selection"""
         self.custom_voice_widget.setVisible(checked)
@@ -438,6 +687,8 @@ class NataqMainWindow(QMainWindow):
             self.video_path_label.setText(os.path.basename(file_path))
             self.video_path_label.setStyleSheet("color: #000;")
             self.process_btn.setEnabled(True)
+            self.queue_btn.setEnabled(True)
+            self.preview_audio_btn.setEnabled(True)
             self.log_message(f"✓ Video selected: {os.path.basename(file_path)}")
     
     def select_audio(self):
@@ -454,6 +705,7 @@ class NataqMainWindow(QMainWindow):
             self.audio_path_label.setText(os.path.basename(file_path))
             self.audio_path_label.setStyleSheet("color: #000;")
             self.log_message(f"✓ Custom voice selected: {os.path.basename(file_path)}")
+            self.start_prewarm()
     
     def on_target_language_changed(self, text):
         """Show/hide dialect selection based on target language"""
@@ -461,31 +713,108 @@ class NataqMainWindow(QMainWindow):
         self.dialect_label.setVisible(is_arabic)
         self.dialect_combo.setVisible(is_arabic)
     
-    def start_processing(self):
-        """Start video processing in background thread"""
-        if not self.video_path:
-            QMessageBox.warning(self, "No Video", "Please select a video file first.")
-            return
-        
+    def current_job_settings(self):
+        """Dubbing settings from the form as process_video arguments (None if incomplete)"""
         # Get voice type
-        voice_type = "male"  # default
-        if self.female_voice_radio.isChecked():
-            voice_type = "female"
-        elif self.custom_voice_radio.isChecked():
-            voice_type = "custom"
+        voice_type = self.selected_voice_type()
+        if voice_type == "custom":
             if not self.reference_audio:
                 QMessageBox.warning(self, "No Custom Voice", 
                                   "Please select a custom voice audio file or choose a pre-trained voice.")
-                return
+                return None
         
         # Get selected languages
         source = self.source_lang.currentText().split(" - ")[0]
         target = self.target_lang.currentText().split(" - ")[0]
         dialect = self.dialect_combo.currentText().split(" - ")[0] if target == "ar" else None
-        whisper_model = self.whisper_model.currentText()
         
-        # Get subtitle option
-        add_subtitles = self.subtitle_checkbox.isChecked()
+        settings = {
+            "voice_type": voice_type,
+            "reference_audio": self.reference_audio,
+            "source_lang": source,
+            "target_lang": target,
+            "dialect": dialect,
+            "whisper_model": self.whisper_model.currentText(),
+            "add_subtitles": self.subtitle_checkbox.isChecked()
+        }
+        
+        if self.clip_checkbox.isChecked():
+            if self.clip_end.value() <= self.clip_start.value():
+                QMessageBox.warning(self, "Invalid Clip",
+                                  "The clip end must be after the clip start.")
+                return None
+            settings["start_time"] = self.clip_start.value()
+            settings["end_time"] = self.clip_end.value()
+        
+        if self.diarize_checkbox.isChecked():
+            settings["diarize"] = True
+        
+        return settings
+    
+    def on_clip_toggled(self, checked):
+        """Enable the clip range inputs only when clipping is on"""
+        self.clip_start.setEnabled(checked)
+        self.clip_end.setEnabled(checked)
+    
+    def add_to_queue(self):
+        """Queue the selected video with the current settings"""
+        if not self.video_path:
+            QMessageBox.warning(self, "No Video", "Please select a video file first.")
+            return
+        
+        settings = self.current_job_settings()
+        if settings is None:
+            return
+        
+        self.queue_panel.add_job(self.video_path, settings)
+        self.log_message(f"📋 Queued: {os.path.basename(self.video_path)}")
+    
+    def toggle_preview(self):
+        """Start a streaming preview, or stop the one that is playing"""
+        if self.preview_thread and self.preview_thread.isRunning():
+            self.preview_thread.stop()
+            self.preview_audio_btn.setEnabled(False)
+            return
+        
+        if not self.video_path:
+            QMessageBox.warning(self, "No Video", "Please select a video file first.")
+            return
+        
+        settings = self.current_job_settings()
+        if settings is None:
+            return
+        
+        self.preview_thread = PreviewThread(self.job_processor(), settings, self.video_path,
+                                            self.progress_bus)
+        self.preview_thread.done.connect(self.on_preview_finished)
+        self.preview_thread.start()
+        self.preview_audio_btn.setText("⏹ Stop Preview")
+        self.log_message("🎧 Preparing preview...")
+    
+    def job_processor(self):
+        """
+        A processor of its own for a background task, sharing the warm models
+        
+        Jobs set their tracer and cancel event on the processor they run on, so
+        a preview or re-render next to a running job must not share it.
+        """
+        return VideoProcessor(models=self.processor.models, metrics=self.processor.metrics)
+    
+    def on_preview_finished(self, message):
+        self.preview_audio_btn.setText("🎧 Preview")
+        self.preview_audio_btn.setEnabled(True)
+        self.log_message(message)
+    
+    def start_processing(self):
+        """Start video processing in background thread"""
+        if not self.video_path:
+            QMessageBox.warning(self, "No Video", "Please select a video file first.")
+            return
+        
+        settings = self.current_job_settings()
+        if settings is None:
+            return
+        voice_type = settings["voice_type"]
         
         # Disable UI during processing
         self.process_btn.setEnabled(False)
@@ -494,6 +823,8 @@ class NataqMainWindow(QMainWindow):
         self.male_voice_radio.setEnabled(False)
         self.female_voice_radio.setEnabled(False)
         self.custom_voice_radio.setEnabled(False)
+        self.auto_voice_radio.setEnabled(False)
+        self.diarize_checkbox.setEnabled(False)
         self.progress_bar.setValue(0)
         self.progress_text.clear()
         
@@ -502,12 +833,16 @@ class NataqMainWindow(QMainWindow):
             self.processor,
             self.video_path,
             voice_type,
-            self.reference_audio,
-            source,
-            target,
-            dialect,
-            whisper_model,
-            add_subtitles  # Add subtitle option
+            settings["reference_audio"],
+            settings["source_lang"],
+            settings["target_lang"],
+            settings["dialect"],
+            settings["whisper_model"],
+            settings["add_subtitles"],  # Add subtitle option
+            progress_bus=self.progress_bus,
+            start_time=settings.get("start_time"),
+            end_time=settings.get("end_time"),
+            diarize=settings.get("diarize", False)
         )
         
         self.processing_thread.progress.connect(self.update_progress)
@@ -524,21 +859,40 @@ class NataqMainWindow(QMainWindow):
         self.log_message(message)
     
     def log_message(self, message):
-        """Add message to progress log"""
-        self.progress_text.append(message)
+        """Add message to progress log (batched by the progress bus)"""
+        self.progress_bus.post(None, message)
+    
+    def append_log_lines(self, text):
+        """Append one coalesced batch of log lines and scroll once"""
+        self.progress_text.appendPlainText(text)
         self.progress_text.verticalScrollBar().setValue(
             self.progress_text.verticalScrollBar().maximum()
         )
     
+    def closeEvent(self, event):
+        if not self.queue_panel.confirm_close():
+            event.ignore()
+            return
+        if self.preview_thread and self.preview_thread.isRunning():
+            self.preview_thread.stop()
+        self.progress_bus.close()
+        super().closeEvent(event)
+    
     def processing_finished(self, output_path, success):
         """Handle processing completion"""
+        # Show everything the worker posted before the final status
+        self.progress_bus.flush()
+        
         # Re-enable UI
-        self.process_btn.setEnabled(True)
+        self.process_btn.setEnabled(bool(self.video_path))
+        self.rerender_btn.setEnabled(True)
         self.video_btn.setEnabled(True)
         self.audio_btn.setEnabled(True)
         self.male_voice_radio.setEnabled(True)
         self.female_voice_radio.setEnabled(True)
         self.custom_voice_radio.setEnabled(True)
+        self.auto_voice_radio.setEnabled(True)
+        self.diarize_checkbox.setEnabled(True)
         
         if success:
             self.output_path = output_path
@@ -561,6 +915,32 @@ class NataqMainWindow(QMainWindow):
         self.log_message(f"❌ Error: {error_msg}")
         QMessageBox.critical(self, "Processing Error", f"An error occurred:\n\n{error_msg}")
     
+    def rerender_project(self):
+        """Re-render an edited project file"""
+        if self.processing_thread and self.processing_thread.isRunning():
+            QMessageBox.warning(self, "Busy", "Please wait for the current job to finish.")
+            return
+        
+        project_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Project File",
+            str(PROJECTS_DIR),
+            "Nataq Project (project.json)"
+        )
+        if not project_path:
+            return
+        
+        self.process_btn.setEnabled(False)
+        self.rerender_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        
+        self.processing_thread = ProjectRenderThread(self.job_processor(), project_path,
+                                                     self.progress_bus)
+        self.processing_thread.finished.connect(self.processing_finished)
+        self.processing_thread.error.connect(self.processing_error)
+        self.processing_thread.start()
+        self.log_message(f"🔁 Re-rendering project: {project_path}")
+    
     def preview_output(self):
         """Preview the output video"""
         if self.output_path and os.path.exists(self.output_path):
@@ -638,7 +1018,7 @@ class NataqMainWindow(QMainWindow):
                 background-color: #0066cc;
                 border-radius: 3px;
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 background-color: white;
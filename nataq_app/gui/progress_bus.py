@@ -0,0 +1,72 @@
+"""
+Progress Event Bus
+Coalesces progress/log messages from worker threads into fixed-rate UI updates
+Keeps a bounded in-memory backlog and spills the full log to a file
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class ProgressBus(QObject):
+    """Thread-safe sink for progress_callback, flushed on the UI thread"""
+    progress_changed = pyqtSignal(int)
+    lines_ready = pyqtSignal(str)
+
+    def __init__(self, fps=15, max_pending=2000, log_path=None, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._percent = None
+        self.log_path = log_path
+
+        # Full log goes to disk; the widget only ever sees a bounded tail
+        self._log_file = None
+        if log_path:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log_file = open(log_path, "a", encoding="utf-8")
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, int(1000 / fps)))
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def post(self, percent, message):
+        """Queue an update; callable from any thread"""
+        with self._lock:
+            if percent is not None:
+                self._percent = percent
+            if message:
+                if len(self._pending) == self._pending.maxlen:
+                    self._dropped += 1
+                self._pending.append(message)
+                if self._log_file:
+                    self._log_file.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
+
+    def flush(self):
+        """Emit at most one progress update and one batch of lines"""
+        with self._lock:
+            percent, self._percent = self._percent, None
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            if self._log_file:
+                self._log_file.flush()
+
+        if percent is not None:
+            self.progress_changed.emit(percent)
+        if lines:
+            if dropped:
+                lines.insert(0, f"… {dropped} messages skipped (full log: {self.log_path})")
+            self.lines_ready.emit("\n".join(lines))
+
+    def close(self):
+        self._timer.stop()
+        self.flush()
+        with self._lock:
+            if self._log_file:
+                self._log_file.close()
+                self._log_file = None
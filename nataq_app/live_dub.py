@@ -0,0 +1,74 @@
+"""
+Nataq - Live Dubbing
+Dub a live lecture into rolling HLS with bounded latency
+
+Examples:
+  python live_dub.py recording.ts --source en --target ar          (growing file)
+  ffmpeg -i ... -f mpegts - | python live_dub.py - --source en      (pipe)
+  python live_dub.py rtmp://127.0.0.1:1935/live/lecture             (push from OBS)
+  python live_dub.py udp://127.0.0.1:5000 --audio-only
+"""
+
+import argparse
+import multiprocessing
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.processor import VideoProcessor
+from core.live_dubber import LiveDubber
+from utils.config import (setup_environment, LIVE_LATENCY_SECONDS, LIVE_WINDOW_SECONDS,
+                          LIVE_BACKPRESSURE)
+
+
+def print_progress(percent, message):
+    print(message, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dub a live source into rolling HLS")
+    parser.add_argument("input", help="Growing file, '-' for stdin, or a local rtmp/udp/srt URL")
+    parser.add_argument("--source", default="en", help="Source language code")
+    parser.add_argument("--target", default="ar", help="Target language code")
+    parser.add_argument("--dialect", default="msa", help="Arabic dialect")
+    parser.add_argument("--voice", default="male", choices=["male", "female", "custom"])
+    parser.add_argument("--reference-audio", help="Voice to clone (with --voice custom)")
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--output-dir", help="Where live.m3u8 and its segments are written")
+    parser.add_argument("--latency", type=float, default=LIVE_LATENCY_SECONDS,
+                        help="Seconds the dubbed output runs behind the input")
+    parser.add_argument("--window", type=float, default=LIVE_WINDOW_SECONDS,
+                        help="Seconds of audio per transcription pass")
+    parser.add_argument("--backpressure", choices=["compress", "drop"], default=LIVE_BACKPRESSURE,
+                        help="What to do with segments TTS finished too late")
+    parser.add_argument("--audio-only", action="store_true", help="Input has no video stream")
+    args = parser.parse_args()
+
+    setup_environment()
+    dubber = LiveDubber(
+        VideoProcessor(), args.input, args.source, args.target,
+        dialect=args.dialect if args.target == "ar" else None,
+        voice_type=args.voice, reference_audio=args.reference_audio,
+        whisper_model=args.whisper_model, output_dir=args.output_dir,
+        latency=args.latency, window=args.window, backpressure=args.backpressure,
+        include_video=not args.audio_only, progress_callback=print_progress
+    )
+
+    dubber.start()
+    try:
+        playlist = dubber.wait()
+    except KeyboardInterrupt:
+        dubber.stop()
+        playlist = dubber.wait(timeout=10)
+
+    stats = dubber.stats
+    print(f"✓ Live dubbing ended: {playlist}")
+    print(f"  {stats['segments']} segments, {stats['compressed']} compressed, "
+          f"{stats['dropped']} dropped, {stats['skipped_seconds']:.1f}s skipped")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -8,6 +8,7 @@ Author: Nobel
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
@@ -38,4 +39,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Parallel TTS workers are spawned processes (needed for frozen builds)
+    multiprocessing.freeze_support()
     main()
@@ -4,7 +4,14 @@ Run this to verify all components are working
 """
 
 import sys
+import os
+import json
 import platform
+import subprocess
+
+# The GUI must appear quickly: these packages are loaded on first use only
+STARTUP_HEAVY_MODULES = ['torch', 'whisper', 'transformers', 'TTS']
+STARTUP_IMPORT_BUDGET_S = 1.5
 
 def test_python_version():
     """Check Python version"""
@@ -103,6 +110,44 @@ def test_ffmpeg():
         print(f"✗ Error: {e}")
         return False
 
+def measure_startup():
+    """Import the GUI in a fresh interpreter; returns {'seconds': ..., 'heavy': [...]}"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import gui.main_window\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {STARTUP_HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': elapsed, 'heavy': heavy}))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True,
+                          text=True,
+                          timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed: {result.stderr.strip().splitlines()[-1:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_startup_time():
+    """Check the GUI imports within budget without heavy ML packages"""
+    print("\nTesting startup import time...")
+    try:
+        report = measure_startup()
+        ok = True
+        if report['heavy']:
+            print(f"✗ Imported at startup: {', '.join(report['heavy'])}")
+            ok = False
+        if report['seconds'] > STARTUP_IMPORT_BUDGET_S:
+            print(f"✗ GUI import took {report['seconds']:.2f}s (budget {STARTUP_IMPORT_BUDGET_S}s)")
+            ok = False
+        if ok:
+            print(f"✓ GUI import took {report['seconds']:.2f}s (budget {STARTUP_IMPORT_BUDGET_S}s)")
+        return ok
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        return False
+
 def test_imports():
     """Test all required imports"""
     print("\nTesting all imports...")
@@ -142,6 +187,7 @@ def main():
     results.append(("TTS", test_tts()))
     results.append(("PyQt5", test_pyqt5()))
     results.append(("FFmpeg", test_ffmpeg()))
+    results.append(("Startup Time", test_startup_time()))
     results.append(("All Imports", test_imports()))
     
     print("\n" + "="*50)
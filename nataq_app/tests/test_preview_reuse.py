@@ -0,0 +1,83 @@
+"""
+Preview audio reuse: segments heard in a preview are not synthesized again by the full dub
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core.model_manager
+import core.preview
+import core.processor
+from core.processor import VideoProcessor
+from core.segmenter import xtts_char_limit
+
+LANG = "ar"
+SHORT = "مرحبا بكم في هذا الفيديو."
+LONG = " ".join(["هذه جملة طويلة عن تاريخ العلوم في الحضارة العربية."] * 8)
+
+
+class FakePlayer:
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, block):
+        self.blocks.append(block)
+
+    def write_silence(self, seconds):
+        pass
+
+
+def make_processor(monkeypatch):
+    # Device detection imports torch; these tests never touch a real model
+    monkeypatch.setattr(core.model_manager, "get_device", lambda: "cpu")
+    monkeypatch.setattr(core.processor, "get_device", lambda: "cpu")
+    processor = VideoProcessor()
+    processor.job_cache = None
+    processor.transcript_cache = None
+    processor.models.tts_engine = object()
+    streamed = []
+
+    def fake_stream(tts_engine, text, lang_code, voice_latents, speaker_wav=None,
+                    stream_chunk_size=20):
+        streamed.append(text)
+        yield np.full(len(text) * 10, 0.1, dtype=np.float32)
+
+    def no_synthesis(*args, **kwargs):
+        raise AssertionError("previewed text was synthesized again")
+
+    monkeypatch.setattr(core.preview, "stream_segment", fake_stream)
+    monkeypatch.setattr(processor, "_synthesize_chunk", no_synthesis)
+    monkeypatch.setattr(processor, "use_parallel_tts", lambda: False)
+    return processor, streamed
+
+
+def test_previewed_segment_is_reused(monkeypatch):
+    processor, _ = make_processor(monkeypatch)
+    assert processor._preview_segment(SHORT, LANG, None, None, FakePlayer())
+
+    synthesized, failed = processor._synthesize_speakers(
+        [(0, SHORT)], {}, {}, None, LANG, 24000
+    )
+    assert failed == 0
+    assert synthesized[0].size == len(SHORT) * 10
+
+
+def test_long_previewed_segment_is_split_and_reused(monkeypatch):
+    assert len(LONG) > xtts_char_limit(LANG)
+    processor, streamed = make_processor(monkeypatch)
+    assert processor._preview_segment(LONG, LANG, None, None, FakePlayer())
+
+    # Streamed in XTTS-sized pieces, never the whole over-limit text
+    assert len(streamed) > 1
+    assert all(len(piece) <= xtts_char_limit(LANG) for piece in streamed)
+
+    synthesized, failed = processor._synthesize_speakers(
+        [(0, LONG)], {}, {}, None, LANG, 24000
+    )
+    assert failed == 0
+    assert synthesized[0].size >= sum(len(piece) * 10 for piece in streamed)
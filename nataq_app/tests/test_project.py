@@ -0,0 +1,171 @@
+"""
+Dubbing projects: edits invalidate only what depends on them, and the track is rebuilt
+only where segments changed
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.project import DubbingProject
+
+RATE = 1000
+SETTINGS = {"source_lang": "en", "target_lang": "ar", "dialect": None, "add_subtitles": False}
+
+
+def make_project(tmp_path, timings, duration=10.0):
+    project = DubbingProject.create(tmp_path / "project", tmp_path / "video.mp4", SETTINGS,
+                                    duration, "male", sample_rate=RATE)
+    project.set_segments([
+        {"id": i, "start": start, "end": end, "source": f"source {i}", "text": f"translation {i}"}
+        for i, (start, end) in enumerate(timings)
+    ])
+    return project
+
+
+def voice(project, segment, level):
+    """Store constant audio as long as the segment's own timing"""
+    samples = int(round((segment["end"] - segment["start"]) * RATE))
+    project.store_audio(segment, np.full(samples, level, dtype=np.float32))
+
+
+def level_at(buffer, start, end):
+    """Mean level of the track between two times (seconds)"""
+    return float(buffer[int(start * RATE):int(end * RATE)].mean())
+
+
+def render(project, level=0.25):
+    pending = project.needs_audio()
+    for seg in pending:
+        voice(project, seg, level)
+    timeline, placed = project.rebuild_track(pending)
+    project.save()
+    return timeline.buffer, placed
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = make_project(tmp_path, [(0.0, 2.0), (3.0, 5.0), (6.0, 8.0)])
+    render(project)
+    return DubbingProject.load(project.path)
+
+
+def test_first_render_places_every_segment(project):
+    assert project.needs_audio() == []
+    assert project.needs_translation() == []
+    buffer = np.load(project.project_dir / "track.npy")
+    for seg in project.segments:
+        assert level_at(buffer, seg["start"], seg["end"]) == pytest.approx(0.25, abs=1e-3)
+        assert seg["placed"] == [int(seg["start"] * RATE), int(seg["end"] * RATE)]
+    assert level_at(buffer, 2.0, 3.0) == 0
+
+
+def test_source_edit_needs_translation_then_audio_of_that_segment_only(project):
+    project.segments[1]["source"] = "an edited source sentence"
+    assert project.needs_translation() == [project.segments[1]]
+    assert project.needs_audio() == []
+
+    project.set_translation(project.segments[1], "ترجمة جديدة")
+    assert project.needs_translation() == []
+    assert project.needs_audio() == [project.segments[1]]
+
+
+def test_text_edit_replaces_only_that_segment(project):
+    project.segments[1]["text"] = "an edited translation"
+    pending = project.needs_audio()
+    assert pending == [project.segments[1]]
+
+    voice(project, pending[0], 0.5)
+    timeline, placed = project.rebuild_track(pending)
+    assert placed == 1
+    assert level_at(timeline.buffer, 3.0, 5.0) == pytest.approx(0.5, abs=1e-3)
+    assert level_at(timeline.buffer, 0.0, 2.0) == pytest.approx(0.25, abs=1e-3)
+    assert level_at(timeline.buffer, 6.0, 8.0) == pytest.approx(0.25, abs=1e-3)
+    assert project.needs_audio() == []
+
+
+def test_voice_change_invalidates_audio(project):
+    project.data["voice"] = "female"
+    assert project.needs_audio() == project.segments
+
+
+def test_moved_segment_is_replaced_without_synthesis(project):
+    project.segments[1]["start"] = 4.0
+    project.segments[1]["end"] = 6.0
+    assert project.needs_audio() == []
+
+    timeline, placed = project.rebuild_track()
+    # The moved segment and its predecessor, whose slot now ends later
+    assert placed == 2
+    assert level_at(timeline.buffer, 3.0, 4.0) == 0
+    assert level_at(timeline.buffer, 4.0, 6.0) == pytest.approx(0.25, abs=1e-3)
+    assert project.segments[1]["slot"] == [4.0, 6.0]
+    assert project.segments[1]["placed"] == [4000, 6000]
+
+
+def test_moved_end_replaces_only_when_the_slot_changes(project):
+    # The last segment's slot runs to the end of the video either way
+    project.segments[2]["end"] = 9.0
+    _, placed = project.rebuild_track()
+    assert placed == 0
+
+    # Its new slot reaches into segment 1, which is cleared and placed again with it
+    project.segments[0]["end"] = 3.5
+    timeline, placed = project.rebuild_track()
+    assert placed == 2
+    assert project.segments[0]["slot"] == [0.0, 3.5]
+    assert level_at(timeline.buffer, 0.0, 2.0) == pytest.approx(0.25, abs=1e-3)
+    assert level_at(timeline.buffer, 3.0, 5.0) == pytest.approx(0.25, abs=1e-3)
+
+
+def test_deleted_line_removes_its_audio(project):
+    project.segments[1]["text"] = ""
+    pending = project.needs_audio()
+    assert pending == [project.segments[1]]
+
+    timeline, _ = project.rebuild_track(pending)
+    assert level_at(timeline.buffer, 3.0, 5.0) == 0
+    assert np.abs(timeline.buffer[3000:5000]).max() == 0
+    assert level_at(timeline.buffer, 0.0, 2.0) == pytest.approx(0.25, abs=1e-3)
+    assert level_at(timeline.buffer, 6.0, 8.0) == pytest.approx(0.25, abs=1e-3)
+    assert project.segments[1]["audio"] is None
+    assert project.segments[1]["placed"] is None
+    assert project.needs_audio() == []
+
+    # Stays deleted across a reload and another rebuild
+    project.save()
+    project = DubbingProject.load(project.path)
+    timeline, placed = project.rebuild_track()
+    assert placed == 0
+    assert np.abs(timeline.buffer[3000:5000]).max() == 0
+
+
+def test_overlapping_neighbour_is_replaced_with_the_edit(tmp_path):
+    # Segment 0 runs into segment 1, so their audio is mixed between 2 and 3 seconds
+    project = make_project(tmp_path, [(0.0, 3.0), (2.0, 5.0), (7.0, 9.0)])
+    render(project)
+    assert level_at(np.load(project.project_dir / "track.npy"), 2.0, 3.0) == pytest.approx(0.5, abs=1e-3)
+
+    project.segments[1]["text"] = "an edited translation"
+    pending = project.needs_audio()
+    voice(project, pending[0], 0.125)
+    timeline, placed = project.rebuild_track(pending)
+
+    # Clearing segment 1's range cut into segment 0, which is placed again too
+    assert placed == 2
+    assert level_at(timeline.buffer, 0.0, 2.0) == pytest.approx(0.25, abs=1e-3)
+    assert level_at(timeline.buffer, 2.0, 3.0) == pytest.approx(0.375, abs=1e-3)
+    assert level_at(timeline.buffer, 3.0, 5.0) == pytest.approx(0.125, abs=1e-3)
+    assert level_at(timeline.buffer, 7.0, 9.0) == pytest.approx(0.25, abs=1e-3)
+
+
+def test_missing_track_is_rebuilt_in_full(project):
+    (project.project_dir / "track.npy").unlink()
+    timeline, placed = project.rebuild_track()
+    assert placed == 3
+    assert level_at(timeline.buffer, 3.0, 5.0) == pytest.approx(0.25, abs=1e-3)
@@ -0,0 +1,89 @@
+"""
+Sentence segmentation and budget packing for translation, TTS and subtitles
+"""
+
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.segmenter import (pack, split_clauses, split_for_tts, split_sentences, subtitle_units,
+                            translation_units, tts_chunks, xtts_char_limit)
+
+
+def test_arabic_question_mark_ends_sentence():
+    text = "كيف حالك؟ أنا بخير، شكرا لك. إلى اللقاء"
+    assert split_sentences(text, "ar") == ["كيف حالك؟", "أنا بخير، شكرا لك.", "إلى اللقاء"]
+
+
+def test_arabic_comma_and_semicolon_split_clauses():
+    assert split_clauses("أنا بخير، شكرا لك؛ إلى اللقاء") == ["أنا بخير،", "شكرا لك؛", "إلى اللقاء"]
+
+
+def test_cjk_full_stop_needs_no_space():
+    assert split_sentences("今日は晴れです。明日は雨です！本当？", "ja") == [
+        "今日は晴れです。", "明日は雨です！", "本当？"
+    ]
+    assert split_sentences("我们开始吧。然后休息。", "zh-cn") == ["我们开始吧。", "然后休息。"]
+
+
+def test_language_picks_terminals():
+    # Latin text does not end sentences at CJK full stops, Arabic text does at ؟
+    assert split_sentences("One。Two. Three", "en") == ["One。Two.", "Three"]
+    assert split_sentences("One؟ Two", "en") == ["One؟ Two"]
+    assert split_sentences("One؟ Two", "ar") == ["One؟", "Two"]
+
+
+def test_abbreviations_and_initials_do_not_end_sentences():
+    text = "Dr. Smith met Mr. Jones, e.g. at work. The U.S. team won."
+    assert split_sentences(text, "en") == ["Dr. Smith met Mr. Jones, e.g. at work.", "The U.S. team won."]
+    assert split_sentences("Wir kamen z.B. spät an. Danke.", "de") == ["Wir kamen z.B. spät an.", "Danke."]
+
+
+def test_no_is_an_abbreviation_only_before_a_number():
+    assert split_sentences("I like it. No. I do not.", "en") == ["I like it.", "No.", "I do not."]
+    assert split_sentences("See No. 5 for details. Thanks.", "en") == ["See No. 5 for details.", "Thanks."]
+
+
+def test_pack_merges_up_to_budget():
+    units = ["aaaa", "bbbb", "cccc", "dd"]
+    assert pack(units, 9) == ["aaaa bbbb", "cccc dd"]
+    assert pack(units, 100) == ["aaaa bbbb cccc dd"]
+
+
+def test_pack_never_exceeds_budget():
+    long_sentence = "word, " * 40 + "end."
+    pieces = pack([long_sentence, "Short one."], 30)
+    assert all(len(piece) <= 30 for piece in pieces)
+    assert " ".join(pieces).split() == (long_sentence + " Short one.").split()
+
+    unbroken = "x" * 95
+    assert [len(piece) for piece in pack([unbroken], 30)] == [30, 30, 30, 5]
+
+
+def test_pack_with_token_sizes():
+    count_tokens = lambda unit: len(unit.split())
+    units = translation_units("One two three. Four five. Six seven eight nine.", "en",
+                              count_tokens, budget=5)
+    assert units == ["One two three. Four five.", "Six seven eight nine."]
+    assert all(count_tokens(unit) <= 5 for unit in units)
+
+
+def test_tts_pieces_fit_language_limit():
+    text = " ".join(["هذه جملة طويلة عن تاريخ العلوم في الحضارة العربية."] * 8)
+    pieces = tts_chunks(text, "ar")
+    assert len(pieces) > 1
+    assert all(len(piece) <= xtts_char_limit("ar") for piece in pieces)
+    assert split_for_tts("جملة قصيرة.", "ar") == ["جملة قصيرة."]
+
+
+def test_cjk_packs_without_spaces():
+    assert tts_chunks("今日は晴れです。明日は雨です。", "ja") == ["今日は晴れです。明日は雨です。"]
+
+
+def test_subtitle_units_respect_max_chars():
+    text = "First sentence here. Second one. A third, rather longer sentence that goes on."
+    cues = subtitle_units(text, "en", max_chars=40)
+    assert cues[0] == "First sentence here. Second one."
+    assert all(len(cue) <= 40 for cue in cues)
@@ -0,0 +1,30 @@
+"""
+Startup budget: the GUI imports quickly and without the heavy ML packages
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from test_installation import STARTUP_HEAVY_MODULES, STARTUP_IMPORT_BUDGET_S, measure_startup
+
+pytest.importorskip("PyQt5")
+
+
+@pytest.fixture(scope="module")
+def startup():
+    return measure_startup()
+
+
+def test_gui_import_defers_heavy_modules(startup):
+    assert startup["heavy"] == [], f"imported at startup: {startup['heavy']} (of {STARTUP_HEAVY_MODULES})"
+
+
+def test_gui_import_within_budget(startup):
+    assert startup["seconds"] <= STARTUP_IMPORT_BUDGET_S, (
+        f"GUI import took {startup['seconds']:.2f}s (budget {STARTUP_IMPORT_BUDGET_S}s)"
+    )
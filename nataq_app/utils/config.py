@@ -3,7 +3,7 @@ Configuration and Environment Setup
 """
 
 import os
-import torch
+from functools import lru_cache
 from pathlib import Path
 
 # Application directories
@@ -11,6 +11,7 @@ BASE_DIR = Path(__file__).parent.parent
 MODELS_DIR = BASE_DIR / "models"
 TEMP_DIR = BASE_DIR / "temp"
 OUTPUT_DIR = BASE_DIR / "output"
+CACHE_DIR = BASE_DIR / "cache"
 
 # Supported languages and dialects
 LANGUAGES = {
@@ -41,49 +42,173 @@ DEFAULT_WHISPER_MODEL = "medium"
 
 # NLLB-200 model for translation
 NLLB_MODEL = "facebook/nllb-200-distilled-600M"
+TRANSLATION_BATCH_SIZE = 16  # segments per generate() call
+# Untimed text is packed into inputs of up to this many tokens (well under the 512 truncation)
+NLLB_TOKEN_BUDGET = int(os.environ.get("NATAQ_NLLB_TOKEN_BUDGET", "200"))
 
 # XTTS v2 for voice cloning
 XTTS_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
 
+# Inference precision per model: "fp32", "fp16" (CUDA; falls back to fp32 on CPU),
+# "bf16" (autocast, where the CPU/GPU supports it) or "int8" (CPU dynamic
+# quantization of Linear layers in NLLB and the Whisper decoder; XTTS runs fp32
+# when int8 is requested).
+# Compare speed and chrF against fp32 with benchmark_precision.py
+WHISPER_PRECISION = os.environ.get("NATAQ_WHISPER_PRECISION", "fp16")
+NLLB_PRECISION = os.environ.get("NATAQ_NLLB_PRECISION", "fp32")
+XTTS_PRECISION = os.environ.get("NATAQ_XTTS_PRECISION", "fp32")
+
+# Model residency between pipeline stages:
+#   "resident"   - keep Whisper, NLLB and XTTS loaded together (servers with RAM to spare)
+#   "sequential" - release each model when its stage ends and preload the next
+#                  stage's model in the background (16 GB machines)
+MODEL_RESIDENCY = os.environ.get("NATAQ_MODEL_RESIDENCY", "resident")
+
+# Parallel XTTS on CPU: chunks are sharded across worker processes, each with
+# its own model copy (set NATAQ_PARALLEL_TTS=1; ignored on GPU)
+PARALLEL_TTS = os.environ.get("NATAQ_PARALLEL_TTS", "0") == "1"
+PARALLEL_TTS_WORKERS = 0  # 0 = choose from core count and RAM budget
+TTS_THREADS_PER_WORKER = 4  # torch.set_num_threads in each worker
+TTS_WORKER_RAM_GB = 3.0  # resident size of one XTTS v2 copy on CPU
+PARALLEL_TTS_RAM_FRACTION = 0.6  # share of physical RAM the workers may use
+
 # Pre-trained voices directory
 VOICES_DIR = BASE_DIR / "voices"
 
-# Pre-trained voice options
+# Pre-trained voice options (reference clips in VOICES_DIR, ingested into the voice library)
 PRETRAINED_VOICES = {
     "male_ar": {
         "name": "Arabic Male Voice",
         "name_ar": "صوت ذكر عربي",
         "file": "male_arabic.wav",
-        "language": "ar"
+        "language": "ar",
+        "gender": "male",
+        "dialect": "msa"
     },
     "female_ar": {
         "name": "Arabic Female Voice", 
         "name_ar": "صوت أنثى عربي",
         "file": "female_arabic.wav",
-        "language": "ar"
+        "language": "ar",
+        "gender": "female",
+        "dialect": "msa"
     },
     "male_en": {
         "name": "English Male Voice",
         "name_ar": "صوت ذكر إنجليزي",
         "file": "male_english.wav",
-        "language": "en"
+        "language": "en",
+        "gender": "male",
+        "dialect": None
     },
     "female_en": {
         "name": "English Female Voice",
         "name_ar": "صوت أنثى إنجليزي", 
         "file": "female_english.wav",
-        "language": "en"
+        "language": "en",
+        "gender": "female",
+        "dialect": None
     }
 }
 
+# Voice library (build_voice_library.py): normalized clips plus XTTS latents in one mmap'd pack
+VOICE_LIBRARY_DIR = VOICES_DIR / "library"
+VOICE_LIBRARY_SAMPLE_RATE = 22050
+VOICE_LIBRARY_MAX_SECONDS = 30  # reference audio kept per voice
+VOICE_LIBRARY_WORKERS = 4  # parallel ffmpeg normalizations
+AUTO_VOICE_SECONDS = 8.0  # speech of the original speaker embedded for voice_type="auto"
+
+# Multi-speaker dubbing (process_video diarize=True): segments clustered by speaker, one voice each
+DIARIZATION_ENABLED = False
+DIARIZATION_THRESHOLD = 0.55  # speaker-encoder cosine similarity below which clusters stay apart
+DIARIZATION_MAX_SPEAKERS = 6
+DIARIZATION_MIN_SEGMENT_SECONDS = 1.0  # shorter segments take the nearest speaker's label
+
 # Processing settings
 MAX_VIDEO_SIZE_MB = 500
 SUPPORTED_VIDEO_FORMATS = [".mp4", ".avi", ".mov", ".mkv", ".webm"]
 SUPPORTED_AUDIO_FORMATS = [".mp3", ".wav", ".m4a", ".ogg"]
 
+# Job queue: videos processed at the same time (models are shared between them)
+MAX_CONCURRENT_JOBS = 2
+
+# Whole-job result cache: identical resubmissions return the finished output
+JOB_CACHE_ENABLED = True
+
+# Whisper transcripts cached by audio fingerprint (reused across dialects and voices)
+TRANSCRIPT_CACHE_ENABLED = True
+
+# Editable project per job (segments, translations, per-segment audio) for incremental re-renders
+PROJECTS_ENABLED = True
+PROJECTS_DIR = BASE_DIR / "projects"
+
+# Live dubbing (live_dub.py): rolling ASR windows, output a fixed latency behind the input
+LIVE_WINDOW_SECONDS = 5.0  # audio per Whisper pass
+LIVE_LATENCY_SECONDS = 12.0  # dubbed output delay; must exceed the window plus MT + TTS time
+LIVE_COMMIT_GUARD_SECONDS = 1.0  # segments ending this close to the window edge wait for the next pass
+LIVE_QUEUE_SEGMENTS = 16  # segments waiting for TTS before the oldest is dropped
+LIVE_BACKPRESSURE = "compress"  # late segments: "compress" into what is left of their slot, or "drop"
+LIVE_HLS_SEGMENT_SECONDS = 4
+LIVE_HLS_LIST_SIZE = 6
+LIVE_DIR = OUTPUT_DIR / "live"
+
+# Subtitle burn-in split at keyframes and encoded in parallel ffmpeg processes
+# (opt-in with NATAQ_SPLIT_ENCODE=1; measure with benchmark_encoding.py first)
+SPLIT_ENCODE = os.environ.get("NATAQ_SPLIT_ENCODE", "0") == "1"
+SPLIT_ENCODE_WORKERS = 0  # 0 = one per SPLIT_ENCODE_THREADS cores
+SPLIT_ENCODE_THREADS = 4  # x264 threads per piece
+SPLIT_ENCODE_MIN_SECONDS = 120  # shorter videos are encoded in one process
+SPLIT_ENCODE_MIN_PIECE_SECONDS = 20
+
+# Adaptive-bitrate packaging (process_video package=["hls", "dash"]): (height, video bitrate)
+PACKAGING_LADDER = [(1080, "5000k"), (720, "2800k"), (480, "1400k"), (360, "800k")]
+PACKAGING_SEGMENT_SECONDS = 4
+PACKAGING_AUDIO_BITRATE = "128k"
+PACKAGING_FORMATS_DEFAULT = []  # e.g. ["hls", "dash"] to package every job
+
+# Stage handoff through pipes: extracted audio, the dubbing track and subtitles never touch disk
+# (long subtitled videos still go through files when SPLIT_ENCODE applies)
+PIPE_HANDOFF = os.environ.get("NATAQ_PIPE_HANDOFF", "1") == "1"
+
+# Pipeline metrics export (None disables each exporter)
+METRICS_FILE = None  # e.g. BASE_DIR / "metrics" / "nataq.prom" for a textfile collector
+METRICS_PORT = None  # e.g. 9464 to serve http://127.0.0.1:9464/metrics
+
+# Streaming preview: first segments are played while they synthesize
+PREVIEW_SECONDS = 60  # audio transcribed for a preview
+PREVIEW_SEGMENTS = 6  # translated segments played
+PREVIEW_STREAM_CHUNK_SIZE = 20  # XTTS GPT tokens per streamed block (lower = earlier audio)
+
+# GUI progress log: coalesced to a fixed frame rate, bounded in memory
+LOGS_DIR = BASE_DIR / "logs"
+PROGRESS_FPS = 15
+LOG_MAX_LINES = 2000
+
+# Opt-in Chrome/Perfetto trace per dubbing job (set NATAQ_TRACE=1)
+TRACE_JOBS = os.environ.get("NATAQ_TRACE", "0") == "1"
+TRACES_DIR = BASE_DIR / "traces"
+
 # GPU settings
-USE_GPU = torch.cuda.is_available()
-DEVICE = "cuda" if USE_GPU else "cpu"
+# torch is imported lazily: detecting CUDA costs seconds at startup, so
+# USE_GPU / DEVICE are resolved on first access (see __getattr__ below)
+
+@lru_cache(maxsize=None)
+def use_gpu():
+    """Whether CUDA is available (imports torch on first call)"""
+    import torch
+    return torch.cuda.is_available()
+
+def get_device():
+    """Device string for model loading ("cuda" or "cpu")"""
+    return "cuda" if use_gpu() else "cpu"
+
+def __getattr__(name):
+    # Backwards-compatible lazy module attributes
+    if name == "USE_GPU":
+        return use_gpu()
+    if name == "DEVICE":
+        return get_device()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def setup_environment():
     """Set up required environment variables and directories"""
@@ -95,8 +220,14 @@ def setup_environment():
     for directory in [MODELS_DIR, TEMP_DIR, OUTPUT_DIR, VOICES_DIR]:
         directory.mkdir(parents=True, exist_ok=True)
     
-    # Set PyTorch settings for optimal performance
-    if USE_GPU:
+    return True
+
+@lru_cache(maxsize=None)
+def setup_torch():
+    """Apply PyTorch performance settings (called before the first model load)"""
+    import torch
+    
+    if use_gpu():
         torch.backends.cudnn.benchmark = True
         torch.backends.cuda.matmul.allow_tf32 = True
     
@@ -104,7 +235,8 @@ def setup_environment():
 
 def get_device_info():
     """Get GPU/CPU device information"""
-    if USE_GPU:
+    if use_gpu():
+        import torch
         gpu_name = torch.cuda.get_device_name(0)
         gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1024**3
         return f"GPU: {gpu_name} ({gpu_memory:.1f}GB)"
@@ -128,27 +260,3 @@ NLLB_LANG_CODES = {
 
 # Whisper language codes
 WHISPER_LANG_CODES = list(LANGUAGES.keys())
-
-# Pre-trained voice samples for faster processing
-PRETRAINED_VOICES = {
-    "male": {
-        "name": "Male Voice (Arabic)",
-        "description": "Professional male Arabic voice",
-        "sample_url": None,  # Will be set to local path after first generation
-        "language": "ar"
-    },
-    "female": {
-        "name": "Female Voice (Arabic)",
-        "description": "Professional female Arabic voice", 
-        "sample_url": None,
-        "language": "ar"
-    },
-    "custom": {
-        "name": "Custom Voice (Upload)",
-        "description": "Use your own voice sample",
-        "sample_url": None
-    }
-}
-
-# Voice samples directory
-VOICES_DIR = BASE_DIR / "voices"